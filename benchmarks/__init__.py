@@ -0,0 +1 @@
+"""Stellar Observatory benchmarks"""
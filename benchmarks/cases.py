@@ -0,0 +1,126 @@
+"""Benchmark cases: synthetic FBASs and frozen stellarbeat snapshots"""
+import json
+import os
+from functools import partial
+from typing import Callable, Dict, List, Tuple
+
+import numpy
+
+from stellarobservatory.centralities import get_eigenvector_centralities, \
+    get_hierarchical_intactness_ls_centralities, get_intactness_ls_centralities, \
+    get_minimal_intactness_ls_centralities, get_quorum_eigenvector_centralities, \
+    get_quorum_intersection_eigenvector_centralities, \
+    get_quorum_intersection_subgraph_centralities, get_quorum_subgraph_centralities, \
+    get_subgraph_centralities
+from stellarobservatory.compiled_fbas import compile_definitions
+from stellarobservatory.dsets import enumerate_dsets
+from stellarobservatory.generators import get_broken_intersection_fbas, get_random_fbas, \
+    get_symmetric_fbas, get_tiered_fbas
+from stellarobservatory.intactness import get_intact_nodes
+from stellarobservatory.pairwise_intersection import quorum_intersection_pairwise
+from stellarobservatory.quorum_intersection import enumerate_smallest_minimal_quorums, \
+    quorum_intersection
+from stellarobservatory.quorum_intersection_sat import quorum_intersection_sat
+from stellarobservatory.quorum_slice_definition import Definitions, get_is_slice_contained, \
+    restrict_definition
+from stellarobservatory.quorums import count_quorums, enumerate_quorums
+from stellarobservatory.resilience import enumerate_minimal_blocking_sets, \
+    enumerate_minimal_splitting_sets
+from stellarobservatory.stellarbeat import StellarbeatNode, convert_stellarbeat_to_observatory
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+# name -> function returning stellarbeat nodes
+Case = Tuple[str, Callable[[], List[StellarbeatNode]]]
+# name -> (analysis(nodes, definitions), maximum number of nodes)
+Analysis = Tuple[Callable[[List, Definitions], object], int]
+
+def get_synthetic_cases(quick: bool = False) -> List[Case]:
+    """Scaling runs of the synthetic FBAS generators"""
+    scales = [4, 6, 8] if quick else [4, 6, 8, 10, 12, 16]
+    organizations = [3, 4] if quick else [3, 4, 5, 6]
+    cases: List[Case] = []
+    cases += [(f'symmetric-{n}', partial(get_symmetric_fbas, n)) for n in scales]
+    cases += [(f'tiered-{n}x3', partial(get_tiered_fbas, n, 3, n_watchers=2))
+              for n in organizations]
+    cases += [(f'random-{n}', partial(get_random_fbas, n, seed=n)) for n in scales]
+    cases += [(f'broken-{n}x3', partial(get_broken_intersection_fbas, n, 3))
+              for n in organizations]
+    return cases
+
+def load_snapshot(path: str) -> List[StellarbeatNode]:
+    """Load a frozen stellarbeat snapshot (JSON list of nodes)"""
+    with open(path, encoding='utf-8') as snapshot_file:
+        return json.load(snapshot_file)
+
+def get_snapshot_cases() -> List[Case]:
+    """Frozen stellarbeat snapshots in the fixtures directory"""
+    return [
+        ('snapshot-' + os.path.splitext(file_name)[0],
+         partial(load_snapshot, os.path.join(FIXTURES_DIR, file_name)))
+        for file_name in sorted(os.listdir(FIXTURES_DIR)) if file_name.endswith('.json')
+    ]
+
+def get_fbas(nodes: List, definitions: Definitions):
+    """Return the FBAS for a node list"""
+    return get_is_slice_contained(definitions), set(nodes)
+
+def get_ill_behaved_weight(ill_behaved_nodes) -> float:
+    """Weights for intactness-based centralities"""
+    return 1 / 2**len(ill_behaved_nodes)
+
+def get_mu(matrix: numpy.ndarray) -> float:
+    """Matrix scaling for intactness-based centralities"""
+    norm = float(numpy.linalg.norm(matrix, 2))
+    return 0.5 / norm if norm > 0 else 0.0
+
+ANALYSES: Dict[str, Analysis] = {
+    'enumerate_quorums': (
+        lambda nodes, definitions: sum(1 for _ in enumerate_quorums(get_fbas(nodes, definitions))),
+        20),
+    'count_quorums': (
+        lambda nodes, definitions: count_quorums(get_fbas(nodes, definitions)), 20),
+    'quorum_intersection': (
+        lambda nodes, definitions: quorum_intersection(get_fbas(nodes, definitions)), 64),
+    'quorum_intersection_sat': (quorum_intersection_sat, 64),
+    'quorum_intersection_pairwise': (
+        lambda nodes, definitions: quorum_intersection_pairwise(get_fbas(nodes, definitions)),
+        16),
+    'smallest_minimal_quorums': (
+        lambda nodes, definitions: list(enumerate_smallest_minimal_quorums(
+            compile_definitions(definitions, nodes), 10)), 64),
+    'get_intact_nodes': (
+        lambda nodes, definitions: get_intact_nodes(get_fbas(nodes, definitions), {nodes[0]}),
+        64),
+    'enumerate_dsets': (
+        lambda nodes, definitions: list(enumerate_dsets(get_fbas(nodes, definitions))), 12),
+    'smallest_blocking_sets': (
+        lambda nodes, definitions: list(enumerate_minimal_blocking_sets(
+            get_fbas(nodes, definitions), smallest_only=True)), 14),
+    'smallest_splitting_sets': (
+        lambda nodes, definitions: list(enumerate_minimal_splitting_sets(
+            get_fbas(nodes, definitions), smallest_only=True)), 14),
+    'eigenvector_centralities': (get_eigenvector_centralities, 1000),
+    'subgraph_centralities': (get_subgraph_centralities, 1000),
+    'quorum_eigenvector_centralities': (get_quorum_eigenvector_centralities, 16),
+    'quorum_subgraph_centralities': (get_quorum_subgraph_centralities, 16),
+    'quorum_intersection_eigenvector_centralities': (
+        get_quorum_intersection_eigenvector_centralities, 9),
+    'quorum_intersection_subgraph_centralities': (
+        get_quorum_intersection_subgraph_centralities, 9),
+    'intactness_ls_centralities': (
+        lambda nodes, definitions: get_intactness_ls_centralities(
+            nodes, definitions, get_ill_behaved_weight, get_mu), 8),
+    'hierarchical_intactness_ls_centralities': (
+        lambda nodes, definitions: get_hierarchical_intactness_ls_centralities(
+            nodes, definitions, get_ill_behaved_weight, get_mu), 8),
+    'minimal_intactness_ls_centralities': (
+        lambda nodes, definitions: get_minimal_intactness_ls_centralities(
+            nodes, definitions, get_ill_behaved_weight, get_mu), 8),
+}
+
+def prepare_case(case: Case) -> Tuple[List, Definitions]:
+    """Convert a case to a sorted node list and definitions"""
+    nodes, definitions, _ = convert_stellarbeat_to_observatory(case[1]())
+    return sorted(nodes), {node: restrict_definition(definition, nodes)
+                           for node, definition in definitions.items()}
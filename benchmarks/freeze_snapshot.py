@@ -0,0 +1,28 @@
+"""Freeze the current stellarbeat nodes as a benchmark fixture
+
+    python -m benchmarks.freeze_snapshot NAME
+"""
+import json
+import os
+import sys
+
+from stellarobservatory.stellarbeat import get_nodes_from_stellarbeat
+
+from .cases import FIXTURES_DIR
+
+def main():
+    """Command line entry point"""
+    if len(sys.argv) != 2:
+        sys.exit(__doc__)
+    nodes = [
+        {key: node[key] for key in ('publicKey', 'name', 'quorumSet') if key in node}
+        for node in get_nodes_from_stellarbeat()
+        if node.get('isValidator', True) and 'quorumSet' in node
+    ]
+    path = os.path.join(FIXTURES_DIR, sys.argv[1] + '.json')
+    with open(path, 'w', encoding='utf-8') as snapshot_file:
+        json.dump(nodes, snapshot_file, indent=1, sort_keys=True)
+    print(f'Froze {len(nodes)} nodes to {path}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""Measure the cold start time of a worker that only needs quorums.greatest_quorum
+
+    python -m benchmarks.import_time [--repeat N] [--baseline-revision REV]
+
+With --baseline-revision (e.g., the commit before submodules and heavy dependencies
+were loaded lazily), the same import is measured on a checkout of that revision.
+Otherwise, the eager figure is an approximation: the current package plus what
+`import stellarobservatory.quorums` used to pull in.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+from typing import Optional
+
+LAZY = 'from stellarobservatory.quorums import greatest_quorum'
+APPROXIMATED_EAGER = LAZY + '; import numpy, requests, scipy.sparse.csgraph, ' \
+    'stellarobservatory.intactness, stellarobservatory.stellarbeat, stellarobservatory.utils.scc'
+
+REPOSITORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def measure(statement: str, repeat: int, directory: str = REPOSITORY) -> float:
+    """Median wall-clock time of a fresh interpreter running the statement in a directory
+    (which holds the imported stellarobservatory package)"""
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, '-c', statement], check=True, cwd=directory)
+        times.append(time.perf_counter() - started)
+    return statistics.median(times)
+
+def measure_revision(statement: str, repeat: int, revision: str) -> float:
+    """measure() on the stellarobservatory package of a git revision"""
+    with tempfile.TemporaryDirectory() as directory:
+        archive_path = os.path.join(directory, 'package.tar')
+        subprocess.run(['git', 'archive', '--output', archive_path, revision,
+                        'stellarobservatory'], check=True, cwd=REPOSITORY)
+        with tarfile.open(archive_path) as archive:
+            archive.extractall(directory)
+        return measure(statement, repeat, directory)
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--baseline-revision',
+                        help='git revision with eager imports (default: approximate)')
+    args = parser.parse_args()
+    revision: Optional[str] = args.baseline_revision
+    baseline = measure('pass', args.repeat)
+    if revision is None:
+        eager = measure(APPROXIMATED_EAGER, args.repeat)
+        label = 'eager (approximated)'
+    else:
+        eager = measure_revision(LAZY, args.repeat, revision)
+        label = f'eager ({revision})'
+    lazy = measure(LAZY, args.repeat)
+    print(f'interpreter start: {baseline:.3f}s')
+    print(f'{label}: {eager:.3f}s (+{eager - baseline:.3f}s)')
+    print(f'lazy imports: {lazy:.3f}s (+{lazy - baseline:.3f}s)')
+    print(f'import overhead reduced by {(eager - lazy) / max(eager - baseline, 1e-9):.0%}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""Run benchmarks and compare them against a stored baseline
+
+    python -m benchmarks.run [--quick] [--analyses A B] [--cases PREFIX]
+                             [--baseline FILE] [--update-baseline]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+from typing import Dict, List
+
+from .cases import ANALYSES, get_snapshot_cases, get_synthetic_cases, prepare_case
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+Measurement = Dict[str, float]
+
+def measure(analysis, nodes: List, definitions, repeat: int) -> Measurement:
+    """Measure the best wall-clock time and the peak memory of an analysis"""
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        analysis(nodes, definitions)
+        times.append(time.perf_counter() - started)
+    tracemalloc.start()
+    analysis(nodes, definitions)
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'time': min(times), 'peak_memory': peak_memory}
+
+def run(quick: bool, analyses: List[str], case_prefix: str, repeat: int
+        ) -> Dict[str, Measurement]:
+    """Run all selected analyses on all selected cases"""
+    results: Dict[str, Measurement] = {}
+    for case in get_synthetic_cases(quick) + get_snapshot_cases():
+        if not case[0].startswith(case_prefix):
+            continue
+        nodes, definitions = prepare_case(case)
+        for analysis_name in analyses:
+            analysis, max_nodes = ANALYSES[analysis_name]
+            if len(nodes) > max_nodes:
+                continue
+            key = f'{case[0]}/{analysis_name}'
+            results[key] = measure(analysis, nodes, definitions, repeat)
+            print(f"{key:<70} {results[key]['time']:>10.4f}s "
+                  f"{int(results[key]['peak_memory']):>12d}B", flush=True)
+    return results
+
+def compare(results: Dict[str, Measurement], baseline: Dict[str, Measurement],
+            tolerance: float) -> List[str]:
+    """Return the benchmarks that regressed by more than the tolerance factor"""
+    regressions = []
+    for key, measurement in sorted(results.items()):
+        if key not in baseline:
+            continue
+        for metric in ('time', 'peak_memory'):
+            # ignore noise of very short runs
+            if metric == 'time' and baseline[key][metric] < 1e-3:
+                continue
+            ratio = measurement[metric] / max(baseline[key][metric], 1e-9)
+            if ratio > tolerance:
+                regressions.append(f'{key} {metric}: {ratio:.2f}x baseline')
+    return regressions
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--quick', action='store_true', help='only run small cases')
+    parser.add_argument('--analyses', nargs='+', default=list(ANALYSES), choices=list(ANALYSES))
+    parser.add_argument('--cases', default='', help='only run cases with this prefix')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--tolerance', type=float, default=1.5,
+                        help='report regressions slower/larger than tolerance x baseline')
+    parser.add_argument('--update-baseline', action='store_true')
+    args = parser.parse_args()
+
+    results = run(args.quick, args.analyses, args.cases, args.repeat)
+    baseline: Dict[str, Measurement] = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as baseline_file:
+            baseline = json.load(baseline_file)
+    if args.update_baseline:
+        baseline.update(results)
+        with open(args.baseline, 'w', encoding='utf-8') as baseline_file:
+            json.dump(baseline, baseline_file, indent=2, sort_keys=True)
+        return
+    regressions = compare(results, baseline, args.tolerance)
+    for regression in regressions:
+        print('REGRESSION', regression)
+    if regressions:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
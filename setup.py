@@ -13,7 +13,7 @@ setuptools.setup(
     long_description=LONG_DESCRIPTION,
     long_description_content_type="text/markdown",
     url="https://github.com/andrenarchy/stellar-observatory",
-    packages=setuptools.find_packages(),
+    packages=setuptools.find_packages(exclude=['benchmarks', 'benchmarks.*']),
     python_requires="~=3.5",
     install_requires=[
         "numpy~=1.0",
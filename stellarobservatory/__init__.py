@@ -1,7 +1,23 @@
-"""Stellar Observatory"""
-from . import intactness, quorum_intersection, quorum_slice_definition, \
-    quorums, stellarbeat, utils
+"""Stellar Observatory
 
-__all__ = ['intactness', 'quorum_intersection',
+Submodules are imported lazily on first attribute access, so that importing
+e.g. stellarobservatory.quorums does not pull in numpy, scipy or requests."""
+import importlib
+from typing import TYPE_CHECKING, Any, List
+
+if TYPE_CHECKING:
+    from . import compiled_fbas, intactness, quorum_intersection, quorum_slice_definition, \
+        quorums, stellarbeat, utils, what_if
+
+__all__ = ['compiled_fbas', 'intactness', 'quorum_intersection',
            'quorum_slice_definition',
-           'quorums', 'stellarbeat', 'utils']
+           'quorums', 'stellarbeat', 'utils', 'what_if']
+
+def __getattr__(name: str) -> Any:
+    """Import submodules on first access"""
+    if name in __all__:
+        return importlib.import_module('.' + name, __name__)
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()).union(__all__))
@@ -0,0 +1,134 @@
+"""Vectorized evaluation of many candidate sets against all quorum slice definitions"""
+from typing import List, Optional, Tuple, TypedDict
+
+import numpy
+from scipy.sparse import csr_matrix
+
+from .compiled_fbas import CompiledDefinition, CompiledFbas, iterate_bits
+
+DefinitionLevel = TypedDict('DefinitionLevel', {
+    # sparse (number of definitions in level) x (number of nodes)
+    'membership': csr_matrix,
+    'thresholds': numpy.ndarray,
+    # sparse (number of definitions in level) x (number of definitions in parent level)
+    'to_parent': csr_matrix
+})
+
+# Definition levels, the first level holds the root definition of each node
+BatchEvaluator = TypedDict('BatchEvaluator', {
+    'n_nodes': int,
+    'levels': List[DefinitionLevel]
+})
+
+def get_definition_level(definitions: List[Tuple[CompiledDefinition, int]],
+                         n_nodes: int, n_parents: int) -> DefinitionLevel:
+    """Get the (sparse) matrices for a list of (definition, index of parent definition)
+    pairs"""
+    thresholds = numpy.zeros(len(definitions), dtype=numpy.float32)
+    node_indexes: List[int] = []
+    node_indptr = [0]
+    parent_indexes: List[int] = []
+    parent_indptr = [0]
+    for index, (definition, parent_index) in enumerate(definitions):
+        threshold, nodes_mask, _ = definition
+        thresholds[index] = threshold
+        node_indexes.extend(iterate_bits(nodes_mask))
+        node_indptr.append(len(node_indexes))
+        if parent_index >= 0:
+            parent_indexes.append(parent_index)
+        parent_indptr.append(len(parent_indexes))
+    return {
+        'membership': csr_matrix((numpy.ones(len(node_indexes), dtype=numpy.float32),
+                                  node_indexes, node_indptr),
+                                 shape=(len(definitions), n_nodes)),
+        'thresholds': thresholds,
+        'to_parent': csr_matrix((numpy.ones(len(parent_indexes), dtype=numpy.float32),
+                                 parent_indexes, parent_indptr),
+                                shape=(len(definitions), n_parents))
+    }
+
+def get_batch_evaluator(compiled: CompiledFbas) -> BatchEvaluator:
+    """Flatten the compiled definition trees level by level into matrices"""
+    n_nodes = len(compiled['nodes'])
+    # per level: list of (definition, index of parent definition in previous level)
+    level_definitions: List[List[Tuple[CompiledDefinition, int]]] = [
+        [(definition, -1) for definition in compiled['definitions']]
+    ]
+    while True:
+        next_level = [
+            (children_definition, parent_index)
+            for parent_index, (definition, _) in enumerate(level_definitions[-1])
+            for children_definition in definition[2]
+        ]
+        if not next_level:
+            break
+        level_definitions.append(next_level)
+
+    levels = [
+        get_definition_level(definitions, n_nodes,
+                             len(level_definitions[level_index - 1]) if level_index > 0 else 0)
+        for level_index, definitions in enumerate(level_definitions)
+    ]
+    return {'n_nodes': n_nodes, 'levels': levels}
+
+def unpack_candidates(evaluator: BatchEvaluator, packed_candidates: numpy.ndarray
+                      ) -> numpy.ndarray:
+    """Unpack candidates packed with numpy.packbits(candidates, axis=1)"""
+    return numpy.unpackbits(packed_candidates, axis=1,
+                            count=evaluator['n_nodes']).astype(bool)
+
+def evaluate_definitions(evaluator: BatchEvaluator, candidates: numpy.ndarray,
+                         packed: bool = False) -> numpy.ndarray:
+    """Check for K candidate sets (K x n boolean array) and all n nodes
+    whether the candidate set contains a slice of the node
+
+    Returns a K x n boolean array. Use packed=True for candidates packed with
+    numpy.packbits(candidates, axis=1)."""
+    if packed:
+        candidates = unpack_candidates(evaluator, candidates)
+    candidates = numpy.asarray(candidates, dtype=numpy.float32)
+    satisfied: Optional[numpy.ndarray] = None
+    # without levels (no nodes), every row is empty
+    level_satisfied = numpy.ones((candidates.shape[0], evaluator['n_nodes']), dtype=bool)
+    for level in reversed(evaluator['levels']):
+        counts = level['membership'].dot(candidates.T).T
+        if satisfied is not None:
+            counts += satisfied
+        level_satisfied = counts >= level['thresholds']
+        satisfied = level['to_parent'].T.dot(level_satisfied.T.astype(numpy.float32)).T
+    return level_satisfied
+
+def batch_greatest_quorums(evaluator: BatchEvaluator, nodes: numpy.ndarray,
+                           lower_bound: Optional[numpy.ndarray] = None,
+                           packed: bool = False) -> numpy.ndarray:
+    """
+    Return the greatest quorum for each of the K node sets (K x n boolean array)
+    with the semantics of quorums.greatest_quorum(): a row is empty if the greatest
+    quorum is not a super set of the corresponding row of lower_bound.
+    All fixpoint iterations advance in lockstep.
+    """
+    if packed:
+        nodes = unpack_candidates(evaluator, nodes)
+        if lower_bound is not None:
+            lower_bound = unpack_candidates(evaluator, lower_bound)
+    current = numpy.array(nodes, dtype=bool)
+    active = numpy.arange(current.shape[0])
+    while active.size > 0:
+        active_nodes = current[active]
+        next_u = evaluate_definitions(evaluator, active_nodes) & active_nodes
+        if lower_bound is not None:
+            violated = (lower_bound[active] & active_nodes & ~next_u).any(axis=1)
+            next_u[violated] = False
+        changed = (next_u != active_nodes).any(axis=1)
+        current[active] = next_u
+        active = active[changed]
+    return current
+
+def batch_is_quorum(evaluator: BatchEvaluator, candidates: numpy.ndarray,
+                    packed: bool = False) -> numpy.ndarray:
+    """Check for each of the K candidate sets whether it is a (non-empty) quorum"""
+    if packed:
+        candidates = unpack_candidates(evaluator, candidates)
+    candidates = numpy.asarray(candidates, dtype=bool)
+    satisfied = evaluate_definitions(evaluator, candidates)
+    return candidates.any(axis=1) & (satisfied | ~candidates).all(axis=1)
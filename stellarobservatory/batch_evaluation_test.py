@@ -0,0 +1,59 @@
+"""Tests for vectorized batch evaluation"""
+import numpy
+from .batch_evaluation import batch_greatest_quorums, batch_is_quorum, evaluate_definitions, \
+    get_batch_evaluator
+from .compiled_fbas import compile_definitions
+from .quorum_intersection import is_quorum
+from .quorum_slice_definition import get_is_slice_contained, satisfies_definition
+from .quorum_slice_definition_test import DEFINITIONS_BY_NODE_ABCDE
+from .quorums import greatest_quorum
+from .utils.sets import powerset
+
+COMPILED = compile_definitions(DEFINITIONS_BY_NODE_ABCDE)
+NODES = COMPILED['nodes']
+CANDIDATES = [set(candidate) for candidate in powerset(NODES)]
+CANDIDATES_ARRAY = numpy.array([[node in candidate for node in NODES]
+                                for candidate in CANDIDATES])
+
+def test_evaluate_definitions():
+    """Test evaluate_definitions() against satisfies_definition()"""
+    evaluator = get_batch_evaluator(COMPILED)
+    expected = numpy.array([[satisfies_definition(candidate, DEFINITIONS_BY_NODE_ABCDE[node])
+                             for node in NODES] for candidate in CANDIDATES])
+    numpy.testing.assert_array_equal(evaluate_definitions(evaluator, CANDIDATES_ARRAY), expected)
+    packed_candidates = numpy.packbits(CANDIDATES_ARRAY, axis=1)
+    numpy.testing.assert_array_equal(
+        evaluate_definitions(evaluator, packed_candidates, packed=True), expected)
+
+def test_batch_greatest_quorums():
+    """Test batch_greatest_quorums() against greatest_quorum()"""
+    evaluator = get_batch_evaluator(COMPILED)
+    is_slice_contained = get_is_slice_contained(DEFINITIONS_BY_NODE_ABCDE)
+    expected = numpy.array([
+        [node in greatest_quorum(is_slice_contained, candidate, set()) for node in NODES]
+        for candidate in CANDIDATES])
+    numpy.testing.assert_array_equal(batch_greatest_quorums(evaluator, CANDIDATES_ARRAY),
+                                     expected)
+    lower_bound = numpy.zeros_like(CANDIDATES_ARRAY)
+    lower_bound[:, 3] = True
+    expected = numpy.array([
+        [node in greatest_quorum(is_slice_contained, candidate, {'D'}) for node in NODES]
+        for candidate in CANDIDATES])
+    numpy.testing.assert_array_equal(
+        batch_greatest_quorums(evaluator, CANDIDATES_ARRAY, lower_bound), expected)
+
+def test_batch_is_quorum():
+    """Test batch_is_quorum() against is_quorum()"""
+    evaluator = get_batch_evaluator(COMPILED)
+    is_slice_contained = get_is_slice_contained(DEFINITIONS_BY_NODE_ABCDE)
+    expected = [candidate != set() and is_quorum(is_slice_contained, candidate)
+                for candidate in CANDIDATES]
+    numpy.testing.assert_array_equal(batch_is_quorum(evaluator, CANDIDATES_ARRAY), expected)
+
+def test_evaluate_definitions_without_levels():
+    """Test that an evaluator without levels (no nodes) returns empty rows"""
+    evaluator = get_batch_evaluator(compile_definitions({}))
+    assert evaluate_definitions(evaluator, numpy.zeros((3, 0), dtype=bool)).shape == (3, 0)
+    satisfied = evaluate_definitions({'n_nodes': 0, 'levels': []},
+                                     numpy.zeros((3, 0), dtype=bool))
+    assert satisfied.shape == (3, 0)
@@ -0,0 +1,245 @@
+"""Time-budgeted long-running analyses with checkpoints
+
+Each analysis runs until it is done or its budget (wall-clock time and/or number
+of steps) is exhausted. In the latter case, the partial result and a progress
+estimate are returned. If a checkpoint path is given, the search state is
+written to disk periodically and when the budget is exhausted, and a later call
+with the same checkpoint path resumes from there (e.g., after preemption).
+Checkpoints hold a fingerprint of the nodes (and definitions), resuming with other
+inputs raises a ValueError.
+"""
+import hashlib
+import os
+import pickle
+import time
+from itertools import combinations, islice
+from math import comb
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple, \
+    TypedDict
+
+import numpy
+
+from .dsets import get_restricted_fbas
+from .intactness import get_intact_nodes_batch, get_intactness_cache
+from .quorum_intersection import expand_min_quorums_frame, quorum_intersection
+from .quorum_slice_definition import Definition, Definitions, get_is_slice_contained
+from .quorums import expand_quorums_frame, get_greatest_quorum_cache, greatest_quorum
+from .utils.graph import Node, Nodes
+
+Budget = TypedDict('Budget', {
+    # pylint: disable=unsubscriptable-object
+    'seconds': Optional[float],
+    'steps': Optional[int]
+})
+
+BudgetedResult = TypedDict('BudgetedResult', {
+    'complete': bool,
+    # the (partial) result of the analysis
+    'result': Any,
+    # estimated fraction of the analysis that is done
+    'progress': float
+})
+
+def get_budget(seconds: Optional[float] = None, steps: Optional[int] = None) -> Budget:
+    """Return a budget of wall-clock seconds and/or steps (None: unlimited)"""
+    return {'seconds': seconds, 'steps': steps}
+
+def get_canonical_definition(definition: Definition) -> Tuple:
+    """Return a representation of a definition that does not depend on set ordering"""
+    return (definition['threshold'], sorted(map(repr, definition['nodes'])),
+            sorted(repr(get_canonical_definition(children_definition))
+                   for children_definition in definition['children_definitions']))
+
+def get_fingerprint(nodes: Iterable[Node], definitions: Optional[Definitions] = None) -> str:
+    """Return a hash of the nodes (in the given order) and their definitions"""
+    fingerprint = hashlib.sha256(repr([repr(node) for node in nodes]).encode('utf-8'))
+    if definitions is not None:
+        fingerprint.update(repr(sorted(
+            (repr(node), get_canonical_definition(definition))
+            for node, definition in definitions.items())).encode('utf-8'))
+    return fingerprint.hexdigest()
+
+def get_sorted_nodes(nodes: Iterable[Node]) -> List[Node]:
+    """Return nodes in a deterministic order (for get_fingerprint())"""
+    return sorted(nodes, key=repr)
+
+def load_checkpoint(checkpoint_path: Optional[str], kind: str,
+                    fingerprint: str) -> Optional[Dict]:
+    """Load the state of an analysis of the given kind and inputs (if the checkpoint
+    exists)"""
+    if checkpoint_path is None or not os.path.exists(checkpoint_path):
+        return None
+    with open(checkpoint_path, 'rb') as checkpoint_file:
+        state = pickle.load(checkpoint_file)
+    if state.get('kind') != kind:
+        raise ValueError(f'checkpoint {checkpoint_path} does not belong to {kind}')
+    if state.get('fingerprint') != fingerprint:
+        raise ValueError(f'checkpoint {checkpoint_path} belongs to other inputs')
+    return state
+
+def save_checkpoint(checkpoint_path: Optional[str], state: Dict):
+    """Atomically write the state of an analysis"""
+    if checkpoint_path is None:
+        return
+    temporary_path = checkpoint_path + '.tmp'
+    with open(temporary_path, 'wb') as checkpoint_file:
+        pickle.dump(state, checkpoint_file)
+    os.replace(temporary_path, checkpoint_path)
+
+def remove_checkpoint(checkpoint_path: Optional[str]):
+    """Remove the checkpoint of a completed analysis"""
+    if checkpoint_path is not None and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+
+def run_budgeted(state: Dict, step: Callable[[Dict], bool], get_progress: Callable[[Dict], float],
+                 budget: Budget, checkpoint_path: Optional[str],
+                 checkpoint_interval: float) -> BudgetedResult:
+    """Run step(state) until it returns True (done) or the budget is exhausted"""
+    # pylint: disable=too-many-arguments,too-many-positional-arguments
+    started = time.monotonic()
+    last_checkpoint = started
+    steps = 0
+    while True:
+        if step(state):
+            remove_checkpoint(checkpoint_path)
+            return {'complete': True, 'result': state['result'], 'progress': 1.0}
+        steps += 1
+        now = time.monotonic()
+        if (budget['steps'] is not None and steps >= budget['steps']) or \
+                (budget['seconds'] is not None and now - started >= budget['seconds']):
+            save_checkpoint(checkpoint_path, state)
+            return {'complete': False, 'result': state['result'],
+                    'progress': get_progress(state)}
+        if now - last_checkpoint >= checkpoint_interval:
+            save_checkpoint(checkpoint_path, state)
+            last_checkpoint = now
+
+def push_frames(state: Dict, frames: List[Tuple[Nodes, Nodes]], weight: float):
+    """Push child frames (sharing the weight of their parent) in traversal order"""
+    if not frames:
+        state['done'] += weight
+        return
+    for committed, remaining in reversed(frames):
+        state['stack'].append((committed, remaining, weight / len(frames)))
+
+def budgeted_quorum_intersection(fbas: Tuple[Callable[[Nodes, Node], bool], Nodes],
+                                 budget: Budget, checkpoint_path: Optional[str] = None,
+                                 checkpoint_interval: float = 60.0) -> BudgetedResult:
+    """quorum_intersection() with a budget
+
+    The result is None until the analysis is complete. The checkpoint holds the
+    pending (committed, remaining) frames of traverse_min_quorums() together with
+    the fraction of the search space that each frame covers. Only the nodes of the
+    FBAS are fingerprinted, not its slices."""
+    is_slice_contained, all_nodes = fbas
+    fingerprint = get_fingerprint(get_sorted_nodes(all_nodes))
+    state = load_checkpoint(checkpoint_path, 'quorum_intersection', fingerprint) or {
+        'kind': 'quorum_intersection',
+        'fingerprint': fingerprint,
+        'stack': [(set(), set(all_nodes), 1.0)],
+        'done': 0.0,
+        'result': None
+    }
+    # greatest quorums of this run (not part of the checkpoint)
+    cache = get_greatest_quorum_cache(all_nodes)
+
+    def step(state: Dict) -> bool:
+        if not state['stack']:
+            state['result'] = True
+            return True
+        committed, remaining, weight = state['stack'].pop()
+        quorum, frames = expand_min_quorums_frame(is_slice_contained, committed, remaining,
+                                                  len(all_nodes), cache)
+        if quorum is not None:
+            greatest_q = greatest_quorum(is_slice_contained, all_nodes.difference(quorum), set())
+            if greatest_q != set():
+                state['result'] = (False, quorum, greatest_q)
+                return True
+        push_frames(state, frames, weight)
+        return False
+
+    return run_budgeted(state, step, lambda state: state['done'], budget, checkpoint_path,
+                        checkpoint_interval)
+
+def budgeted_enumerate_dsets(fbas: Tuple[Callable[[Nodes, Node], bool], Nodes],
+                             budget: Budget, checkpoint_path: Optional[str] = None,
+                             checkpoint_interval: float = 60.0) -> BudgetedResult:
+    """enumerate_dsets() with a budget
+
+    The result is the list of dsets found so far. The checkpoint holds the pending
+    (committed, remaining) frames of traverse_quorums(). Only the nodes of the FBAS are
+    fingerprinted, not its slices."""
+    is_slice_contained, all_nodes = fbas
+    fingerprint = get_fingerprint(get_sorted_nodes(all_nodes))
+    state = load_checkpoint(checkpoint_path, 'enumerate_dsets', fingerprint) or {
+        'kind': 'enumerate_dsets',
+        'fingerprint': fingerprint,
+        'stack': [(set(), set(all_nodes), 1.0)],
+        'done': 0.0,
+        'result': [all_nodes]
+    }
+
+    def step(state: Dict) -> bool:
+        if not state['stack']:
+            return True
+        committed, remaining, weight = state['stack'].pop()
+        quorum, frames = expand_quorums_frame(is_slice_contained, committed, remaining)
+        if quorum is not None:
+            # determine whether F^{V\Q} has quorum intersection:
+            if quorum_intersection(get_restricted_fbas(fbas, quorum)) is True:
+                state['result'].append(all_nodes.difference(quorum))
+        push_frames(state, frames, weight)
+        return False
+
+    return run_budgeted(state, step, lambda state: state['done'], budget, checkpoint_path,
+                        checkpoint_interval)
+
+def budgeted_intactness_matrix(nodes: List[Node], definitions: Definitions,
+                               get_ill_behaved_weight: Callable[[Set[Node]], float],
+                               budget: Budget, checkpoint_path: Optional[str] = None,
+                               checkpoint_interval: float = 60.0) -> BudgetedResult:
+    """centralities.get_intactness_matrix() with a budget
+
+    The result is the matrix accumulated so far. The checkpoint holds the matrix and
+    the cursor of the sweep over the subsets of nodes (ordered by size)."""
+    # pylint: disable=too-many-arguments,too-many-positional-arguments
+    fbas = (get_is_slice_contained(definitions), set(nodes))
+    n_subsets = 2**len(nodes)
+    fingerprint = get_fingerprint(nodes, definitions)
+    state = load_checkpoint(checkpoint_path, 'intactness_matrix', fingerprint) or {
+        'kind': 'intactness_matrix',
+        'fingerprint': fingerprint,
+        'size': 1,
+        'cursor': 0,
+        'done': 1,
+        'result': numpy.zeros((len(nodes), len(nodes)))
+    }
+    # remaining subsets of the current size (regenerated from the cursor after resuming)
+    subsets: Dict[int, Iterator[Tuple[int, ...]]] = {}
+    # intactness results of this run (bound the search for the following subsets)
+    cache = get_intactness_cache()
+
+    def step(state: Dict) -> bool:
+        size = state['size']
+        if size >= len(nodes):
+            return True
+        if size not in subsets:
+            subsets.clear()
+            subsets[size] = islice(combinations(range(len(nodes)), size), state['cursor'], None)
+        indexes = next(subsets[size])
+        ill_behaved_nodes = {nodes[index] for index in indexes}
+        intact_nodes = get_intact_nodes_batch(fbas, [ill_behaved_nodes], cache)[0]
+        induced_befouled_nodes = set(nodes) - intact_nodes - ill_behaved_nodes
+        induced_indexes = [index for index, node in enumerate(nodes)
+                           if node in induced_befouled_nodes]
+        state['result'][numpy.ix_(indexes, induced_indexes)] += \
+            get_ill_behaved_weight(ill_behaved_nodes)
+        state['cursor'] += 1
+        state['done'] += 1
+        if state['cursor'] == comb(len(nodes), size):
+            state['size'] += 1
+            state['cursor'] = 0
+        return False
+
+    return run_budgeted(state, step, lambda state: state['done'] / n_subsets, budget,
+                        checkpoint_path, checkpoint_interval)
@@ -0,0 +1,84 @@
+"""Tests for budgeted analyses"""
+import os
+
+import pytest
+from numpy.testing import assert_allclose
+
+from .budgeted import budgeted_enumerate_dsets, budgeted_intactness_matrix, \
+    budgeted_quorum_intersection, get_budget
+from .centralities import get_intactness_matrix
+from .centralities_test import DEFINITIONS, NODES_LIST, get_ill_behaved_weight
+from .dsets import enumerate_dsets
+from .dsets_test import NODES, SLICES_BY_NODE
+from .quorum_intersection import is_quorum
+from .quorums import contains_slice
+
+def is_slice_contained(nodes_subset, node) -> bool:
+    """Slices of the dsets test"""
+    return contains_slice(nodes_subset, SLICES_BY_NODE, node)
+
+def test_budgeted_quorum_intersection():
+    """Test budgeted_quorum_intersection() with an unlimited budget"""
+    result = budgeted_quorum_intersection((is_slice_contained, NODES), get_budget())
+    assert result['complete'] is True
+    assert result['progress'] == 1.0
+    has_intersection, quorum1, quorum2 = result['result']
+    assert has_intersection is False
+    assert is_quorum(is_slice_contained, quorum1)
+    assert is_quorum(is_slice_contained, quorum2)
+    assert quorum1.isdisjoint(quorum2)
+
+def test_budgeted_enumerate_dsets_resume(tmp_path):
+    """Test budgeted_enumerate_dsets() when resuming from checkpoints after every step"""
+    checkpoint_path = str(tmp_path / 'dsets.checkpoint')
+    fbas = (is_slice_contained, NODES)
+    progress = 0.0
+    resumed = 0
+    while True:
+        result = budgeted_enumerate_dsets(fbas, get_budget(steps=1), checkpoint_path)
+        assert result['progress'] >= progress
+        progress = result['progress']
+        if result['complete']:
+            break
+        assert os.path.exists(checkpoint_path)
+        resumed += 1
+    assert resumed > 0
+    assert not os.path.exists(checkpoint_path)
+    assert set(frozenset(dset) for dset in result['result']) == \
+        set(frozenset(dset) for dset in enumerate_dsets(fbas))
+
+def test_budgeted_intactness_matrix_resume(tmp_path):
+    """Test budgeted_intactness_matrix() against get_intactness_matrix() when resuming"""
+    checkpoint_path = str(tmp_path / 'intactness.checkpoint')
+    partial = budgeted_intactness_matrix(NODES_LIST, DEFINITIONS, get_ill_behaved_weight,
+                                         get_budget(steps=7), checkpoint_path)
+    assert partial['complete'] is False
+    assert 0 < partial['progress'] < 1
+    result = budgeted_intactness_matrix(NODES_LIST, DEFINITIONS, get_ill_behaved_weight,
+                                        get_budget(), checkpoint_path)
+    assert result['complete'] is True
+    assert_allclose(result['result'],
+                    get_intactness_matrix(NODES_LIST, DEFINITIONS, get_ill_behaved_weight))
+
+def test_budgeted_resume_other_inputs(tmp_path):
+    """Test that checkpoints are rejected for other nodes or definitions"""
+    checkpoint_path = str(tmp_path / 'intactness.checkpoint')
+    budgeted_intactness_matrix(NODES_LIST, DEFINITIONS, get_ill_behaved_weight,
+                               get_budget(steps=7), checkpoint_path)
+    other_definitions = {**DEFINITIONS, NODES_LIST[0]: {
+        **DEFINITIONS[NODES_LIST[0]], 'threshold': DEFINITIONS[NODES_LIST[0]]['threshold'] + 1}}
+    for nodes, definitions in ((NODES_LIST[::-1], DEFINITIONS),
+                               (NODES_LIST, other_definitions)):
+        with pytest.raises(ValueError):
+            budgeted_intactness_matrix(nodes, definitions, get_ill_behaved_weight,
+                                       get_budget(), checkpoint_path)
+    # the same inputs resume (independently of set ordering)
+    assert budgeted_intactness_matrix(NODES_LIST, dict(reversed(DEFINITIONS.items())),
+                                      get_ill_behaved_weight, get_budget(),
+                                      checkpoint_path)['complete'] is True
+
+    checkpoint_path = str(tmp_path / 'dsets.checkpoint')
+    budgeted_enumerate_dsets((is_slice_contained, NODES), get_budget(steps=1), checkpoint_path)
+    with pytest.raises(ValueError):
+        budgeted_enumerate_dsets((is_slice_contained, NODES - {1}), get_budget(),
+                                 checkpoint_path)
@@ -1,25 +1,34 @@
 """Centralities"""
 # pylint: disable=invalid-name
 from itertools import combinations
-from typing import Callable, Dict, FrozenSet, List, Set
+from multiprocessing import Pool
+from typing import Any, Callable, Dict, FrozenSet, Iterable, Iterator, List, Set, Tuple
 
 import numpy
 from scipy.linalg import eig, expm
 
-from .intactness import get_intact_nodes
+from . import instrumentation
+from .compiled_fbas import iterate_bits
+from .intactness import get_bounded_intact_nodes, get_cached_disjoint_quorums, \
+    get_intact_nodes, get_intact_nodes_batch, get_intactness_cache
+from .parallel_quorums import enumerate_quorums_parallel
 from .quorums import enumerate_quorums
 from .quorum_slice_definition import Definitions, get_is_slice_contained, get_trust_graph
-from .utils.graph import Graph, get_adjacency_matrix, get_dependencies, \
-    get_transpose_graph, Node, Nodes
+from .utils.graph import get_adjacency_matrix, get_dag_dependencies, get_transpose_graph, \
+    Node, Nodes
 from .utils.hypergraph import get_hypergraph_adjacency_matrix, get_hypergraph_incidence_matrix
 from .utils.scc import get_strongly_connected_components
-from .utils.sets import powerset
+from .utils.sets import get_binomials, get_colex_rank, get_colex_sub_ranks, powerset
+
+# FBAS and intactness cache of a worker process (see init_intactness_worker())
+WORKER_STATE: Dict[str, Any] = {}
 
 def get_eigenvector_centralities(nodes: List[Node], definitions: Definitions) -> numpy.array:
     """Compute trust graph eigenvector centralities"""
     trust_graph = get_trust_graph(definitions)
     adjacency_matrix = get_adjacency_matrix(nodes, trust_graph)
-    eigenvalues, eigenvectors = eig(adjacency_matrix, left=True, right=False)
+    with instrumentation.record_time('centralities.eigensolver'):
+        eigenvalues, eigenvectors = eig(adjacency_matrix, left=True, right=False)
     index = numpy.argsort(numpy.real(eigenvalues))[-1]
     centralities = numpy.abs(eigenvectors[:, index])
     return centralities / numpy.max(centralities)
@@ -28,215 +37,369 @@ def get_subgraph_centralities(nodes: List[Node], definitions: Definitions) -> nu
     """Compute trust graph subgraph centralities"""
     trust_graph = get_trust_graph(definitions)
     adjacency_matrix = get_adjacency_matrix(nodes, trust_graph)
-    exp_adjacency_matrix = expm(adjacency_matrix)
+    with instrumentation.record_time('centralities.matrix_exponential'):
+        exp_adjacency_matrix = expm(adjacency_matrix)
     centralities = numpy.diag(exp_adjacency_matrix)
     return centralities / numpy.max(centralities)
 
-def get_quorum_eigenvector_centralities(nodes: List[Node], definitions: Definitions) -> numpy.array:
+def get_quorums(nodes: List[Node], definitions: Definitions, processes: int) -> List[Nodes]:
+    """Enumerate all quorums (in a process pool if processes > 1)"""
+    with instrumentation.record_time('centralities.quorum_enumeration'):
+        if processes > 1:
+            return list(enumerate_quorums_parallel(nodes, definitions, processes))
+        return list(enumerate_quorums((get_is_slice_contained(definitions), set(nodes))))
+
+def get_quorum_eigenvector_centralities(nodes: List[Node], definitions: Definitions,
+                                        processes: int = 1) -> numpy.ndarray:
     """Compute quorum eigenvector centralities"""
-    fbas = (get_is_slice_contained(definitions), set(nodes))
-    hyperedge_list = list(enumerate_quorums(fbas))
+    hyperedge_list = get_quorums(nodes, definitions, processes)
     incidence_matrix = get_hypergraph_incidence_matrix(nodes, hyperedge_list)
     MMT = incidence_matrix.dot(incidence_matrix.T)
-    eigenvalues, eigenvectors = eig(MMT)
+    with instrumentation.record_time('centralities.eigensolver'):
+        eigenvalues, eigenvectors = eig(MMT)
     index = numpy.argsort(numpy.real(eigenvalues))[-1]
     centralities = numpy.abs(eigenvectors[:, index])
     return centralities / numpy.max(centralities)
 
-def get_quorum_subgraph_centralities(nodes: List[Node], definitions: Definitions) -> numpy.array:
+def get_quorum_subgraph_centralities(nodes: List[Node], definitions: Definitions,
+                                     processes: int = 1) -> numpy.ndarray:
     """Compute quorum subgraph centralities"""
-    fbas = (get_is_slice_contained(definitions), set(nodes))
-    hyperedge_list = list(enumerate_quorums(fbas))
+    hyperedge_list = get_quorums(nodes, definitions, processes)
     adjacency_matrix = get_hypergraph_adjacency_matrix(nodes, hyperedge_list)
-    exp_adjacency_matrix = expm(adjacency_matrix)
+    with instrumentation.record_time('centralities.matrix_exponential'):
+        exp_adjacency_matrix = expm(adjacency_matrix)
     centralities = numpy.diag(exp_adjacency_matrix)
     return centralities / numpy.max(centralities)
 
 def get_quorum_intersection_eigenvector_centralities(nodes: List[Node],
-                                                     definitions: Definitions) -> numpy.array:
+                                                     definitions: Definitions,
+                                                     processes: int = 1) -> numpy.ndarray:
     """Compute quorum intersection eigenvector centralities"""
-    fbas = (get_is_slice_contained(definitions), set(nodes))
-    quorums = list(enumerate_quorums(fbas))
+    quorums = get_quorums(nodes, definitions, processes)
     hyperedge_list = list([a.intersection(b) for a, b in combinations(quorums, 2)])
     incidence_matrix = get_hypergraph_incidence_matrix(nodes, hyperedge_list)
     MMT = incidence_matrix.dot(incidence_matrix.T)
-    eigenvalues, eigenvectors = eig(MMT)
+    with instrumentation.record_time('centralities.eigensolver'):
+        eigenvalues, eigenvectors = eig(MMT)
     index = numpy.argsort(numpy.real(eigenvalues))[-1]
     centralities = numpy.abs(eigenvectors[:, index])
     return centralities / numpy.max(centralities)
 
 def get_quorum_intersection_subgraph_centralities(nodes: List[Node],
-                                                  definitions: Definitions) -> numpy.array:
+                                                  definitions: Definitions,
+                                                  processes: int = 1) -> numpy.ndarray:
     """Compute quorum intersection subgraph centralities"""
-    fbas = (get_is_slice_contained(definitions), set(nodes))
-    quorums = list(enumerate_quorums(fbas))
+    quorums = get_quorums(nodes, definitions, processes)
     hyperedge_list = list([a.intersection(b) for a, b in combinations(quorums, 2)])
     adjacency_matrix = get_hypergraph_adjacency_matrix(nodes, hyperedge_list)
-    exp_adjacency_matrix = expm(adjacency_matrix / numpy.linalg.norm(adjacency_matrix, 2))
+    with instrumentation.record_time('centralities.matrix_exponential'):
+        exp_adjacency_matrix = expm(adjacency_matrix / numpy.linalg.norm(adjacency_matrix, 2))
     centralities = numpy.diag(exp_adjacency_matrix)
     return centralities / numpy.max(centralities)
 
-def get_intactness_matrix(nodes: List[Node], definitions: Definitions,
-                          get_ill_behaved_weight: Callable[[Set[Node]], float]) -> numpy.array:
-    """Compute matrix for intactness-based centralities"""
+def iterate_intactness_contributions(nodes: List[Node], definitions: Definitions
+                                     ) -> Iterator[Tuple[Nodes, Nodes]]:
+    """Iterate the pairs (ill-behaved nodes, induced befouled nodes) of the sweep for
+    intactness-based centralities"""
     fbas = (get_is_slice_contained(definitions), set(nodes))
-    node_to_index = {node: index for index, node in enumerate(nodes)}
-    M = numpy.zeros((len(nodes), len(nodes)))
-
-    for ill_behaved_nodes in powerset(nodes):
+    ill_behaved_nodes_list = powerset(nodes)
+    intact_nodes_list = get_intact_nodes_batch(fbas, ill_behaved_nodes_list)
+    for ill_behaved_nodes, intact_nodes in zip(ill_behaved_nodes_list, intact_nodes_list):
         if ill_behaved_nodes == set() or ill_behaved_nodes == set(nodes):
             continue
-        intact_nodes = get_intact_nodes(fbas, ill_behaved_nodes)
         befouled_nodes = set(nodes).difference(intact_nodes)
-        induced_befouled_nodes = befouled_nodes.difference(ill_behaved_nodes)
-        ill_behaved_weight = get_ill_behaved_weight(ill_behaved_nodes)
-        for ill_behaved_node in ill_behaved_nodes:
-            for induced_befouled_node in induced_befouled_nodes:
-                M[node_to_index[ill_behaved_node], \
-                    node_to_index[induced_befouled_node]] += ill_behaved_weight
+        yield ill_behaved_nodes, befouled_nodes.difference(ill_behaved_nodes)
+
+def get_weighted_intactness_matrix(nodes: List[Node],
+                                   contributions: Iterable[Tuple[Nodes, Nodes]],
+                                   get_ill_behaved_weight: Callable[[Set[Node]], float]
+                                   ) -> numpy.ndarray:
+    """Sum up the weighted contributions (ill-behaved nodes, befouled nodes) to a matrix"""
+    node_to_index = {node: index for index, node in enumerate(nodes)}
+    M = numpy.zeros((len(nodes), len(nodes)))
+    for ill_behaved_nodes, befouled_nodes in contributions:
+        M[numpy.ix_([node_to_index[node] for node in ill_behaved_nodes],
+                    [node_to_index[node] for node in befouled_nodes])] += \
+            get_ill_behaved_weight(ill_behaved_nodes)
     return M
 
+def get_intactness_tensor_from_contributions(nodes: List[Node],
+                                             contributions: Iterable[Tuple[Nodes, Nodes]]
+                                             ) -> numpy.ndarray:
+    """Count the contributions (ill-behaved nodes, befouled nodes) by number of ill-behaved
+    nodes, i.e., T[k, i, j] is the number of contributions of size k with i ill-behaved
+    and j befouled"""
+    node_to_index = {node: index for index, node in enumerate(nodes)}
+    T = numpy.zeros((len(nodes) + 1, len(nodes), len(nodes)), dtype=numpy.int64)
+    for ill_behaved_nodes, befouled_nodes in contributions:
+        T[len(ill_behaved_nodes)][numpy.ix_(
+            [node_to_index[node] for node in ill_behaved_nodes],
+            [node_to_index[node] for node in befouled_nodes])] += 1
+    return T
+
+def get_size_weighted_matrix(T: numpy.ndarray, get_size_weight: Callable[[int], float]
+                             ) -> numpy.ndarray:
+    """Compute the matrix for intactness-based centralities from an intactness tensor and
+    weights that only depend on the number of ill-behaved nodes"""
+    weights = numpy.array([get_size_weight(size) for size in range(T.shape[0])])
+    return numpy.tensordot(weights, T, axes=1)
+
+def get_matrix_eigenvector_centralities(M: numpy.ndarray) -> numpy.ndarray:
+    """Compute eigenvector centralities of an intactness matrix"""
+    with instrumentation.record_time('centralities.eigensolver'):
+        eigenvalues, eigenvectors = eig(M)
+    index = numpy.argsort(numpy.real(eigenvalues))[-1]
+    centralities = numpy.abs(eigenvectors[:, index])
+    return centralities / numpy.max(centralities)
+
+def get_matrix_ls_centralities(M: numpy.ndarray, get_mu: Callable[[numpy.ndarray], float]
+                               ) -> numpy.ndarray:
+    """Compute linear system centralities of an intactness matrix"""
+    A = numpy.eye(M.shape[0]) - get_mu(M) * M
+    with instrumentation.record_time('centralities.linear_solver'):
+        centralities = numpy.linalg.solve(A, numpy.ones(M.shape[0]))
+    return centralities / numpy.max(centralities)
+
+def get_intactness_matrix(nodes: List[Node], definitions: Definitions,
+                          get_ill_behaved_weight: Callable[[Set[Node]], float]) -> numpy.ndarray:
+    """Compute matrix for intactness-based centralities"""
+    return get_weighted_intactness_matrix(
+        nodes, iterate_intactness_contributions(nodes, definitions), get_ill_behaved_weight)
+
+def get_intactness_tensor(nodes: List[Node], definitions: Definitions) -> numpy.ndarray:
+    """Compute the intactness tensor (see get_intactness_tensor_from_contributions()) for
+    intactness-based centralities with size-dependent weights"""
+    return get_intactness_tensor_from_contributions(
+        nodes, iterate_intactness_contributions(nodes, definitions))
+
 def get_intactness_eigenvector_centralities(nodes: List[Node], definitions: Definitions,
                                             get_ill_behaved_weight: Callable[[Set[Node]], float]
                                             ) -> numpy.array:
     """Compute intactness eigenvector centralities"""
-    M = get_intactness_matrix(nodes, definitions, get_ill_behaved_weight)
-    eigenvalues, eigenvectors = eig(M)
-    index = numpy.argsort(numpy.real(eigenvalues))[-1]
-    centralities = numpy.abs(eigenvectors[:, index])
-    return centralities / numpy.max(centralities)
+    with instrumentation.record_time('centralities.intactness_sweep'):
+        M = get_intactness_matrix(nodes, definitions, get_ill_behaved_weight)
+    return get_matrix_eigenvector_centralities(M)
 
 def get_intactness_ls_centralities(nodes: List[Node], definitions: Definitions,
                                    get_ill_behaved_weight: Callable[[Set[Node]], float],
                                    get_mu: Callable[[numpy.array], float]) -> numpy.array:
     """Compute intactness linear system centralities"""
-    M = get_intactness_matrix(nodes, definitions, get_ill_behaved_weight)
-    A = numpy.eye(len(nodes)) - get_mu(M) * M
-    centralities = numpy.linalg.solve(A, numpy.ones(len(nodes)))
+    with instrumentation.record_time('centralities.intactness_sweep'):
+        M = get_intactness_matrix(nodes, definitions, get_ill_behaved_weight)
+    return get_matrix_ls_centralities(M, get_mu)
 
-    return centralities / numpy.max(centralities)
+def get_intactness_state(nodes: List[Node], definitions: Definitions) -> Dict[str, Any]:
+    """Get the FBAS and an empty intactness cache for get_befouled_nodes()"""
+    return {'fbas': (get_is_slice_contained(definitions), set(nodes)),
+            'cache': get_intactness_cache()}
 
-def get_scc_dependencies(sccs: List[Nodes], scc_graph: Graph, scc_index: Node):
-    """Get SCC dependencies"""
-    scc_dependencies = get_dependencies(scc_graph, scc_index)
-    dependencies: Set[Node] = set()
-    for dependency in scc_dependencies:
-        dependencies.update(sccs[dependency])
-    return dependencies
-
-def get_scc_dependents(sccs: List[Nodes], scc_graph: Graph, scc_index: Node):
-    """Get SCC dependents"""
-    scc_graph_transpose = get_transpose_graph(scc_graph)
-    scc_dependents = get_dependencies(scc_graph_transpose, scc_index)
-    dependents: Set[Node] = set()
-    for dependent in scc_dependents:
-        dependents.update(sccs[dependent])
-    return dependents
+def init_intactness_worker(nodes: List[Node], definitions: Definitions):
+    """Set up the FBAS and the intactness cache once per worker process"""
+    WORKER_STATE.update(get_intactness_state(nodes, definitions))
 
-def get_hierarchical_intactness_matrix(nodes: List[Node], definitions: Definitions,
-                                       get_ill_behaved_weight: Callable[[Set[Node]], float]
-                                       ) -> numpy.array:
-    """Compute matrix for hierarchical intactness-based centralities"""
-    # pylint: disable=too-many-locals
-    fbas = (get_is_slice_contained(definitions), set(nodes))
-    node_to_index = {node: index for index, node in enumerate(nodes)}
-    M = numpy.zeros((len(nodes), len(nodes)))
+def get_befouled_nodes(state: Dict[str, Any], job_nodes: FrozenSet[Node]
+                       ) -> List[Tuple[FrozenSet[Node], FrozenSet[Node]]]:
+    """Compute the befouled nodes for every set of ill-behaved nodes in job_nodes"""
+    fbas = state['fbas']
+    ill_behaved_nodes_list = powerset(job_nodes)
+    intact_nodes_list = get_intact_nodes_batch(fbas, ill_behaved_nodes_list, state['cache'])
+    return [(ill_behaved_nodes, frozenset(fbas[1].difference(intact_nodes)))
+            for ill_behaved_nodes, intact_nodes in zip(ill_behaved_nodes_list, intact_nodes_list)]
 
+def get_befouled_nodes_job(job_nodes: FrozenSet[Node]
+                           ) -> List[Tuple[FrozenSet[Node], FrozenSet[Node]]]:
+    """get_befouled_nodes() in the current worker"""
+    return get_befouled_nodes(WORKER_STATE, job_nodes)
+
+def iterate_hierarchical_intactness_contributions(nodes: List[Node], definitions: Definitions,
+                                                  processes: int = 1
+                                                  ) -> Iterator[Tuple[Nodes, Nodes]]:
+    """Iterate the pairs (ill-behaved nodes, affected befouled nodes) of the sweep for
+    hierarchical intactness-based centralities
+
+    The ill-behaved nodes of an SCC are the subsets of the SCC and its dependencies,
+    which also contain the ill-behaved nodes of all SCCs it depends on. So only the
+    SCCs that no other SCC depends on are swept (largest first, distributed over
+    processes if processes > 1) and their results are used as they arrive."""
     trust_graph = get_trust_graph(definitions)
     sccs, scc_graph = get_strongly_connected_components(trust_graph)
+    scc_dependencies: Dict[int, Set[int]] = get_dag_dependencies(scc_graph)
+    scc_dependents: Dict[int, Set[int]] = get_dag_dependencies(get_transpose_graph(scc_graph))
+    job_nodes_by_scc = {
+        scc_index: frozenset(sccs[scc_index].union(*(sccs[dependency]
+                                                      for dependency in dependencies)))
+        for scc_index, dependencies in scc_dependencies.items()
+    }
+    roots = sorted((scc_index for scc_index in job_nodes_by_scc
+                    if not scc_dependents[scc_index]),
+                   key=lambda scc_index: len(job_nodes_by_scc[scc_index]), reverse=True)
+    jobs = [job_nodes_by_scc[root] for root in roots]
 
-    for scc_index, _ in scc_graph.items():
-        dependencies = get_scc_dependencies(sccs, scc_graph, scc_index)
-        dependents = get_scc_dependents(sccs, scc_graph, scc_index)
-
-        for ill_behaved_nodes in powerset(dependencies.union(sccs[scc_index])):
-            if ill_behaved_nodes == set() or ill_behaved_nodes == set(nodes):
-                continue
-            befouled_nodes = set(nodes) - get_intact_nodes(fbas, ill_behaved_nodes)
-            affected_befouled_nodes = (befouled_nodes - ill_behaved_nodes) & \
-                (sccs[scc_index] | dependents)
-            ill_behaved_weight = get_ill_behaved_weight(ill_behaved_nodes)
-            for ill_behaved_node in ill_behaved_nodes:
-                for affected_befouled_node in affected_befouled_nodes:
-                    M[node_to_index[ill_behaved_node], \
-                        node_to_index[affected_befouled_node]] += ill_behaved_weight
-    return M
+    if processes > 1:
+        with Pool(processes, initializer=init_intactness_worker,
+                  initargs=(nodes, definitions)) as pool:
+            yield from iterate_affected_befouled_nodes(
+                nodes, sccs, scc_dependencies, scc_dependents, job_nodes_by_scc,
+                zip(roots, pool.imap(get_befouled_nodes_job, jobs, chunksize=1)))
+    else:
+        # a local state, so that the cache is released after the sweep
+        state = get_intactness_state(nodes, definitions)
+        yield from iterate_affected_befouled_nodes(
+            nodes, sccs, scc_dependencies, scc_dependents, job_nodes_by_scc,
+            ((root, get_befouled_nodes(state, job_nodes_by_scc[root])) for root in roots))
+
+def iterate_affected_befouled_nodes(
+        nodes: List[Node], sccs: List[Set[Node]], scc_dependencies: Dict[int, Set[int]],
+        scc_dependents: Dict[int, Set[int]], job_nodes_by_scc: Dict[int, FrozenSet[Node]],
+        results: Iterable[Tuple[int, List[Tuple[FrozenSet[Node], FrozenSet[Node]]]]]
+        ) -> Iterator[Tuple[Nodes, Nodes]]:
+    """Iterate the contributions of each SCC (once) as soon as the result of a swept SCC
+    that depends on it (or the SCC itself) arrives"""
+    # pylint: disable=too-many-arguments,too-many-positional-arguments
+    done: Set[int] = set()
+    for root, result in results:
+        befouled_nodes_by_ill_behaved_nodes = dict(result)
+        for scc_index in {root}.union(scc_dependencies[root]) - done:
+            done.add(scc_index)
+            affected_nodes = sccs[scc_index].union(*(sccs[dependent]
+                                                     for dependent in scc_dependents[scc_index]))
+            for ill_behaved_nodes in powerset(job_nodes_by_scc[scc_index]):
+                if ill_behaved_nodes == set() or ill_behaved_nodes == set(nodes):
+                    continue
+                befouled_nodes = befouled_nodes_by_ill_behaved_nodes[ill_behaved_nodes]
+                yield ill_behaved_nodes, (befouled_nodes - ill_behaved_nodes) & affected_nodes
+
+def get_hierarchical_intactness_matrix(nodes: List[Node], definitions: Definitions,
+                                       get_ill_behaved_weight: Callable[[Set[Node]], float],
+                                       processes: int = 1) -> numpy.ndarray:
+    """Compute matrix for hierarchical intactness-based centralities"""
+    return get_weighted_intactness_matrix(
+        nodes, iterate_hierarchical_intactness_contributions(nodes, definitions, processes),
+        get_ill_behaved_weight)
+
+def get_hierarchical_intactness_tensor(nodes: List[Node], definitions: Definitions,
+                                       processes: int = 1) -> numpy.ndarray:
+    """Compute the intactness tensor for hierarchical intactness-based centralities"""
+    return get_intactness_tensor_from_contributions(
+        nodes, iterate_hierarchical_intactness_contributions(nodes, definitions, processes))
 
 def get_hierarchical_intactness_eigenvector_centralities(
         nodes: List[Node], definitions: Definitions,
-        get_ill_behaved_weight: Callable[[Set[Node]], float]
+        get_ill_behaved_weight: Callable[[Set[Node]], float],
+        processes: int = 1
         ) -> numpy.array:
     """Compute hierarchical intactness eigenvector centralities"""
-    M = get_hierarchical_intactness_matrix(nodes, definitions, get_ill_behaved_weight)
-    eigenvalues, eigenvectors = eig(M)
-    index = numpy.argsort(numpy.real(eigenvalues))[-1]
-    centralities = numpy.abs(eigenvectors[:, index])
-    return centralities / numpy.max(centralities)
+    with instrumentation.record_time('centralities.intactness_sweep'):
+        M = get_hierarchical_intactness_matrix(nodes, definitions, get_ill_behaved_weight,
+                                               processes)
+    return get_matrix_eigenvector_centralities(M)
 
 def get_hierarchical_intactness_ls_centralities(
         nodes: List[Node], definitions: Definitions,
         get_ill_behaved_weight: Callable[[Set[Node]], float],
-        get_mu: Callable[[numpy.array], float]
+        get_mu: Callable[[numpy.ndarray], float],
+        processes: int = 1
         ) -> numpy.array:
     """Compute hierarchical intactness linear system centralities"""
-    M = get_hierarchical_intactness_matrix(nodes, definitions, get_ill_behaved_weight)
-    A = numpy.eye(len(nodes)) - get_mu(M) * M
-    centralities = numpy.linalg.solve(A, numpy.ones(len(nodes)))
-    return centralities / numpy.max(centralities)
+    with instrumentation.record_time('centralities.intactness_sweep'):
+        M = get_hierarchical_intactness_matrix(nodes, definitions, get_ill_behaved_weight,
+                                               processes)
+    return get_matrix_ls_centralities(M, get_mu)
 
-def get_minimal_intactness_matrix(
-        nodes: List[Node], definitions: Definitions,
-        get_ill_behaved_weight: Callable[[Set[Node]], float]
-        ) -> numpy.array:
-    """Compute matrix for minimal intactness-based centralities"""
+def is_minimal_befouling(combination: Tuple[int, ...], induced_befouled_mask: int,
+                         smaller_induced_befouled_masks: List[int]) -> bool:
+    """Check that no set of ill-behaved nodes with one node less (and that node) induces
+    the befouled nodes already (masks over node indexes)"""
+    for index, smaller_induced_befouled_mask in zip(combination,
+                                                    smaller_induced_befouled_masks):
+        difference = smaller_induced_befouled_mask & ~(1 << index)
+        if difference & induced_befouled_mask == induced_befouled_mask:
+            return False
+    return True
+
+def iterate_minimal_intactness_contributions(nodes: List[Node], definitions: Definitions
+                                             ) -> Iterator[Tuple[Nodes, Nodes]]:
+    """Iterate the pairs (ill-behaved nodes, induced befouled nodes) of the sweep for
+    minimal intactness-based centralities
+
+    The sets of ill-behaved nodes are swept by size (in the order of powerset()) and
+    only the befouled nodes of the previous size are kept: as bitmasks in an array
+    indexed by the colex rank of the ill-behaved nodes."""
+    # pylint: disable=too-many-locals
     fbas = (get_is_slice_contained(definitions), set(nodes))
-    node_to_index = {node: index for index, node in enumerate(nodes)}
-    M = numpy.zeros((len(nodes), len(nodes)))
+    # node indexes in the order of powerset()
+    ordered_nodes = list(frozenset(nodes))
+    node_to_index = {node: index for index, node in enumerate(ordered_nodes)}
+    n_nodes = len(ordered_nodes)
+    all_mask = (1 << n_nodes) - 1
+    binomials = get_binomials(n_nodes)
+    dtype = numpy.uint64 if n_nodes <= 64 else object
+    cache = get_intactness_cache()
+    # the bounds of get_bounded_intact_nodes() require quorum intersection
+    is_bounded = get_cached_disjoint_quorums(fbas, fbas[1], cache) is None
 
-    # note: this assumes that powerset() iterates from smallest to largest subset
-    def get_induced_befouled_nodes(ill_behaved_nodes: Nodes):
-        if ill_behaved_nodes == set() or ill_behaved_nodes == set(nodes):
-            return set()
-        intact_nodes = get_intact_nodes(fbas, ill_behaved_nodes)
-        befouled_nodes = set(nodes).difference(intact_nodes)
-        return befouled_nodes.difference(ill_behaved_nodes)
+    def get_nodes(mask: int) -> FrozenSet[Node]:
+        return frozenset(ordered_nodes[index] for index in iterate_bits(mask))
 
-    ill_behaved_to_induced_befouled: Dict[FrozenSet[Node], Set[Node]] = {}
+    def get_induced_befouled_mask(ill_behaved_mask: int, befouled_mask: int) -> int:
+        if ill_behaved_mask in (0, all_mask):
+            return 0
+        return befouled_mask & ~ill_behaved_mask
 
-    def is_minimal_befouling(ill_behaved_nodes: Nodes, induced_befouled_nodes: Nodes):
-        for ill_behaved_node in ill_behaved_nodes:
-            smaller_induced_befouled_nodes = ill_behaved_to_induced_befouled[
-                frozenset(ill_behaved_nodes.difference({ill_behaved_node}))
-            ]
-            difference = smaller_induced_befouled_nodes.difference({ill_behaved_node})
-            if difference >= induced_befouled_nodes:
-                return False
-        return True
+    previous_befouled_masks = numpy.zeros(0, dtype=dtype)
+    for size in range(n_nodes + 1):
+        befouled_masks = numpy.zeros(binomials[n_nodes][size], dtype=dtype)
+        # greatest quorums are mostly shared between sets of the same size
+        cache['greatest_quorums'].clear()
+        for combination in combinations(range(n_nodes), size):
+            ill_behaved_mask = sum(1 << index for index in combination)
+            ill_behaved_nodes = get_nodes(ill_behaved_mask)
+            smaller_befouled_masks = [int(previous_befouled_masks[rank]) for rank
+                                      in get_colex_sub_ranks(combination, binomials)]
+            if is_bounded:
+                smaller_intact_nodes = {
+                    ordered_nodes[index]: get_nodes(all_mask & ~smaller_befouled_mask)
+                    for index, smaller_befouled_mask in zip(combination,
+                                                            smaller_befouled_masks)}
+                intact_nodes = get_bounded_intact_nodes(fbas, ill_behaved_nodes, cache,
+                                                        smaller_intact_nodes.get)
+            else:
+                intact_nodes = get_intact_nodes(fbas, set(ill_behaved_nodes), cache)
+            befouled_mask = all_mask & ~sum(1 << node_to_index[node] for node in intact_nodes)
+            befouled_masks[get_colex_rank(combination, binomials)] = befouled_mask
 
-    for ill_behaved_nodes in powerset(nodes):
-        induced_befouled_nodes = get_induced_befouled_nodes(ill_behaved_nodes)
-        ill_behaved_to_induced_befouled[frozenset(ill_behaved_nodes)] = induced_befouled_nodes
+            induced_befouled_mask = get_induced_befouled_mask(ill_behaved_mask, befouled_mask)
+            smaller_induced_befouled_masks = [
+                get_induced_befouled_mask(ill_behaved_mask & ~(1 << index),
+                                          smaller_befouled_mask)
+                for index, smaller_befouled_mask in zip(combination, smaller_befouled_masks)]
+            if is_minimal_befouling(combination, induced_befouled_mask,
+                                    smaller_induced_befouled_masks):
+                yield set(ill_behaved_nodes), set(get_nodes(induced_befouled_mask))
+        previous_befouled_masks = befouled_masks
 
-        if not is_minimal_befouling(ill_behaved_nodes, induced_befouled_nodes):
-            continue
+def get_minimal_intactness_matrix(
+        nodes: List[Node], definitions: Definitions,
+        get_ill_behaved_weight: Callable[[Set[Node]], float]
+        ) -> numpy.ndarray:
+    """Compute matrix for minimal intactness-based centralities"""
+    return get_weighted_intactness_matrix(
+        nodes, iterate_minimal_intactness_contributions(nodes, definitions),
+        get_ill_behaved_weight)
 
-        ill_behaved_weight = get_ill_behaved_weight(ill_behaved_nodes)
-        for ill_behaved_node in ill_behaved_nodes:
-            for induced_befouled_node in induced_befouled_nodes:
-                M[node_to_index[ill_behaved_node], \
-                    node_to_index[induced_befouled_node]] += ill_behaved_weight
-    return M
+def get_minimal_intactness_tensor(nodes: List[Node], definitions: Definitions) -> numpy.ndarray:
+    """Compute the intactness tensor for minimal intactness-based centralities"""
+    return get_intactness_tensor_from_contributions(
+        nodes, iterate_minimal_intactness_contributions(nodes, definitions))
 
 def get_minimal_intactness_eigenvector_centralities(
         nodes: List[Node], definitions: Definitions,
         get_ill_behaved_weight: Callable[[Set[Node]], float]
         ) -> numpy.array:
     """Compute minimal intactness eigenvector centralities"""
-    M = get_minimal_intactness_matrix(nodes, definitions, get_ill_behaved_weight)
-    eigenvalues, eigenvectors = eig(M)
-    index = numpy.argsort(numpy.real(eigenvalues))[-1]
-    centralities = numpy.abs(eigenvectors[:, index])
-    return centralities / numpy.max(centralities)
+    with instrumentation.record_time('centralities.intactness_sweep'):
+        M = get_minimal_intactness_matrix(nodes, definitions, get_ill_behaved_weight)
+    return get_matrix_eigenvector_centralities(M)
 
 def get_minimal_intactness_ls_centralities(
         nodes: List[Node], definitions: Definitions,
@@ -244,7 +407,6 @@ def get_minimal_intactness_ls_centralities(
         get_mu: Callable[[numpy.array], float]
         ) -> numpy.array:
     """Compute minimal intactness linear system centralities"""
-    M = get_minimal_intactness_matrix(nodes, definitions, get_ill_behaved_weight)
-    A = numpy.eye(len(nodes)) - get_mu(M) * M
-    centralities = numpy.linalg.solve(A, numpy.ones(len(nodes)))
-    return centralities / numpy.max(centralities)
+    with instrumentation.record_time('centralities.intactness_sweep'):
+        M = get_minimal_intactness_matrix(nodes, definitions, get_ill_behaved_weight)
+    return get_matrix_ls_centralities(M, get_mu)
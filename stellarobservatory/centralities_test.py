@@ -3,11 +3,19 @@ from typing import Set
 import numpy
 from numpy.testing import assert_allclose
 
+from . import centralities as centralities_module
 from .utils.graph import Node
-from .centralities import get_eigenvector_centralities, \
-    get_hierarchical_intactness_ls_centralities, get_intactness_ls_centralities, \
-    get_quorum_eigenvector_centralities, get_quorum_subgraph_centralities, get_subgraph_centralities
-from .quorum_slice_definition import quorum_slices_to_definitions
+from .centralities import WORKER_STATE, get_eigenvector_centralities, \
+    get_hierarchical_intactness_ls_centralities, get_hierarchical_intactness_matrix, \
+    get_hierarchical_intactness_tensor, get_intactness_ls_centralities, get_intactness_matrix, \
+    get_intactness_tensor, get_matrix_ls_centralities, get_minimal_intactness_matrix, \
+    get_minimal_intactness_tensor, get_quorum_eigenvector_centralities, \
+    get_quorum_subgraph_centralities, get_size_weighted_matrix, get_subgraph_centralities, \
+    iterate_hierarchical_intactness_contributions, iterate_minimal_intactness_contributions
+from .intactness import get_intact_nodes
+from .quorum_intersection_sat_test import get_random_definitions
+from .quorum_slice_definition import get_is_slice_contained, quorum_slices_to_definitions
+from .utils.sets import powerset
 
 
 NODES = {1, 2, 3, 4, 5}
@@ -46,6 +54,8 @@ def test_get_quorum_eigenvector_centralities():
     centralities = get_quorum_eigenvector_centralities(NODES_LIST, DEFINITIONS)
     desired_centralities = [1., 0.584192, 0.584192, 0.584192, 0.584192]
     assert_allclose(centralities, desired_centralities, rtol=1e-5)
+    centralities = get_quorum_eigenvector_centralities(NODES_LIST, DEFINITIONS, processes=2)
+    assert_allclose(centralities, desired_centralities, rtol=1e-5)
 
 def test_get_quorum_subgraph_centralities():
     """Test get_quorum_subgraph_centralities()"""
@@ -67,3 +77,76 @@ def test_get_hierarchical_intactness_ls_centralities():
         NODES_LIST, DEFINITIONS, get_ill_behaved_weight, get_mu)
     desired_centralities = [1., 0.606552, 0.699301, 0.647041, 0.647041]
     assert_allclose(centralities, desired_centralities, rtol=1e-5)
+    # the serial sweep does not keep its cache
+    assert not WORKER_STATE
+    centralities = get_hierarchical_intactness_ls_centralities(
+        NODES_LIST, DEFINITIONS, get_ill_behaved_weight, get_mu, processes=2)
+    assert_allclose(centralities, desired_centralities, rtol=1e-5)
+
+def test_iterate_hierarchical_intactness_contributions(monkeypatch):
+    """Test that the contributions of each swept SCC are yielded before the next sweep"""
+    # SCCs {1, 2}, {3} and {4}, of which {3} and {4} depend on {1, 2}
+    definitions = quorum_slices_to_definitions({
+        1: [{1, 2}], 2: [{1, 2}], 3: [{1, 2, 3}], 4: [{1, 2, 4}]})
+    nodes = [1, 2, 3, 4]
+    fbas = (get_is_slice_contained(definitions), set(nodes))
+    expected_contributions = set()
+    for job_nodes, affected_nodes in [({1, 2}, {1, 2, 3, 4}), ({1, 2, 3}, {3}),
+                                      ({1, 2, 4}, {4})]:
+        for ill_behaved_nodes in powerset(job_nodes):
+            if ill_behaved_nodes:
+                befouled_nodes = set(nodes).difference(
+                    get_intact_nodes(fbas, set(ill_behaved_nodes)), ill_behaved_nodes)
+                expected_contributions.add(
+                    (ill_behaved_nodes, frozenset(befouled_nodes & affected_nodes)))
+    contributions = list(iterate_hierarchical_intactness_contributions(nodes, definitions))
+    assert len(contributions) == len(expected_contributions)
+    assert {(ill_behaved_nodes, frozenset(befouled_nodes))
+            for ill_behaved_nodes, befouled_nodes in contributions} == expected_contributions
+
+    swept_job_nodes = []
+    get_befouled_nodes = centralities_module.get_befouled_nodes
+    def get_recorded_befouled_nodes(state, job_nodes):
+        swept_job_nodes.append(job_nodes)
+        return get_befouled_nodes(state, job_nodes)
+    monkeypatch.setattr(centralities_module, 'get_befouled_nodes', get_recorded_befouled_nodes)
+    next(iterate_hierarchical_intactness_contributions(nodes, definitions))
+    assert len(swept_job_nodes) == 1
+
+def test_get_intactness_tensors():
+    """Test size-weighted intactness tensors against the intactness matrices"""
+    for get_tensor, get_matrix in [
+            (get_intactness_tensor, get_intactness_matrix),
+            (get_hierarchical_intactness_tensor, get_hierarchical_intactness_matrix),
+            (get_minimal_intactness_tensor, get_minimal_intactness_matrix)]:
+        tensor = get_tensor(NODES_LIST, DEFINITIONS)
+        assert_allclose(get_size_weighted_matrix(tensor, lambda size: 1/2**size),
+                        get_matrix(NODES_LIST, DEFINITIONS, get_ill_behaved_weight))
+        assert_allclose(get_size_weighted_matrix(tensor, lambda size: size),
+                        get_matrix(NODES_LIST, DEFINITIONS, len))
+
+    matrix = get_size_weighted_matrix(get_intactness_tensor(NODES_LIST, DEFINITIONS),
+                                      lambda size: 1/2**size)
+    desired_centralities = [1., 0.606552, 0.699301, 0.647041, 0.647041]
+    assert_allclose(get_matrix_ls_centralities(matrix, get_mu), desired_centralities, rtol=1e-5)
+
+def test_iterate_minimal_intactness_contributions():
+    """Test the level-by-level sweep against all results held in a dict"""
+    for seed in range(40):
+        nodes, definitions = get_random_definitions(seed)
+        fbas = (get_is_slice_contained(definitions), set(nodes))
+        induced_befouled_nodes_by_ill_behaved_nodes = {}
+        expected_contributions = []
+        for ill_behaved_nodes in powerset(nodes):
+            induced_befouled_nodes = set()
+            if ill_behaved_nodes not in (set(), set(nodes)):
+                induced_befouled_nodes = set(nodes).difference(
+                    get_intact_nodes(fbas, set(ill_behaved_nodes)), ill_behaved_nodes)
+            induced_befouled_nodes_by_ill_behaved_nodes[ill_behaved_nodes] = \
+                induced_befouled_nodes
+            if not any(induced_befouled_nodes_by_ill_behaved_nodes[
+                    ill_behaved_nodes.difference({node})].difference({node})
+                       >= induced_befouled_nodes for node in ill_behaved_nodes):
+                expected_contributions.append((ill_behaved_nodes, induced_befouled_nodes))
+        assert list(iterate_minimal_intactness_contributions(nodes, definitions)) == \
+            expected_contributions
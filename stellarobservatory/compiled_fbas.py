@@ -0,0 +1,132 @@
+"""Compiled FBAS: quorum slice definitions evaluated on node bitmasks"""
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, TypedDict
+
+from .quorum_slice_definition import Definition, Definitions, restrict_definition, \
+    simplify_definition
+from .utils.graph import Node, Nodes
+from .utils.sets import iterate_bits, popcount
+
+# (threshold, bitmask of nodes, tuple of compiled children definitions)
+# NOTE: use Tuple[int, int, Tuple['CompiledDefinition', ...]] when
+# https://github.com/python/mypy/issues/731 is fixed
+CompiledDefinition = Tuple[int, int, Tuple[Any, ...]]
+
+CompiledFbas = TypedDict('CompiledFbas', {
+    'nodes': List[Any],
+    'node_to_index': Dict[Any, int],
+    'definitions': List[CompiledDefinition],
+    'all_mask': int
+})
+
+def compile_definition(definition: Definition, node_to_index: Dict[Node, int]
+                       ) -> CompiledDefinition:
+    """Compile a quorum slice definition to bitmasks
+
+    Nodes that are not in node_to_index can never be contained in a candidate
+    and are therefore dropped."""
+    nodes_mask = 0
+    for node in definition['nodes']:
+        if node in node_to_index:
+            nodes_mask |= 1 << node_to_index[node]
+    return (
+        definition['threshold'],
+        nodes_mask,
+        tuple(compile_definition(children_definition, node_to_index)
+              for children_definition in definition['children_definitions'])
+    )
+
+def compile_definitions(definitions: Definitions,
+                        nodes: Optional[Iterable[Node]] = None) -> CompiledFbas:
+    """Compile quorum slice definitions for the given nodes (default: all defined nodes)
+
+    The definitions are restricted to the nodes and simplified first."""
+    node_list = list(definitions.keys()) if nodes is None else list(nodes)
+    node_to_index = {node: index for index, node in enumerate(node_list)}
+    node_set = set(node_list)
+    return {
+        'nodes': node_list,
+        'node_to_index': node_to_index,
+        'definitions': [compile_definition(simplify_definition(restrict_definition(
+            definitions[node], node_set)), node_to_index) for node in node_list],
+        'all_mask': (1 << len(node_list)) - 1
+    }
+
+def nodes_to_mask(compiled: CompiledFbas, nodes: Iterable[Node]) -> int:
+    """Convert a set of nodes to a bitmask"""
+    node_to_index = compiled['node_to_index']
+    mask = 0
+    for node in nodes:
+        mask |= 1 << node_to_index[node]
+    return mask
+
+def mask_to_nodes(compiled: CompiledFbas, mask: int) -> Nodes:
+    """Convert a bitmask to a set of nodes"""
+    node_list = compiled['nodes']
+    return {node_list[index] for index in iterate_bits(mask)}
+
+def satisfies_compiled_definition(candidate: int, definition: CompiledDefinition) -> bool:
+    """Checks if the candidate bitmask contains a slice for the compiled definition"""
+    threshold, nodes_mask, children_definitions = definition
+    satisfied = popcount(candidate & nodes_mask)
+    if satisfied >= threshold:
+        return True
+    for children_definition in children_definitions:
+        if satisfies_compiled_definition(candidate, children_definition):
+            satisfied += 1
+            if satisfied >= threshold:
+                return True
+    return False
+
+def greatest_quorum_mask(compiled: CompiledFbas, nodes: int, lower_bound: int = 0,
+                         deleted: int = 0) -> int:
+    """
+    Return greatest quorum (as bitmask) contained in nodes if it is a super set of
+    lower_bound or 0 (if there is no such quorum).
+
+    Nodes in deleted are considered to be removed from the FBAS, i.e., they count
+    as contained in every candidate (see remove_from_definition()).
+    """
+    definitions = compiled['definitions']
+    nodes &= ~deleted
+    while True:
+        candidate = nodes | deleted
+        next_u = 0
+        for index in iterate_bits(nodes):
+            if satisfies_compiled_definition(candidate, definitions[index]):
+                next_u |= 1 << index
+            elif (lower_bound >> index) & 1:
+                return 0
+        if next_u in (nodes, 0):
+            return next_u
+        nodes = next_u
+
+def is_quorum_mask(compiled: CompiledFbas, nodes: int, deleted: int = 0) -> bool:
+    """Check whether the non-empty bitmask nodes is a quorum of the FBAS without deleted"""
+    if nodes == 0 or nodes & deleted:
+        return False
+    definitions = compiled['definitions']
+    candidate = nodes | deleted
+    return all(satisfies_compiled_definition(candidate, definitions[index])
+               for index in iterate_bits(nodes))
+
+def get_compiled_fbas(compiled: CompiledFbas, deleted: Optional[Nodes] = None
+                      ) -> Tuple[Callable[[Nodes, Node], bool], Nodes]:
+    """Return the FBAS (is_slice_contained, nodes) of the compiled FBAS without deleted nodes
+
+    This is equivalent to applying remove_from_definition() for each deleted node but
+    does not copy any definitions."""
+    definitions = compiled['definitions']
+    node_to_index = compiled['node_to_index']
+    deleted_mask = nodes_to_mask(compiled, deleted) if deleted else 0
+
+    def is_slice_contained(candidate: Nodes, node: Node) -> bool:
+        index = node_to_index[node]
+        if (deleted_mask >> index) & 1:
+            raise ValueError('node not defined in FBAS')
+        candidate_mask = deleted_mask
+        for candidate_node in candidate:
+            if candidate_node in node_to_index:
+                candidate_mask |= 1 << node_to_index[candidate_node]
+        return satisfies_compiled_definition(candidate_mask, definitions[index])
+
+    return is_slice_contained, mask_to_nodes(compiled, compiled['all_mask'] & ~deleted_mask)
@@ -0,0 +1,50 @@
+"""Tests for compiled FBAS"""
+from .compiled_fbas import compile_definitions, get_compiled_fbas, greatest_quorum_mask, \
+    is_quorum_mask, mask_to_nodes, nodes_to_mask, satisfies_compiled_definition
+from .quorums import greatest_quorum
+from .quorum_slice_definition import get_is_slice_contained, remove_from_definition, \
+    satisfies_definition
+from .quorum_slice_definition_test import DEFINITIONS_BY_NODE_ABCDE
+from .utils.sets import powerset
+
+COMPILED = compile_definitions(DEFINITIONS_BY_NODE_ABCDE)
+
+def test_masks():
+    """Test nodes_to_mask() and mask_to_nodes()"""
+    assert nodes_to_mask(COMPILED, set()) == 0
+    assert nodes_to_mask(COMPILED, {'A', 'C'}) == 0b101
+    assert mask_to_nodes(COMPILED, 0b101) == {'A', 'C'}
+    assert mask_to_nodes(COMPILED, COMPILED['all_mask']) == set(DEFINITIONS_BY_NODE_ABCDE)
+
+def test_satisfies_compiled_definition():
+    """Test satisfies_compiled_definition() against satisfies_definition()"""
+    for candidate in powerset(DEFINITIONS_BY_NODE_ABCDE.keys()):
+        candidate_mask = nodes_to_mask(COMPILED, candidate)
+        for index, node in enumerate(COMPILED['nodes']):
+            assert satisfies_compiled_definition(candidate_mask,
+                                                 COMPILED['definitions'][index]) == \
+                satisfies_definition(set(candidate), DEFINITIONS_BY_NODE_ABCDE[node])
+
+def test_greatest_quorum_mask():
+    """Test greatest_quorum_mask() against greatest_quorum()"""
+    is_slice_contained = get_is_slice_contained(DEFINITIONS_BY_NODE_ABCDE)
+    for nodes in powerset(DEFINITIONS_BY_NODE_ABCDE.keys()):
+        expected = greatest_quorum(is_slice_contained, set(nodes), set())
+        result = greatest_quorum_mask(COMPILED, nodes_to_mask(COMPILED, nodes))
+        assert mask_to_nodes(COMPILED, result) == expected
+    assert greatest_quorum_mask(COMPILED, nodes_to_mask(COMPILED, {'A', 'D'}),
+                                nodes_to_mask(COMPILED, {'D'})) == 0
+    assert is_quorum_mask(COMPILED, nodes_to_mask(COMPILED, {'A', 'B'})) is True
+    assert is_quorum_mask(COMPILED, nodes_to_mask(COMPILED, {'D'})) is False
+    assert is_quorum_mask(COMPILED, nodes_to_mask(COMPILED, {'D'}),
+                          nodes_to_mask(COMPILED, {'A'})) is True
+
+def test_get_compiled_fbas():
+    """Test get_compiled_fbas() against remove_from_definition()"""
+    deleted = {'A'}
+    is_slice_contained, nodes = get_compiled_fbas(COMPILED, deleted)
+    assert nodes == {'B', 'C', 'D', 'E'}
+    for candidate in powerset(nodes):
+        for node in nodes:
+            assert is_slice_contained(set(candidate), node) == satisfies_definition(
+                set(candidate), remove_from_definition(DEFINITIONS_BY_NODE_ABCDE[node], 'A'))
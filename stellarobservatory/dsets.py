@@ -1,26 +1,119 @@
 """Dsets"""
-from typing import Callable, Tuple
+from typing import Callable, Dict, FrozenSet, List, Optional, Tuple
 from .utils.graph import Node, Nodes
-from .quorums import enumerate_quorums
-from .quorum_intersection import quorum_intersection
+from .quorums import expand_quorums_frame, greatest_quorum
+from .quorum_intersection import enumerate_minimal_quorums, quorum_intersection
 
-def enumerate_dsets(fbas: Tuple[Callable[[Nodes, Node], bool], Nodes]):
-    """Enumerate all dsets of FBAS F (given by the pair (function(set<T>, T) -> bool, set))."""
+# two disjoint quorums of the FBAS without the deleted nodes: (deleted, quorum1, quorum2)
+DsetWitness = Tuple[FrozenSet, FrozenSet, FrozenSet]
+
+MAX_WITNESSES = 32
+MAX_MEMOIZED_GREATEST_QUORUMS = 4096
+
+def get_restricted_fbas(fbas: Tuple[Callable[[Nodes, Node], bool], Nodes], nodes: Nodes):
+    """Return the FBAS F^{V\\D} restricted to nodes (D = V\\nodes are deleted)."""
     (is_slice_contained, all_nodes) = fbas
-    yield all_nodes
-    dset_candidate = None
-    for quorum in enumerate_quorums(fbas):
-        dset_candidate = all_nodes.difference(quorum)
+    deleted_nodes = all_nodes.difference(nodes)
 
-        # define F^{V\D}
-        def cur_is_slice_contained(candidate, node):
-            if node in dset_candidate:
-                raise ValueError('node not defined in FBAS')
-            return is_slice_contained(candidate.union(dset_candidate), node)
-        cur_fbas = (cur_is_slice_contained, quorum)
+    def cur_is_slice_contained(candidate, node):
+        if node in deleted_nodes:
+            raise ValueError('node not defined in FBAS')
+        return is_slice_contained(candidate.union(deleted_nodes), node)
+    return cur_is_slice_contained, nodes
 
-        # determine whether F^{V\Q} has quorum intersection:
-        result = quorum_intersection(cur_fbas)
+def get_memoized_greatest_quorum(is_slice_contained: Callable[[Nodes, Node], bool],
+                                 nodes: FrozenSet, memo: Dict[FrozenSet, FrozenSet]
+                                 ) -> FrozenSet:
+    """greatest_quorum() of F (without lower bound) with results shared between candidates"""
+    if nodes not in memo:
+        if len(memo) >= MAX_MEMOIZED_GREATEST_QUORUMS:
+            memo.clear()
+        memo[nodes] = frozenset(greatest_quorum(is_slice_contained, set(nodes), set()))
+    return memo[nodes]
 
+def find_dset_witness(fbas: Tuple[Callable[[Nodes, Node], bool], Nodes], deleted: FrozenSet,
+                      min_quorums: List[FrozenSet], witnesses: List[DsetWitness],
+                      memo: Dict[FrozenSet, FrozenSet]) -> Optional[DsetWitness]:
+    """Return two disjoint quorums of F^{V\\D} (D = deleted) or None if it has quorum
+    intersection"""
+    # pylint: disable=too-many-arguments,too-many-positional-arguments
+    (is_slice_contained, all_nodes) = fbas
+    # disjoint quorums of F^{V\D0} without D are disjoint quorums of F^{V\D} if D0 ⊆ D
+    # (unless one of them is contained in D)
+    for index, (witness_deleted, quorum1, quorum2) in enumerate(witnesses):
+        if witness_deleted <= deleted and not quorum1 <= deleted and not quorum2 <= deleted:
+            witnesses.insert(0, witnesses.pop(index))
+            return deleted, quorum1 - deleted, quorum2 - deleted
+
+    witness = None
+    # for a minimal quorum M of F, M\D is a quorum of F^{V\D}. If the greatest quorum of F
+    # in V\(M\D) is not contained in D, then it yields a disjoint quorum of F^{V\D}.
+    # (untouched minimal quorums only yield witnesses that F^{V\D0} already has for the
+    # first candidate D0 = V\greatest_quorum(V))
+    for min_quorum in min_quorums:
+        if min_quorum.isdisjoint(deleted) or min_quorum <= deleted:
+            continue
+        quorum1 = min_quorum - deleted
+        quorum2 = get_memoized_greatest_quorum(is_slice_contained,
+                                               frozenset(all_nodes.difference(quorum1)),
+                                               memo) - deleted
+        if quorum2:
+            witness = (deleted, quorum1, quorum2)
+            break
+    if witness is None:
+        result = quorum_intersection(get_restricted_fbas(fbas, all_nodes.difference(deleted)))
         if result is True:
-            yield dset_candidate
+            return None
+        witness = (deleted, frozenset(result[1]), frozenset(result[2]))
+    witnesses.insert(0, witness)
+    del witnesses[MAX_WITNESSES:]
+    return witness
+
+def enumerate_dsets(fbas: Tuple[Callable[[Nodes, Node], bool], Nodes], mode='all'):
+    """Enumerate all dsets of FBAS F (given by the pair (function(set<T>, T) -> bool, set)).
+
+    'minimal' mode only enumerates the minimal dsets and 'maximal' mode only the maximal
+    dsets except V (which is the greatest dset)."""
+    # pylint: disable=too-many-locals,too-many-branches
+    if mode not in ('all', 'minimal', 'maximal'):
+        raise ValueError(f'unknown mode {mode}')
+    (is_slice_contained, all_nodes) = fbas
+    if mode == 'all':
+        yield all_nodes
+    # the minimal quorums of F are enumerated once and shared between all candidates
+    min_quorums = [frozenset(quorum) for quorum in enumerate_minimal_quorums(fbas)]
+    witnesses: List[DsetWitness] = []
+    memo: Dict[FrozenSet, FrozenSet] = {}
+    dsets: List[FrozenSet] = []
+
+    # traverse_quorums() with an explicit stack (quorums in a subtree are subsets of the
+    # quorum of its root, i.e., the candidates are supersets of the root's candidate)
+    stack: List[Tuple[Nodes, Nodes]] = [(set(), set(all_nodes))]
+    while stack:
+        committed, remaining = stack.pop()
+        quorum, frames = expand_quorums_frame(is_slice_contained, committed, remaining)
+        if quorum is None:
+            continue
+        deleted = frozenset(all_nodes.difference(quorum))
+        if mode == 'minimal' and any(dset <= deleted for dset in dsets):
+            continue
+        if mode == 'maximal' and any(deleted <= dset for dset in dsets):
+            is_dset = False
+        else:
+            is_dset = find_dset_witness(fbas, deleted, min_quorums, witnesses, memo) is None
+        if is_dset:
+            if mode == 'all':
+                yield set(deleted)
+            else:
+                dsets.append(deleted)
+            if mode == 'minimal':
+                continue
+        stack.extend(reversed(frames))
+
+    if mode == 'minimal':
+        dsets = [dset for dset in dsets if not any(other < dset for other in dsets)] \
+            or [frozenset(all_nodes)]
+    elif mode == 'maximal':
+        dsets = [dset for dset in dsets if not any(dset < other for other in dsets)]
+    for dset in dsets:
+        yield set(dset)
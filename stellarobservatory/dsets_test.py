@@ -21,3 +21,21 @@ def test_enumerate_dsets():
         frozenset({1, 2, 3, 4, 5, 6, 7}),
         frozenset({8, 4, 5, 6})
     }
+
+def test_enumerate_dsets_minimal_maximal():
+    """Test enmumerate_dsets with mode 'minimal' and 'maximal'"""
+    def is_slice_contained(nodes_subset, node) -> bool:
+        return contains_slice(nodes_subset, SLICES_BY_NODE, node)
+
+    minimal_dsets = set(frozenset(dset) for dset
+                        in enumerate_dsets((is_slice_contained, NODES), 'minimal'))
+    assert minimal_dsets == {
+        frozenset({1, 2, 3, 4, 5, 6, 7}),
+        frozenset({8, 4, 5, 6})
+    }
+    maximal_dsets = set(frozenset(dset) for dset
+                        in enumerate_dsets((is_slice_contained, NODES), 'maximal'))
+    assert maximal_dsets == {
+        frozenset({1, 2, 3, 4, 5, 6, 8}),
+        frozenset({1, 2, 3, 4, 5, 6, 7})
+    }
@@ -0,0 +1,87 @@
+"""Synthetic FBAS generators (in stellarbeat format) for tests and benchmarks"""
+import random
+from typing import List, Optional
+
+from .stellarbeat import QuorumSet, StellarbeatNode
+
+def get_stellarbeat_node(public_key: str, quorum_set: QuorumSet,
+                         name: Optional[str] = None) -> StellarbeatNode:
+    """Return a stellarbeat node"""
+    return {'publicKey': public_key, 'quorumSet': quorum_set, 'name': name or public_key}
+
+def get_majority(size: int) -> int:
+    """Return the smallest threshold that is a strict majority"""
+    return size // 2 + 1
+
+def get_symmetric_fbas(n_nodes: int, threshold: Optional[int] = None
+                       ) -> List[StellarbeatNode]:
+    """All nodes use the same flat quorum set (default threshold: 2/3 + 1 of all nodes)"""
+    public_keys = [f'N{index}' for index in range(n_nodes)]
+    quorum_set: QuorumSet = {
+        'threshold': threshold if threshold is not None else 2 * n_nodes // 3 + 1,
+        'validators': public_keys,
+        'innerQuorumSets': []
+    }
+    return [get_stellarbeat_node(public_key, quorum_set) for public_key in public_keys]
+
+def get_organization_quorum_set(organizations: List[List[str]],
+                                organization_threshold: Optional[int] = None
+                                ) -> QuorumSet:
+    """Quorum set with one inner quorum set (simple majority) per organization"""
+    return {
+        'threshold': organization_threshold if organization_threshold is not None \
+            else 2 * len(organizations) // 3 + 1,
+        'validators': [],
+        'innerQuorumSets': [{
+            'threshold': get_majority(len(validators)),
+            'validators': validators,
+            'innerQuorumSets': []
+        } for validators in organizations]
+    }
+
+def get_tiered_fbas(n_organizations: int, validators_per_organization: int = 3,
+                    n_watchers: int = 0, organization_threshold: Optional[int] = None
+                    ) -> List[StellarbeatNode]:
+    """Mainnet-like FBAS: a top tier of organizations whose validators require
+    2/3 + 1 of the organizations and watchers that trust the top tier"""
+    organizations = [
+        [f'O{organization}V{validator}'
+         for validator in range(validators_per_organization)]
+        for organization in range(n_organizations)
+    ]
+    quorum_set = get_organization_quorum_set(organizations, organization_threshold)
+    nodes = [get_stellarbeat_node(public_key, quorum_set)
+             for validators in organizations for public_key in validators]
+    nodes += [get_stellarbeat_node(f'W{watcher}', quorum_set)
+              for watcher in range(n_watchers)]
+    return nodes
+
+def get_random_quorum_set(rng: random.Random, public_keys: List[str], max_depth: int
+                          ) -> QuorumSet:
+    """Random nested quorum set over a random sample of public keys"""
+    validators = rng.sample(public_keys, rng.randint(0, min(len(public_keys), 5)))
+    inner_quorum_sets = [get_random_quorum_set(rng, public_keys, max_depth - 1)
+                         for _ in range(rng.randint(0, 3 if max_depth > 0 else 0))]
+    size = len(validators) + len(inner_quorum_sets)
+    if size == 0:
+        validators = [rng.choice(public_keys)]
+        size = 1
+    return {
+        'threshold': rng.randint(get_majority(size), size),
+        'validators': validators,
+        'innerQuorumSets': inner_quorum_sets
+    }
+
+def get_random_fbas(n_nodes: int, seed: int = 0, max_depth: int = 2
+                    ) -> List[StellarbeatNode]:
+    """FBAS with random nested quorum sets"""
+    rng = random.Random(seed)
+    public_keys = [f'N{index}' for index in range(n_nodes)]
+    return [get_stellarbeat_node(public_key, get_random_quorum_set(rng, public_keys, max_depth))
+            for public_key in public_keys]
+
+def get_broken_intersection_fbas(n_organizations: int, validators_per_organization: int = 3,
+                                 n_watchers: int = 0) -> List[StellarbeatNode]:
+    """Mainnet-like FBAS whose organization threshold is too low for quorum intersection"""
+    return get_tiered_fbas(n_organizations, validators_per_organization, n_watchers,
+                           organization_threshold=max(1, n_organizations // 2))
@@ -0,0 +1,32 @@
+"""Tests for synthetic FBAS generators"""
+from .generators import get_broken_intersection_fbas, get_random_fbas, get_symmetric_fbas, \
+    get_tiered_fbas
+from .quorum_intersection import quorum_intersection
+from .quorum_slice_definition import get_is_slice_contained
+from .stellarbeat import convert_stellarbeat_to_observatory
+
+def has_quorum_intersection(stellarbeat_nodes) -> bool:
+    """Check quorum intersection of a generated FBAS"""
+    nodes, definitions, _ = convert_stellarbeat_to_observatory(stellarbeat_nodes)
+    return quorum_intersection((get_is_slice_contained(definitions), nodes)) is True
+
+def test_get_symmetric_fbas():
+    """Test get_symmetric_fbas()"""
+    stellarbeat_nodes = get_symmetric_fbas(4)
+    assert len(stellarbeat_nodes) == 4
+    assert stellarbeat_nodes[0]['quorumSet']['threshold'] == 3
+    assert has_quorum_intersection(stellarbeat_nodes)
+    assert not has_quorum_intersection(get_symmetric_fbas(4, threshold=2))
+
+def test_get_tiered_fbas():
+    """Test get_tiered_fbas() and get_broken_intersection_fbas()"""
+    stellarbeat_nodes = get_tiered_fbas(4, 3, n_watchers=2)
+    assert len(stellarbeat_nodes) == 14
+    assert has_quorum_intersection(stellarbeat_nodes)
+    assert not has_quorum_intersection(get_broken_intersection_fbas(4, 2))
+
+def test_get_random_fbas():
+    """Test get_random_fbas() is deterministic"""
+    assert get_random_fbas(6, seed=1) == get_random_fbas(6, seed=1)
+    nodes, definitions, _ = convert_stellarbeat_to_observatory(get_random_fbas(6, seed=1))
+    assert nodes == set(definitions.keys())
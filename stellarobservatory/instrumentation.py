@@ -0,0 +1,134 @@
+"""Low-overhead counters and timers for FBAS algorithms
+
+Instrumentation is disabled by default and then costs a single global lookup in
+the instrumented functions. Enable it with the profile() context manager or by
+setting the environment variable STELLAR_OBSERVATORY_PROFILE to 1 (report is
+printed to stderr at exit) or to a file path (report is written as JSON at exit).
+"""
+import atexit
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Optional, TypedDict
+
+Report = TypedDict('Report', {
+    'counters': Dict[str, int],
+    'maxima': Dict[str, int],
+    'timers': Dict[str, float],
+    'started': float,
+    'elapsed': float
+})
+
+ProgressCallback = Callable[[Report], None]
+
+# the report that is currently recorded (None if instrumentation is disabled)
+# pylint: disable=unsubscriptable-object
+ACTIVE_REPORT: Optional[Report] = None
+PROGRESS: Dict = {'callback': None, 'interval': 1.0, 'last': 0.0}
+
+# only check for due progress callbacks every PROGRESS_CHECK_INTERVAL counts
+PROGRESS_CHECK_INTERVAL = 1024
+
+def get_empty_report() -> Report:
+    """Return a new empty report"""
+    return {
+        'counters': {},
+        'maxima': {},
+        'timers': {},
+        'started': time.monotonic(),
+        'elapsed': 0.0
+    }
+
+def count(name: str, increment: int = 1):
+    """Increment a counter of the active report (callers check ACTIVE_REPORT first)"""
+    report = ACTIVE_REPORT
+    if report is None:
+        return
+    counters = report['counters']
+    value = counters.get(name, 0) + increment
+    counters[name] = value
+    progress_callback = PROGRESS['callback']
+    if progress_callback is not None and value % PROGRESS_CHECK_INTERVAL < increment:
+        now = time.monotonic()
+        if now - PROGRESS['last'] >= PROGRESS['interval']:
+            PROGRESS['last'] = now
+            report['elapsed'] = now - report['started']
+            progress_callback(report) # pylint: disable=not-callable
+
+def record_max(name: str, value: int):
+    """Record the maximum of a value (e.g., a recursion depth) in the active report"""
+    report = ACTIVE_REPORT
+    if report is not None and value > report['maxima'].get(name, -1):
+        report['maxima'][name] = value
+
+def get_counted(name: str, function: Callable) -> Callable:
+    """Wrap a function such that its calls are counted (only use if instrumentation is enabled)"""
+    def counted_function(*args):
+        count(name)
+        return function(*args)
+    return counted_function
+
+@contextmanager
+def record_time(name: str) -> Iterator[None]:
+    """Context manager that adds the elapsed time to a timer of the active report"""
+    report = ACTIVE_REPORT
+    if report is None:
+        yield
+        return
+    started = time.monotonic()
+    try:
+        yield
+    finally:
+        report['timers'][name] = report['timers'].get(name, 0.0) + time.monotonic() - started
+
+@contextmanager
+def profile(progress_callback: Optional[ProgressCallback] = None,
+            progress_interval: float = 1.0) -> Iterator[Report]:
+    """Context manager that enables instrumentation and yields the recorded report
+
+    If given, progress_callback is called with the report at most every
+    progress_interval seconds while the instrumented algorithms are running."""
+    global ACTIVE_REPORT # pylint: disable=global-statement
+    previous_report = ACTIVE_REPORT
+    previous_progress = PROGRESS.copy()
+    report = get_empty_report()
+    ACTIVE_REPORT = report
+    PROGRESS.update({'callback': progress_callback, 'interval': progress_interval,
+                     'last': report['started']})
+    try:
+        yield report
+    finally:
+        report['elapsed'] = time.monotonic() - report['started']
+        ACTIVE_REPORT = previous_report
+        PROGRESS.update(previous_progress)
+
+def report_to_json(report: Report) -> str:
+    """Export a report as JSON"""
+    return json.dumps({
+        'elapsed': report['elapsed'],
+        'counters': report['counters'],
+        'maxima': report['maxima'],
+        'timers': report['timers']
+    }, indent=2, sort_keys=True)
+
+def enable_from_environment():
+    """Enable instrumentation for the whole process if STELLAR_OBSERVATORY_PROFILE is set"""
+    global ACTIVE_REPORT # pylint: disable=global-statement
+    target = os.environ.get('STELLAR_OBSERVATORY_PROFILE')
+    if not target or target == '0' or ACTIVE_REPORT is not None:
+        return
+    report = get_empty_report()
+    ACTIVE_REPORT = report
+
+    def write_report():
+        report['elapsed'] = time.monotonic() - report['started']
+        if target == '1':
+            print(report_to_json(report), file=sys.stderr)
+        else:
+            with open(target, 'w', encoding='utf-8') as report_file:
+                report_file.write(report_to_json(report))
+    atexit.register(write_report)
+
+enable_from_environment()
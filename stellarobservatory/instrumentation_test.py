@@ -0,0 +1,46 @@
+"""Tests for instrumentation"""
+import json
+from . import instrumentation
+from .centralities import get_intactness_ls_centralities
+from .centralities_test import DEFINITIONS, NODES, NODES_LIST, SLICES_BY_NODE, \
+    get_ill_behaved_weight, get_mu
+from .intactness import get_intact_nodes
+from .quorum_intersection import quorum_intersection
+from .quorums import contains_slice
+
+def is_slice_contained(nodes_subset, node) -> bool:
+    """FBAS of the centrality paper example"""
+    return contains_slice(nodes_subset, SLICES_BY_NODE, node)
+
+def test_profile():
+    """Test profile() with quorum intersection and intactness"""
+    with instrumentation.profile() as report:
+        assert quorum_intersection((is_slice_contained, NODES)) is True
+        assert get_intact_nodes((is_slice_contained, NODES), {2}) == {1, 3, 4, 5}
+    counters = report['counters']
+    assert counters['greatest_quorum.calls'] > 0
+    assert counters['greatest_quorum.rounds'] >= counters['greatest_quorum.calls']
+    assert counters['is_slice_contained.calls'] >= counters['greatest_quorum.rounds']
+    assert counters['traverse_min_quorums.visited'] > counters['traverse_min_quorums.pruned']
+    assert counters['get_intact_nodes.iterations'] == 1
+    assert report['maxima']['traverse_min_quorums.depth'] > 0
+    assert json.loads(instrumentation.report_to_json(report))['counters'] == counters
+    assert instrumentation.ACTIVE_REPORT is None
+
+def test_profile_disabled():
+    """Test that nothing is recorded outside of profile()"""
+    with instrumentation.profile() as report:
+        pass
+    quorum_intersection((is_slice_contained, NODES))
+    assert not report['counters']
+
+def test_profile_timers_and_progress(monkeypatch):
+    """Test centralities phase timers and progress callbacks"""
+    monkeypatch.setattr(instrumentation, 'PROGRESS_CHECK_INTERVAL', 1)
+    progress_reports = []
+    with instrumentation.profile(progress_reports.append, progress_interval=0) as report:
+        get_intactness_ls_centralities(NODES_LIST, DEFINITIONS, get_ill_behaved_weight, get_mu)
+    assert set(report['timers']) == {'centralities.intactness_sweep',
+                                     'centralities.linear_solver'}
+    assert len(progress_reports) > 0
+    assert progress_reports[0] is report
@@ -1,40 +1,93 @@
 """Algorithm for determining B-intact nodes given a set B of nodes."""
-from typing import Tuple, Callable, cast
+from collections import OrderedDict
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple, TypedDict
 
+from stellarobservatory import instrumentation
+from stellarobservatory.dsets import get_restricted_fbas
 from stellarobservatory.quorum_intersection import quorum_intersection
 from stellarobservatory.quorums import greatest_quorum
 from .utils.graph import Node, Nodes
 
+# every dict holds at most max_size results (least recently used first)
+IntactnessCache = TypedDict('IntactnessCache', {
+    # node set -> greatest quorum contained in it
+    'greatest_quorums': 'OrderedDict[FrozenSet, FrozenSet]',
+    # quorum Q -> two disjoint quorums of F^{V\Q} (or None if it has quorum intersection)
+    'quorum_intersection': 'OrderedDict[FrozenSet, Optional[Tuple[Nodes, Nodes]]]',
+    # B -> B-intact nodes
+    'intact_nodes': 'OrderedDict[FrozenSet, FrozenSet]',
+    'max_size': int
+})
+
+DEFAULT_INTACTNESS_CACHE_SIZE = 2**16
+
+def get_intactness_cache(max_size: int = DEFAULT_INTACTNESS_CACHE_SIZE) -> IntactnessCache:
+    """Return an empty cache that can be shared between intactness analyses of one FBAS"""
+    return {'greatest_quorums': OrderedDict(), 'quorum_intersection': OrderedDict(),
+            'intact_nodes': OrderedDict(), 'max_size': max_size}
+
+def put_cached(results: 'OrderedDict[FrozenSet, Any]', key: FrozenSet, value: Any,
+               max_size: int) -> Any:
+    """Memoize a result (evicting the least recently used one) and return it"""
+    results[key] = value
+    if len(results) > max_size:
+        results.popitem(last=False)
+    return value
+
+def get_cached_greatest_quorum(is_slice_contained: Callable[[Nodes, Node], bool],
+                               nodes: Nodes, cache: IntactnessCache) -> Nodes:
+    """greatest_quorum() (without lower bound) with results shared via the cache"""
+    key = frozenset(nodes)
+    greatest_quorums = cache['greatest_quorums']
+    if key in greatest_quorums:
+        greatest_quorums.move_to_end(key)
+        return set(greatest_quorums[key])
+    return set(put_cached(greatest_quorums, key, frozenset(
+        greatest_quorum(is_slice_contained, set(nodes), set())), cache['max_size']))
+
+def get_cached_disjoint_quorums(fbas: Tuple[Callable[[Nodes, Node], bool], Nodes],
+                                quorum: Nodes, cache: IntactnessCache
+                                ) -> Optional[Tuple[Nodes, Nodes]]:
+    """Return two disjoint quorums of F^{V\\Q} (or None if it has quorum intersection)"""
+    key = frozenset(quorum)
+    results = cache['quorum_intersection']
+    if key in results:
+        results.move_to_end(key)
+        return results[key]
+    # determine whether F^{V\Q} has quorum intersection:
+    result = quorum_intersection(get_restricted_fbas(fbas, quorum))
+    return put_cached(results, key, None if result is True else (result[1], result[2]),
+                      cache['max_size'])
+
 def get_intact_nodes(fbas: Tuple[Callable[[Nodes, Node], bool], Nodes],
-                     b_nodes: Nodes):
+                     b_nodes: Nodes, cache: Optional[IntactnessCache] = None,
+                     upper_bound: Optional[Nodes] = None):
     """
     Takes an FBAS F (having quorum intersection) with set of nodes V and B ⊆ V and
     returns the set of all B-intact nodes.
+
+    Greatest quorums and quorum intersection results are shared via the cache (if given).
+    The search starts from upper_bound ⊆ V\\B (if given) which has to contain all
+    B-intact nodes.
     """
     is_slice_contained, all_nodes = fbas
-    current = all_nodes.difference(b_nodes)
+    if cache is None:
+        cache = get_intactness_cache()
+    current = all_nodes.difference(b_nodes) if upper_bound is None else upper_bound
     while True:
-        greatest_q = greatest_quorum(is_slice_contained, current, cast(Nodes, set()))
+        if instrumentation.ACTIVE_REPORT is not None:
+            instrumentation.count('get_intact_nodes.iterations')
+        greatest_q = get_cached_greatest_quorum(is_slice_contained, current, cache)
 
-        # define F^{V\Q}
-        deleted_nodes = all_nodes.difference(greatest_q)
-        def cur_is_slice_contained(candidate, node):
-            if node in deleted_nodes:
-                raise ValueError('node not defined in FBAS')
-            return is_slice_contained(candidate.union(deleted_nodes), node)
-        cur_fbas = (cur_is_slice_contained, greatest_q)
-
-        # determine whether F^{V\Q} has quorum intersection:
-        result = quorum_intersection(cur_fbas)
-
-        if result is True:
+        disjoint_quorums = get_cached_disjoint_quorums(fbas, greatest_q, cache)
+        if disjoint_quorums is None:
             return greatest_q
 
-        _, quorum1, quorum2 = result
-        current_w1 = greatest_quorum(is_slice_contained, greatest_q.difference(quorum1),
-                                     set())
-        current_w2 = greatest_quorum(is_slice_contained, greatest_q.difference(quorum2),
-                                     set())
+        quorum1, quorum2 = disjoint_quorums
+        current_w1 = get_cached_greatest_quorum(is_slice_contained,
+                                                greatest_q.difference(quorum1), cache)
+        current_w2 = get_cached_greatest_quorum(is_slice_contained,
+                                                greatest_q.difference(quorum2), cache)
 
         if current_w1 == set():
             current = current_w2
@@ -42,3 +95,58 @@ def get_intact_nodes(fbas: Tuple[Callable[[Nodes, Node], bool], Nodes],
             current = current_w1
         else:
             current = current_w1.intersection(current_w2)
+
+def get_bounded_intact_nodes(fbas: Tuple[Callable[[Nodes, Node], bool], Nodes],
+                             b_nodes: FrozenSet, cache: IntactnessCache,
+                             get_smaller_intact_nodes: Optional[
+                                 Callable[[Node], Optional[FrozenSet]]] = None
+                             ) -> FrozenSet:
+    """get_intact_nodes() with bounds from the results for the sets B\\{v}
+
+    The results are looked up in the cache unless get_smaller_intact_nodes(v) is given."""
+    _, all_nodes = fbas
+    if get_smaller_intact_nodes is None:
+        intact_nodes_by_b = cache['intact_nodes']
+
+        def get_smaller_intact_nodes(node: Node) -> Optional[FrozenSet]:
+            return intact_nodes_by_b.get(b_nodes.difference({node}))
+    upper_bound = all_nodes.difference(b_nodes)
+    for node in b_nodes:
+        smaller_intact_nodes = get_smaller_intact_nodes(node)
+        if smaller_intact_nodes is None:
+            continue
+        # intactness is monotone: B-intact nodes are (B\{v})-intact. If v is not
+        # (B\{v})-intact, then the (B\{v})-intact nodes are also B-intact.
+        if node not in smaller_intact_nodes:
+            return smaller_intact_nodes
+        upper_bound = upper_bound.intersection(smaller_intact_nodes)
+        if upper_bound == set():
+            return frozenset()
+    return frozenset(get_intact_nodes(fbas, set(b_nodes), cache, upper_bound))
+
+def get_intact_nodes_batch(fbas: Tuple[Callable[[Nodes, Node], bool], Nodes],
+                           b_nodes_family: Iterable[Nodes],
+                           cache: Optional[IntactnessCache] = None) -> List[Nodes]:
+    """get_intact_nodes() for many sets B (results are returned in the given order)
+
+    If F has quorum intersection, the sets are processed from smallest to largest so
+    that the results for the sets B\\{v} bound the search for B."""
+    _, all_nodes = fbas
+    if cache is None:
+        cache = get_intactness_cache()
+    b_nodes_list = [frozenset(b_nodes) for b_nodes in b_nodes_family]
+    intact_nodes_by_b = cache['intact_nodes']
+    # results of this batch (the cache may evict them)
+    results: Dict[FrozenSet, FrozenSet] = {}
+    # the bounds rely on intact sets being closed under union
+    is_bounded = get_cached_disjoint_quorums(fbas, all_nodes, cache) is None
+    for b_nodes in sorted(set(b_nodes_list), key=len):
+        if b_nodes in intact_nodes_by_b:
+            intact_nodes_by_b.move_to_end(b_nodes)
+            results[b_nodes] = intact_nodes_by_b[b_nodes]
+            continue
+        results[b_nodes] = put_cached(
+            intact_nodes_by_b, b_nodes, get_bounded_intact_nodes(fbas, b_nodes, cache)
+            if is_bounded else frozenset(get_intact_nodes(fbas, set(b_nodes), cache)),
+            cache['max_size'])
+    return [set(results[b_nodes]) for b_nodes in b_nodes_list]
@@ -1,8 +1,9 @@
 """Tests for Torstens's intactNode Algorithm"""
 from stellarobservatory.dsets_test import NODES, SLICES_BY_NODE
-from .intactness import get_intact_nodes
+from .intactness import get_intact_nodes, get_intact_nodes_batch, get_intactness_cache
 from .quorums import contains_slice
 from .centralities_test import NODES, SLICES_BY_NODE
+from .utils.sets import powerset
 
 
 def test_get_intact_nodes():
@@ -34,3 +35,20 @@ def test_get_intact_nodes_complex():
     assert get_intact_nodes((is_slice_contained, NODES), {5}) == {1, 2, 3, 4}
     assert get_intact_nodes((is_slice_contained, NODES), {2, 3}) == {1, 4, 5}
     assert get_intact_nodes((is_slice_contained, NODES), {4, 5}) == {1, 2, 3}
+
+def test_get_intact_nodes_batch():
+    """Test get_intact_nodes_batch() against get_intact_nodes()"""
+    def is_slice_contained(nodes_subset, node) -> bool:
+        return contains_slice(nodes_subset, SLICES_BY_NODE, node)
+
+    fbas = (is_slice_contained, NODES)
+    # unordered and with duplicates
+    b_nodes_family = list(reversed(powerset(NODES))) + [{2, 3}, {1}]
+    assert get_intact_nodes_batch(fbas, b_nodes_family) == \
+        [get_intact_nodes(fbas, set(b_nodes)) for b_nodes in b_nodes_family]
+    # a small cache evicts results but gives the same answers
+    cache = get_intactness_cache(max_size=2)
+    assert get_intact_nodes_batch(fbas, b_nodes_family, cache) == \
+        get_intact_nodes_batch(fbas, b_nodes_family)
+    assert all(len(cache[name]) <= 2
+               for name in ('greatest_quorums', 'quorum_intersection', 'intact_nodes'))
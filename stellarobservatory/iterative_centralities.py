@@ -0,0 +1,185 @@
+"""Iterative centralities that can be warm-started with the centralities of a previous
+snapshot
+
+Eigenvector centralities are computed with power iteration and linear system
+centralities with CG (symmetric matrices, falling back to GMRES) or GMRES instead of
+dense solvers. The
+previous centralities (by node) are the starting vector: nodes that are new in the
+snapshot start with the mean of the previous centralities."""
+# pylint: disable=invalid-name
+import inspect
+import warnings
+from typing import Callable, Dict, List, Optional, Set, TypedDict
+
+import numpy
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import connected_components
+from scipy.sparse.linalg import cg, gmres
+
+from . import instrumentation
+from .centralities import get_hierarchical_intactness_matrix, get_intactness_matrix, \
+    get_minimal_intactness_matrix, get_quorums
+from .quorum_slice_definition import Definitions, get_trust_graph
+from .utils.graph import get_adjacency_matrix, Node
+from .utils.hypergraph import get_hypergraph_incidence_matrix
+
+IterativeCentralities = TypedDict('IterativeCentralities', {
+    # normalized to a maximum of 1 (like the dense centralities)
+    'centralities': numpy.ndarray,
+    'iterations': int,
+    # relative residual of the eigenvalue problem or linear system
+    'residual': float
+})
+
+DEFAULT_TOLERANCE = 1e-10
+DEFAULT_MAX_ITERATIONS = 10000
+
+INTACTNESS_MATRICES: Dict[str, Callable] = {
+    'intactness': get_intactness_matrix,
+    'hierarchical_intactness': get_hierarchical_intactness_matrix,
+    'minimal_intactness': get_minimal_intactness_matrix
+}
+
+def get_initial_vector(nodes: List[Node], previous: Optional[Dict[Node, float]]
+                       ) -> Optional[numpy.ndarray]:
+    """Align previous centralities by node with nodes (None without previous centralities)
+
+    Nodes without a previous centrality start with the mean of the previous ones."""
+    if not previous:
+        return None
+    default = float(numpy.mean(list(previous.values())))
+    return numpy.array([previous.get(node, default) for node in nodes], dtype=float)
+
+def has_cycle(M: numpy.ndarray) -> bool:
+    """Check whether the graph of a matrix has a cycle (for a non-negative matrix, iff the
+    spectral radius is positive)"""
+    if numpy.any(numpy.diag(M) != 0):
+        return True
+    n_components, _ = connected_components(csr_matrix(M != 0), directed=True,
+                                           connection='strong')
+    return n_components < M.shape[0]
+
+def get_power_iteration_centralities(M: numpy.ndarray, initial: Optional[numpy.ndarray] = None,
+                                     shift: float = 0.0,
+                                     tolerance: float = DEFAULT_TOLERANCE,
+                                     max_iterations: int = DEFAULT_MAX_ITERATIONS
+                                     ) -> IterativeCentralities:
+    """Compute eigenvector centralities of a non-negative matrix with power iteration
+
+    Iterating with M + shift * I (same eigenvectors) avoids oscillations if M is
+    periodic, e.g., the adjacency matrix of a bipartite graph. Raises ValueError if the
+    dominant eigenvalue is 0 (M is nilpotent, e.g., the adjacency matrix of a DAG) and
+    warns if the iteration does not converge within max_iterations."""
+    # pylint: disable=too-many-arguments,too-many-positional-arguments
+    if not has_cycle(M):
+        raise ValueError('Dominant eigenvalue is 0 (acyclic matrix): '
+                         'eigenvector centralities are undefined')
+    x = numpy.ones(M.shape[0]) if initial is None or not numpy.any(initial > 0) \
+        else numpy.abs(initial)
+    x = x / numpy.linalg.norm(x)
+    residual = numpy.inf
+    iterations = 0
+    with instrumentation.record_time('centralities.power_iteration'):
+        while iterations < max_iterations:
+            y = M.dot(x)
+            eigenvalue = x.dot(y)
+            residual = numpy.linalg.norm(y - eigenvalue * x) / max(abs(eigenvalue), 1e-300)
+            if residual <= tolerance:
+                break
+            y += shift * x
+            x = y / numpy.linalg.norm(y)
+            iterations += 1
+    if residual > tolerance:
+        warnings.warn(f'Power iteration did not converge within {max_iterations} iterations '
+                      f'(residual {residual:.2e})', RuntimeWarning, stacklevel=2)
+    if instrumentation.ACTIVE_REPORT is not None:
+        instrumentation.count('centralities.iterations', iterations)
+    centralities = numpy.abs(x)
+    return {'centralities': centralities / numpy.max(centralities), 'iterations': iterations,
+            'residual': float(residual)}
+
+def get_tolerance_arguments(solver: Callable, tolerance: float) -> Dict[str, float]:
+    """Tolerance arguments of a scipy Krylov solver (rtol was called tol before scipy 1.12)"""
+    name = 'rtol' if 'rtol' in inspect.signature(solver).parameters else 'tol'
+    return {name: tolerance, 'atol': 0.0}
+
+def get_krylov_ls_centralities(M: numpy.ndarray, get_mu: Callable[[numpy.ndarray], float],
+                               initial: Optional[numpy.ndarray] = None,
+                               tolerance: float = DEFAULT_TOLERANCE,
+                               max_iterations: int = DEFAULT_MAX_ITERATIONS
+                               ) -> IterativeCentralities:
+    """Compute linear system centralities (I - mu M) x = 1 with CG (if M is symmetric)
+    or GMRES
+
+    The initial vector is rescaled to best fit the right-hand side since previous
+    centralities are normalized. CG requires I - mu M to be positive definite, i.e.,
+    mu < 1 / spectral radius of M, so GMRES takes over if CG fails. Warns if the
+    solver does not converge within max_iterations."""
+    # pylint: disable=too-many-arguments,too-many-positional-arguments
+    A = numpy.eye(M.shape[0]) - get_mu(M) * M
+    b = numpy.ones(M.shape[0])
+    x0 = None
+    if initial is not None:
+        A_initial = A.dot(initial)
+        if A_initial.dot(A_initial) > 0:
+            x0 = initial * A_initial.dot(b) / A_initial.dot(A_initial)
+    counter = {'iterations': 0}
+
+    def count_iteration(_):
+        counter['iterations'] += 1
+
+    with instrumentation.record_time('centralities.linear_solver'):
+        info = 1
+        if numpy.allclose(M, M.T):
+            # CG divides by zero if it breaks down on an indefinite matrix
+            with numpy.errstate(divide='ignore', invalid='ignore'):
+                x, info = cg(A, b, x0=x0, maxiter=max_iterations, callback=count_iteration,
+                             **get_tolerance_arguments(cg, tolerance))
+            if not numpy.all(numpy.isfinite(x)):
+                info = 1
+        if info != 0:
+            x, info = gmres(A, b, x0=x0, maxiter=max_iterations, callback=count_iteration,
+                            callback_type='pr_norm',
+                            **get_tolerance_arguments(gmres, tolerance))
+    if info != 0:
+        warnings.warn(f'Linear solver did not converge within {max_iterations} iterations',
+                      RuntimeWarning, stacklevel=2)
+    if instrumentation.ACTIVE_REPORT is not None:
+        instrumentation.count('centralities.iterations', counter['iterations'])
+    residual = numpy.linalg.norm(b - A.dot(x)) / numpy.linalg.norm(b)
+    return {'centralities': x / numpy.max(x), 'iterations': counter['iterations'],
+            'residual': float(residual)}
+
+def get_iterative_eigenvector_centralities(nodes: List[Node], definitions: Definitions,
+                                           previous: Optional[Dict[Node, float]] = None
+                                           ) -> IterativeCentralities:
+    """get_eigenvector_centralities() with power iteration (warm-started with previous)"""
+    adjacency_matrix = get_adjacency_matrix(nodes, get_trust_graph(definitions))
+    # left eigenvector as in get_eigenvector_centralities()
+    return get_power_iteration_centralities(adjacency_matrix.T,
+                                            get_initial_vector(nodes, previous), shift=1.0)
+
+def get_iterative_quorum_eigenvector_centralities(nodes: List[Node], definitions: Definitions,
+                                                  previous: Optional[Dict[Node, float]] = None,
+                                                  processes: int = 1
+                                                  ) -> IterativeCentralities:
+    """get_quorum_eigenvector_centralities() with power iteration (warm-started with
+    previous)"""
+    incidence_matrix: numpy.ndarray = get_hypergraph_incidence_matrix(
+        nodes, get_quorums(nodes, definitions, processes))
+    return get_power_iteration_centralities(incidence_matrix.dot(incidence_matrix.T),
+                                            get_initial_vector(nodes, previous))
+
+def get_iterative_intactness_ls_centralities(
+        nodes: List[Node], definitions: Definitions,
+        get_ill_behaved_weight: Callable[[Set[Node]], float],
+        get_mu: Callable[[numpy.ndarray], float],
+        previous: Optional[Dict[Node, float]] = None,
+        kind: str = 'intactness'
+        ) -> IterativeCentralities:
+    """get_intactness_ls_centralities() (or the hierarchical_intactness or
+    minimal_intactness kind) with CG/GMRES (warm-started with previous)"""
+    # pylint: disable=too-many-arguments,too-many-positional-arguments
+    with instrumentation.record_time('centralities.intactness_sweep'):
+        M = INTACTNESS_MATRICES[kind](nodes, definitions, get_ill_behaved_weight)
+    return get_krylov_ls_centralities(M, get_mu, get_initial_vector(nodes, previous))
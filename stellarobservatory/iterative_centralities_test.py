@@ -0,0 +1,81 @@
+"""Tests for iterative centralities"""
+import numpy
+import pytest
+from numpy.testing import assert_allclose
+
+from .centralities import get_eigenvector_centralities, get_intactness_ls_centralities, \
+    get_matrix_eigenvector_centralities, get_matrix_ls_centralities, \
+    get_quorum_eigenvector_centralities
+from .centralities_test import DEFINITIONS, NODES_LIST, get_ill_behaved_weight, get_mu
+from .generators import get_random_fbas
+from .iterative_centralities import get_initial_vector, get_iterative_eigenvector_centralities, \
+    get_iterative_intactness_ls_centralities, get_iterative_quorum_eigenvector_centralities, \
+    get_krylov_ls_centralities, get_power_iteration_centralities
+from .stellarbeat import convert_stellarbeat_to_observatory
+
+def test_iterative_centralities():
+    """Test the iterative centralities against the dense ones"""
+    result = get_iterative_eigenvector_centralities(NODES_LIST, DEFINITIONS)
+    assert result['residual'] <= 1e-10
+    assert_allclose(result['centralities'],
+                    get_eigenvector_centralities(NODES_LIST, DEFINITIONS), rtol=1e-8)
+    assert_allclose(get_iterative_quorum_eigenvector_centralities(
+        NODES_LIST, DEFINITIONS)['centralities'],
+                    get_quorum_eigenvector_centralities(NODES_LIST, DEFINITIONS), rtol=1e-8)
+    for kind in ('hierarchical_intactness', 'minimal_intactness', 'intactness'):
+        result = get_iterative_intactness_ls_centralities(
+            NODES_LIST, DEFINITIONS, get_ill_behaved_weight, get_mu, kind=kind)
+        assert result['residual'] <= 1e-10
+    assert_allclose(result['centralities'], get_intactness_ls_centralities(
+        NODES_LIST, DEFINITIONS, get_ill_behaved_weight, get_mu), rtol=1e-8)
+
+def test_non_symmetric_matrices():
+    """Test power iteration on a periodic matrix and GMRES on a non-symmetric one"""
+    # directed cycle with a chord: eig() and the shifted power iteration agree
+    matrix = numpy.array([[0., 1., 0.], [0., 0., 1.], [1., 1., 0.]])
+    result = get_power_iteration_centralities(matrix, shift=1.0)
+    assert result['residual'] <= 1e-10
+    assert_allclose(result['centralities'], get_matrix_eigenvector_centralities(matrix), rtol=1e-8)
+    assert_allclose(get_krylov_ls_centralities(matrix, get_mu)['centralities'],
+                    get_matrix_ls_centralities(matrix, get_mu), rtol=1e-8)
+
+def test_solver_failures():
+    """Test acyclic matrices, CG breakdowns and non-convergence"""
+    # nilpotent adjacency matrix of a path
+    matrix = numpy.array([[0., 1., 0.], [0., 0., 1.], [0., 0., 0.]])
+    with pytest.raises(ValueError):
+        get_power_iteration_centralities(matrix, shift=1.0)
+    matrix = numpy.array([[0., 1., 0.], [0., 0., 1.], [1., 1., 0.]])
+    with pytest.warns(RuntimeWarning):
+        result = get_power_iteration_centralities(matrix, shift=1.0, max_iterations=2)
+    assert result['iterations'] == 2
+    # I - 3/4 M is indefinite and 1^T (I - 3/4 M) 1 = 0, so CG breaks down at once
+    matrix = numpy.array([[0., 1., 0.], [1., 0., 1.], [0., 1., 0.]])
+    result = get_krylov_ls_centralities(matrix, lambda M: 0.75)
+    assert result['residual'] <= 1e-10
+    assert_allclose(result['centralities'],
+                    get_matrix_ls_centralities(matrix, lambda M: 0.75), rtol=1e-8)
+
+def test_warm_start():
+    """Test warm starts with the centralities of a previous snapshot"""
+    node_set, definitions, _ = convert_stellarbeat_to_observatory(get_random_fbas(12, 3))
+    nodes = sorted(node_set)
+    cold = get_iterative_eigenvector_centralities(nodes, definitions)
+    # slightly different centralities
+    previous = {node: value * (1 + 1e-6 * (-1)**index)
+                for index, (node, value) in enumerate(zip(nodes, cold['centralities']))}
+    warm = get_iterative_eigenvector_centralities(nodes, definitions, previous)
+    assert warm['iterations'] < cold['iterations']
+    assert_allclose(warm['centralities'], cold['centralities'], rtol=1e-8)
+
+    # new nodes
+    del previous[nodes[0]], previous[nodes[1]]
+    assert_allclose(get_initial_vector(nodes, previous)[:2],
+                    numpy.mean(list(previous.values())))
+    assert_allclose(get_iterative_eigenvector_centralities(nodes, definitions, previous)[
+        'centralities'], cold['centralities'], rtol=1e-8)
+
+    matrix = numpy.array([[0., 1., 0.], [0., 0., 1.], [1., 1., 0.]])
+    cold = get_krylov_ls_centralities(matrix, get_mu)
+    warm = get_krylov_ls_centralities(matrix, get_mu, cold['centralities'] * (1 + 1e-9))
+    assert warm['iterations'] < cold['iterations']
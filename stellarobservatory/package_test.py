@@ -0,0 +1,29 @@
+"""Tests for lazy package imports"""
+import subprocess
+import sys
+import pytest
+import stellarobservatory
+
+def get_imported_modules(statement: str):
+    """Return the modules imported by a fresh interpreter after running the statement"""
+    output = subprocess.run(
+        [sys.executable, '-c', statement + '; import sys; print(" ".join(sys.modules))'],
+        check=True, capture_output=True, text=True).stdout
+    return set(output.split())
+
+def test_lazy_imports():
+    """Test that light-weight modules do not import heavy dependencies"""
+    modules = get_imported_modules(
+        'import stellarobservatory; from stellarobservatory.quorums import greatest_quorum; '
+        'stellarobservatory.quorum_intersection.quorum_intersection')
+    assert 'stellarobservatory.quorum_intersection' in modules
+    assert 'stellarobservatory.centralities' not in modules
+    for dependency in ('numpy', 'scipy', 'requests'):
+        assert dependency not in modules
+
+def test_lazy_attributes():
+    """Test attribute access on the lazily importing packages"""
+    assert stellarobservatory.utils.graph.get_dependencies({1: {2}, 2: set()}, 1) == {2}
+    assert 'intactness' in dir(stellarobservatory)
+    with pytest.raises(AttributeError):
+        stellarobservatory.unknown # pylint: disable=pointless-statement
@@ -0,0 +1,86 @@
+"""Quorum intersection as pairwise intersection of minimal quorums
+
+An FBAS enjoys quorum intersection iff every two minimal quorums intersect. The
+minimal quorums are packed into a bit matrix (one row of 64-bit words per quorum) and
+the pairs are tested blockwise with vectorized ANDs. Quorums are grouped by a node
+they all contain (most frequent nodes first), so pairs within a group are skipped."""
+from typing import Callable, List, Optional, Tuple
+
+import numpy
+
+from . import instrumentation
+from .quorum_intersection import enumerate_minimal_quorums
+from .utils.graph import Node, Nodes
+
+BLOCK_SIZE = 1024
+
+def pack_quorums(nodes: List[Node], quorums: List[Nodes]) -> numpy.ndarray:
+    """Return the quorums as (number of quorums) x (number of words) matrix of uint64 words"""
+    node_bits = {node: 1 << index for index, node in enumerate(nodes)}
+    masks = [sum(node_bits[node] for node in quorum) for quorum in quorums]
+    n_words = max(1, (len(nodes) + 63) // 64)
+    packed = numpy.zeros((len(quorums), n_words), dtype=numpy.uint64)
+    for word in range(n_words):
+        packed[:, word] = numpy.fromiter(((mask >> (64 * word)) & 0xFFFFFFFFFFFFFFFF
+                                          for mask in masks), dtype=numpy.uint64,
+                                         count=len(masks))
+    return packed
+
+def get_quorum_groups(packed: numpy.ndarray) -> List[numpy.ndarray]:
+    """Partition the rows into groups that share a node (greedily by frequency)"""
+    bits = numpy.unpackbits(packed.astype('<u8').view(numpy.uint8), axis=1,
+                            bitorder='little').astype(bool)
+    remaining = numpy.arange(packed.shape[0])
+    groups = []
+    while remaining.size:
+        node = int(numpy.argmax(bits[remaining].sum(axis=0)))
+        in_group = bits[remaining, node]
+        if not in_group.any():
+            # only empty rows are left (which are no minimal quorums)
+            in_group[0] = True
+        groups.append(remaining[in_group])
+        remaining = remaining[~in_group]
+    return groups
+
+def find_disjoint_block_pair(packed: numpy.ndarray, rows1: numpy.ndarray, rows2: numpy.ndarray
+                             ) -> Optional[Tuple[int, int]]:
+    """Return the first pair of disjoint rows (rows1 x rows2) or None"""
+    for start1 in range(0, rows1.size, BLOCK_SIZE):
+        block1 = packed[rows1[start1:start1 + BLOCK_SIZE]]
+        for start2 in range(0, rows2.size, BLOCK_SIZE):
+            block2 = packed[rows2[start2:start2 + BLOCK_SIZE]]
+            intersecting = numpy.zeros((block1.shape[0], block2.shape[0]), dtype=bool)
+            for word in range(packed.shape[1]):
+                intersecting |= (block1[:, word, None] & block2[None, :, word]) != 0
+            if not intersecting.all():
+                index1, index2 = numpy.argwhere(~intersecting)[0]
+                return int(rows1[start1 + index1]), int(rows2[start2 + index2])
+    return None
+
+def find_disjoint_pair(packed: numpy.ndarray) -> Optional[Tuple[int, int]]:
+    """Return the indexes of two disjoint rows of a packed matrix (or None)"""
+    groups = get_quorum_groups(packed)
+    for index, group1 in enumerate(groups):
+        for group2 in groups[index + 1:]:
+            if instrumentation.ACTIVE_REPORT is not None:
+                instrumentation.count('pairwise_intersection.pairs', group1.size * group2.size)
+            pair = find_disjoint_block_pair(packed, group1, group2)
+            if pair is not None:
+                return pair
+    return None
+
+def find_disjoint_minimal_quorums(min_quorums: List[Nodes]) -> Optional[Tuple[Nodes, Nodes]]:
+    """Return two disjoint quorums of a list of (minimal) quorums or None"""
+    nodes = list(set().union(*min_quorums))
+    pair = find_disjoint_pair(pack_quorums(nodes, min_quorums))
+    if pair is None:
+        return None
+    return min_quorums[pair[0]], min_quorums[pair[1]]
+
+def quorum_intersection_pairwise(fbas: Tuple[Callable[[Nodes, Node], bool], Nodes]):
+    """Return True iff the FBAS has quorum intersection and (False, quorum1, quorum2)
+    with two disjoint (minimal) quorums otherwise (like quorum_intersection())"""
+    disjoint_quorums = find_disjoint_minimal_quorums(list(enumerate_minimal_quorums(fbas)))
+    if disjoint_quorums is None:
+        return True
+    return (False,) + disjoint_quorums
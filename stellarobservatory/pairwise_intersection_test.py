@@ -0,0 +1,41 @@
+"""Tests for quorum intersection via pairwise intersection of minimal quorums"""
+import random
+
+from . import pairwise_intersection
+from .pairwise_intersection import find_disjoint_minimal_quorums, quorum_intersection_pairwise
+from .quorum_intersection import is_quorum, quorum_intersection
+from .quorum_intersection_sat_test import get_random_definitions
+from .quorum_slice_definition import get_is_slice_contained
+
+
+def test_quorum_intersection_pairwise():
+    """Test quorum_intersection_pairwise() against quorum_intersection()"""
+    for seed in range(200):
+        nodes, definitions = get_random_definitions(seed)
+        is_slice_contained = get_is_slice_contained(definitions)
+        result = quorum_intersection_pairwise((is_slice_contained, set(nodes)))
+        assert (result is True) == (quorum_intersection((is_slice_contained, set(nodes))) is True)
+        if result is not True:
+            _, quorum1, quorum2 = result
+            assert is_quorum(is_slice_contained, quorum1) is True
+            assert is_quorum(is_slice_contained, quorum2) is True
+            assert quorum1.intersection(quorum2) == set()
+
+
+def test_find_disjoint_minimal_quorums(monkeypatch):
+    """Test find_disjoint_minimal_quorums() with several words and blocks"""
+    monkeypatch.setattr(pairwise_intersection, 'BLOCK_SIZE', 7)
+    rng = random.Random(0)
+    for _ in range(100):
+        nodes = list(range(rng.choice([10, 100, 200])))
+        quorums = [set(rng.sample(nodes, rng.randint(1, len(nodes) // 3)))
+                   for _ in range(rng.randint(1, 40))]
+        if rng.random() < 0.5:
+            for quorum in quorums[1:]:
+                quorum.add(nodes[0])
+        disjoint_quorums = find_disjoint_minimal_quorums(quorums)
+        assert (disjoint_quorums is None) == all(
+            quorum1.intersection(quorum2)
+            for index, quorum1 in enumerate(quorums) for quorum2 in quorums[index + 1:])
+        if disjoint_quorums is not None:
+            assert disjoint_quorums[0].intersection(disjoint_quorums[1]) == set()
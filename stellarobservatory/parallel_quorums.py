@@ -0,0 +1,151 @@
+"""Parallel quorum enumeration
+
+The search tree of traverse_quorums() is split into (committed, remaining) frames that
+are traversed in a process pool. A task traverses a frame depth-first for at most
+max_frames frames and returns the quorums found so far together with its pending
+frames, which are scheduled as new tasks. So unbalanced subtrees are split up and
+idle workers pick up their frames from the shared task queue. Quorums and frames are
+passed between processes as bitmasks over the nodes.
+
+Quorums are yielded as soon as they arrive or (with ordered=True) in the order of the
+sequential traversal, independent of the number of processes and the scheduling."""
+from multiprocessing import Pool
+from queue import Queue
+from typing import Any, Dict, Iterator, List, Tuple
+
+from . import instrumentation
+from .compiled_fbas import CompiledFbas, compile_definitions, greatest_quorum_mask, \
+    mask_to_nodes
+from .quorum_slice_definition import Definitions
+from .utils.graph import Node
+
+# (committed, remaining) as bitmasks
+Frame = Tuple[int, int]
+
+# task key (the position of the task in the sequential traversal), quorums, pending frames
+TaskResult = Tuple[Tuple[int, ...], List[int], List[Frame]]
+
+DEFAULT_MAX_FRAMES = 1000
+
+# compiled FBAS of a worker process (see init_quorums_worker())
+WORKER_STATE: Dict[str, Any] = {}
+
+def expand_quorums_mask_frame(compiled: CompiledFbas, frame: Frame
+                              ) -> Tuple[int, List[Frame]]:
+    """expand_quorums_frame() on bitmasks: returns the quorum of the frame (or 0) and the
+    frames that have to be traversed next (the lowest node index is picked first)"""
+    committed, remaining = frame
+    greatest_q = greatest_quorum_mask(compiled, committed | remaining, committed)
+    if greatest_q == 0:
+        return 0, []
+    frames = []
+    current = greatest_q & ~committed
+    while current:
+        node_bit = current & -current
+        frames.append((greatest_q & ~current, current & ~node_bit))
+        current &= ~node_bit
+    return greatest_q, frames
+
+def traverse_quorum_masks(compiled: CompiledFbas, frames: List[Frame], max_frames: int
+                          ) -> Tuple[List[int], List[Frame]]:
+    """Traverse the frames depth-first for at most max_frames frames and return the quorums
+    and the pending frames (all in the order of the sequential traversal)"""
+    quorums = []
+    stack = frames[::-1]
+    n_frames = 0
+    while stack and n_frames < max_frames:
+        quorum, children = expand_quorums_mask_frame(compiled, stack.pop())
+        n_frames += 1
+        if quorum:
+            quorums.append(quorum)
+            stack.extend(reversed(children))
+    return quorums, stack[::-1]
+
+def init_quorums_worker(compiled: CompiledFbas):
+    """Set up the compiled FBAS once per worker process"""
+    WORKER_STATE['compiled'] = compiled
+
+def traverse_quorums_job(job: Tuple[Tuple[int, ...], Frame, int]) -> TaskResult:
+    """traverse_quorum_masks() in the current worker"""
+    key, frame, max_frames = job
+    quorums, frames = traverse_quorum_masks(WORKER_STATE['compiled'], [frame], max_frames)
+    return key, quorums, frames
+
+def pop_ordered_quorums(results: Dict[Tuple[int, ...], Tuple[List[int], int]],
+                        cursor: List[List[Any]]) -> List[int]:
+    """Remove the results that are next in the sequential order and return their quorums
+
+    A task's quorums precede those of its pending frames (the children of the task key).
+    The cursor is the stack of [task key, next child, number of children]."""
+    quorums: List[int] = []
+    while cursor:
+        key, child_index, n_children = cursor[-1]
+        if child_index == n_children:
+            cursor.pop()
+            continue
+        child_key = key + (child_index,)
+        if child_key not in results:
+            break
+        child_quorums, n_grandchildren = results.pop(child_key)
+        quorums.extend(child_quorums)
+        cursor[-1][1] += 1
+        cursor.append([child_key, 0, n_grandchildren])
+    return quorums
+
+def enumerate_quorum_masks_parallel(compiled: CompiledFbas, processes: int,
+                                    ordered: bool = False,
+                                    max_frames: int = DEFAULT_MAX_FRAMES) -> Iterator[int]:
+    """Enumerate all quorums of a compiled FBAS as bitmasks in a process pool"""
+    # pylint: disable=too-many-locals
+    root_frame = (0, compiled['all_mask'])
+    if processes <= 1:
+        frames = [root_frame]
+        while frames:
+            quorums, frames = traverse_quorum_masks(compiled, frames, max_frames)
+            yield from quorums
+        return
+    # the pool's result handler thread puts the results (or errors) into the queue
+    finished: 'Queue[Any]' = Queue()
+    # results of the ordered mode that wait for their predecessors
+    results: Dict[Tuple[int, ...], Tuple[List[int], int]] = {}
+    cursor: List[List[Any]] = [[(), 0, 1]]
+    with Pool(processes, initializer=init_quorums_worker, initargs=(compiled,)) as pool:
+
+        def submit(key: Tuple[int, ...], frame: Frame):
+            if instrumentation.ACTIVE_REPORT is not None:
+                instrumentation.count('parallel_quorums.tasks')
+            pool.apply_async(traverse_quorums_job, ((key, frame, max_frames),),
+                             callback=finished.put, error_callback=finished.put)
+
+        submit((0,), root_frame)
+        n_running = 1
+        while n_running:
+            result = finished.get()
+            n_running -= 1
+            if isinstance(result, BaseException):
+                raise result
+            key, quorums, frames = result
+            for index, frame in enumerate(frames):
+                submit(key + (index,), frame)
+            n_running += len(frames)
+            if ordered:
+                results[key] = (quorums, len(frames))
+                yield from pop_ordered_quorums(results, cursor)
+            else:
+                yield from quorums
+
+def enumerate_quorums_parallel(nodes: List[Node], definitions: Definitions,
+                               processes: int = 1, ordered: bool = False,
+                               encoded: bool = False,
+                               max_frames: int = DEFAULT_MAX_FRAMES) -> Iterator[Any]:
+    """Enumerate all quorums (like enumerate_quorums()) in a process pool
+
+    The quorums are yielded as sets of nodes or (with encoded=True) as bitmasks over
+    nodes. With ordered=True or processes=1, the order is that of the sequential
+    traversal with the lowest node index picked first."""
+    # pylint: disable=too-many-arguments,too-many-positional-arguments
+    compiled = compile_definitions(definitions, nodes)
+    quorums = enumerate_quorum_masks_parallel(compiled, processes, ordered, max_frames)
+    if encoded:
+        return quorums
+    return (mask_to_nodes(compiled, quorum) for quorum in quorums)
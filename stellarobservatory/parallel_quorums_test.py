@@ -0,0 +1,34 @@
+"""Tests for parallel quorum enumeration"""
+from .generators import get_random_fbas, get_tiered_fbas
+from .parallel_quorums import enumerate_quorums_parallel
+from .quorum_intersection_sat_test import get_random_definitions
+from .quorum_slice_definition import get_is_slice_contained
+from .quorums import enumerate_quorums
+from .stellarbeat import convert_stellarbeat_to_observatory
+
+def get_sorted_quorums(quorums):
+    """Return the quorums as sorted lists (in sorted order)"""
+    return sorted(sorted(quorum) for quorum in quorums)
+
+def test_enumerate_quorums_parallel_sequential():
+    """Test the sequential traversal against enumerate_quorums()"""
+    for seed in range(100):
+        nodes, definitions = get_random_definitions(seed)
+        quorums = list(enumerate_quorums_parallel(nodes, definitions))
+        assert get_sorted_quorums(quorums) == get_sorted_quorums(
+            enumerate_quorums((get_is_slice_contained(definitions), set(nodes))))
+        # splitting the traversal does not change the order
+        assert list(enumerate_quorums_parallel(nodes, definitions, max_frames=2)) == quorums
+
+def test_enumerate_quorums_parallel():
+    """Test the parallel traversal (with small tasks) against the sequential one"""
+    for stellarbeat_nodes in (get_tiered_fbas(3, 3), get_random_fbas(10, 1)):
+        node_set, definitions, _ = convert_stellarbeat_to_observatory(stellarbeat_nodes)
+        nodes = sorted(node_set)
+        quorums = list(enumerate_quorums_parallel(nodes, definitions))
+        assert list(enumerate_quorums_parallel(nodes, definitions, processes=2, ordered=True,
+                                               max_frames=3)) == quorums
+        unordered_quorums = list(enumerate_quorums_parallel(nodes, definitions, processes=2,
+                                                            encoded=True, max_frames=3))
+        assert sorted(unordered_quorums) == sorted(
+            sum(1 << nodes.index(node) for node in quorum) for quorum in quorums)
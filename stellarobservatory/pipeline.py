@@ -0,0 +1,273 @@
+"""Batch analysis of archived stellarbeat snapshots
+
+    python -m stellarobservatory.pipeline SNAPSHOT_DIR OUTPUT [--analyses ...]
+        [--format jsonl|parquet] [--processes N] [--max-tasks-per-child N] [--retry-errors]
+
+Every JSON file (a list of stellarbeat nodes) in SNAPSHOT_DIR (recursively) is analyzed
+in a process pool and one row per snapshot and analysis is appended to OUTPUT as soon
+as the snapshot is done. Rows hold the snapshot path, the hash of its content, the
+analysis, the run time and the result (or the error). Snapshots whose content hash
+already has a row for an analysis in OUTPUT are skipped, so interrupted runs can be
+resumed and identical snapshots are analyzed once. With --retry-errors, rows with an
+error (e.g., a MemoryError) do not count, so the latest row of a snapshot and analysis
+is the current one. Worker processes are replaced after
+--max-tasks-per-child snapshots to bound their memory. The parquet format requires the
+optional pyarrow package.
+"""
+import argparse
+import hashlib
+import json
+import os
+import time
+from contextlib import contextmanager
+from functools import partial
+from multiprocessing import Pool
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple, TypedDict
+
+from .compiled_fbas import compile_definitions
+from .dsets import enumerate_dsets
+from .quorum_intersection_sat import check_quorum_intersection
+from .quorum_slice_definition import Definitions, get_is_slice_contained, restrict_definition
+from .stellarbeat import convert_stellarbeat_to_observatory
+from .what_if import analyze_failures
+
+Row = TypedDict('Row', {
+    # pylint: disable=unsubscriptable-object
+    'snapshot': str,
+    'hash': str,
+    'analysis': str,
+    'seconds': float,
+    'result': Any,
+    'error': Optional[str]
+})
+
+# (snapshot path relative to the snapshot directory, hash, analyses)
+Task = Tuple[str, str, List[str]]
+
+def get_quorum_intersection(nodes: List[str], definitions: Definitions) -> Dict[str, Any]:
+    """Quorum intersection and two disjoint quorums (if any)"""
+    result = check_quorum_intersection(nodes, definitions)
+    if result is True:
+        return {'quorum_intersection': True}
+    _, quorum1, quorum2 = result
+    return {'quorum_intersection': False, 'disjoint_quorums': [sorted(quorum1), sorted(quorum2)]}
+
+def get_minimal_dsets(nodes: List[str], definitions: Definitions) -> List[List[str]]:
+    """Minimal dsets (see enumerate_dsets())"""
+    fbas = (get_is_slice_contained(definitions), set(nodes))
+    return sorted(sorted(dset) for dset in enumerate_dsets(fbas, mode='minimal'))
+
+def get_befouled_nodes(nodes: List[str], definitions: Definitions) -> Dict[str, List[str]]:
+    """The nodes that are not intact if a single node fails (by failing node)"""
+    results = analyze_failures(compile_definitions(definitions, nodes),
+                               [{node} for node in nodes])
+    return {node: sorted(set(nodes).difference(result['intact_nodes']))
+            for node, result in zip(nodes, results)}
+
+def get_centralities(nodes: List[str], definitions: Definitions, kind: str
+                     ) -> Dict[str, float]:
+    """Centralities of a kind (e.g., get_eigenvector_centralities()) by node"""
+    # centralities pulls in numpy and scipy
+    from . import centralities # pylint: disable=import-outside-toplevel
+    values = getattr(centralities, f'get_{kind}_centralities')(nodes, definitions)
+    return {node: float(value) for node, value in zip(nodes, values)}
+
+ANALYSES: Dict[str, Callable[[List[str], Definitions], Any]] = {
+    'quorum_intersection': get_quorum_intersection,
+    'minimal_dsets': get_minimal_dsets,
+    'befouled_nodes': get_befouled_nodes,
+    'eigenvector_centralities': partial(get_centralities, kind='eigenvector'),
+    'subgraph_centralities': partial(get_centralities, kind='subgraph')
+}
+
+def get_content_hash(path: str) -> str:
+    """Return the SHA-256 hash of a file's content"""
+    content_hash = hashlib.sha256()
+    with open(path, 'rb') as snapshot_file:
+        for chunk in iter(lambda: snapshot_file.read(1 << 20), b''):
+            content_hash.update(chunk)
+    return content_hash.hexdigest()
+
+def list_snapshots(directory: str) -> List[str]:
+    """Return the paths of all JSON files in a directory (recursively, relative and sorted)"""
+    return sorted(
+        os.path.relpath(os.path.join(path, file_name), directory)
+        for path, _, file_names in os.walk(directory)
+        for file_name in file_names if file_name.endswith('.json'))
+
+def load_snapshot(path: str) -> Tuple[List[str], Definitions]:
+    """Load a snapshot and return its sorted validators and their definitions
+    (restricted to the validators of the snapshot)"""
+    with open(path, encoding='utf-8') as snapshot_file:
+        stellarbeat_nodes = [node for node in json.load(snapshot_file)
+                             if node.get('isValidator', True) and 'quorumSet' in node]
+    node_set, definitions, _ = convert_stellarbeat_to_observatory(stellarbeat_nodes)
+    return sorted(node_set), {node: restrict_definition(definition, node_set)
+                              for node, definition in definitions.items()}
+
+def analyze_snapshot(directory: str, task: Task) -> List[Row]:
+    """Run the analyses of a task (errors are reported in the rows)"""
+    snapshot, content_hash, analyses = task
+    rows: List[Row] = []
+    try:
+        nodes, definitions = load_snapshot(os.path.join(directory, snapshot))
+    except (OSError, ValueError, KeyError, TypeError) as error:
+        return [{'snapshot': snapshot, 'hash': content_hash, 'analysis': analysis,
+                 'seconds': 0.0, 'result': None, 'error': f'invalid snapshot: {error!r}'}
+                for analysis in analyses]
+    for analysis in analyses:
+        start = time.perf_counter()
+        result, error_message = None, None
+        try:
+            result = ANALYSES[analysis](nodes, definitions)
+        except Exception as error: # pylint: disable=broad-except
+            error_message = repr(error)
+        rows.append({'snapshot': snapshot, 'hash': content_hash, 'analysis': analysis,
+                     'seconds': time.perf_counter() - start, 'result': result,
+                     'error': error_message})
+    return rows
+
+def analyze_snapshot_job(job: Tuple[str, Task]) -> List[Row]:
+    """analyze_snapshot() for Pool.imap_unordered()"""
+    return analyze_snapshot(*job)
+
+def read_processed(output: str, output_format: str, retry_errors: bool = False
+                   ) -> Set[Tuple[str, str]]:
+    """Return the (hash, analysis) pairs that already have a row in the output
+    (only rows without error if retry_errors is set)"""
+    if not os.path.exists(output):
+        return set()
+    if output_format == 'parquet':
+        # pylint: disable=import-outside-toplevel,import-error
+        import pyarrow.parquet
+        table = pyarrow.parquet.read_table(output, columns=['hash', 'analysis', 'error'])
+        return {(content_hash, analysis) for content_hash, analysis, error in zip(
+            table.column('hash').to_pylist(), table.column('analysis').to_pylist(),
+            table.column('error').to_pylist()) if not (retry_errors and error is not None)}
+    processed: Set[Tuple[str, str]] = set()
+    with open(output, encoding='utf-8') as output_file:
+        for line in output_file:
+            try:
+                row = json.loads(line)
+            except ValueError:
+                # e.g., the last line of an interrupted run
+                continue
+            if not (retry_errors and row['error'] is not None):
+                processed.add((row['hash'], row['analysis']))
+    return processed
+
+def get_tasks(directory: str, analyses: List[str], processed: Set[Tuple[str, str]]
+              ) -> List[Task]:
+    """Return the snapshots with missing analyses (once per content hash)"""
+    tasks: List[Task] = []
+    seen: Set[str] = set()
+    for snapshot in list_snapshots(directory):
+        content_hash = get_content_hash(os.path.join(directory, snapshot))
+        missing = [analysis for analysis in analyses
+                   if (content_hash, analysis) not in processed]
+        if missing and content_hash not in seen:
+            tasks.append((snapshot, content_hash, missing))
+        seen.add(content_hash)
+    return tasks
+
+@contextmanager
+def open_jsonl_writer(output: str) -> Iterator[Callable[[List[Row]], None]]:
+    """Yield a function that appends rows to a JSON Lines file"""
+    with open(output, 'a+', encoding='utf-8') as output_file:
+        # complete the last line of an interrupted run
+        if output_file.tell() > 0:
+            output_file.seek(output_file.tell() - 1)
+            if output_file.read(1) != '\n':
+                output_file.write('\n')
+
+        def write(rows: List[Row]):
+            for row in rows:
+                output_file.write(json.dumps(row, sort_keys=True) + '\n')
+            output_file.flush()
+        yield write
+
+@contextmanager
+def open_parquet_writer(output: str) -> Iterator[Callable[[List[Row]], None]]:
+    """Yield a function that appends rows (with JSON encoded results) as row groups
+    to a parquet file
+
+    The existing rows and the new ones are written to a temporary file that replaces
+    the output once it is closed (also if the run is interrupted), so the output is
+    never left without its footer."""
+    # pylint: disable=import-outside-toplevel,import-error
+    import pyarrow
+    import pyarrow.parquet
+    schema = pyarrow.schema([('snapshot', pyarrow.string()), ('hash', pyarrow.string()),
+                             ('analysis', pyarrow.string()), ('seconds', pyarrow.float64()),
+                             ('result', pyarrow.string()), ('error', pyarrow.string())])
+    existing = pyarrow.parquet.read_table(output, schema=schema) \
+        if os.path.exists(output) else None
+    temporary_output = output + '.tmp'
+    writer = pyarrow.parquet.ParquetWriter(temporary_output, schema)
+    try:
+        if existing is not None:
+            writer.write_table(existing)
+    except BaseException:
+        writer.close()
+        os.remove(temporary_output)
+        raise
+
+    def write(rows: List[Row]):
+        writer.write_table(pyarrow.Table.from_pylist(
+            [{**row, 'result': json.dumps(row['result'], sort_keys=True)} for row in rows],
+            schema=schema))
+
+    try:
+        yield write
+    finally:
+        writer.close()
+        os.replace(temporary_output, output)
+
+def run_pipeline(directory: str, output: str, analyses: List[str],
+                 output_format: str = 'jsonl', processes: int = 1,
+                 max_tasks_per_child: Optional[int] = 10, retry_errors: bool = False) -> int:
+    """Analyze all snapshots with missing analyses and return the number of written rows
+
+    With retry_errors, analyses with an error in the output are run again."""
+    # pylint: disable=too-many-arguments,too-many-positional-arguments,too-many-locals
+    unknown_analyses = set(analyses).difference(ANALYSES)
+    if unknown_analyses:
+        raise ValueError(f'unknown analyses {sorted(unknown_analyses)}')
+    if output_format not in ('jsonl', 'parquet'):
+        raise ValueError(f'unknown format {output_format}')
+    tasks = get_tasks(directory, analyses, read_processed(output, output_format, retry_errors))
+    jobs = [(directory, task) for task in tasks]
+    n_rows = 0
+    open_writer = open_parquet_writer if output_format == 'parquet' else open_jsonl_writer
+    with open_writer(output) as write:
+        if processes > 1:
+            with Pool(processes, maxtasksperchild=max_tasks_per_child) as pool:
+                for rows in pool.imap_unordered(analyze_snapshot_job, jobs):
+                    write(rows)
+                    n_rows += len(rows)
+        else:
+            for job in jobs:
+                rows = analyze_snapshot_job(job)
+                write(rows)
+                n_rows += len(rows)
+    return n_rows
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('snapshot_dir')
+    parser.add_argument('output')
+    parser.add_argument('--analyses', nargs='+', default=list(ANALYSES), choices=list(ANALYSES))
+    parser.add_argument('--format', default='jsonl', choices=['jsonl', 'parquet'])
+    parser.add_argument('--processes', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--max-tasks-per-child', type=int, default=10)
+    parser.add_argument('--retry-errors', action='store_true',
+                        help='run analyses again that failed in a previous run')
+    args = parser.parse_args()
+    n_rows = run_pipeline(args.snapshot_dir, args.output, args.analyses, args.format,
+                          args.processes, args.max_tasks_per_child, args.retry_errors)
+    print(f'Wrote {n_rows} rows to {args.output}')
+
+if __name__ == '__main__':
+    main()
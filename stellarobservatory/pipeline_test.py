@@ -0,0 +1,108 @@
+"""Tests for the batch analysis pipeline"""
+import json
+
+import pytest
+
+from .generators import get_broken_intersection_fbas, get_tiered_fbas
+from . import pipeline
+from .pipeline import run_pipeline
+
+def write_snapshots(directory):
+    """Write two distinct snapshots, a copy and an invalid one"""
+    (directory / '2020').mkdir()
+    for path, snapshot in (('2020/a.json', get_tiered_fbas(3, 2)),
+                           ('2020/b.json', get_broken_intersection_fbas(3, 2)),
+                           ('c.json', get_tiered_fbas(3, 2))):
+        (directory / path).write_text(json.dumps(snapshot))
+    (directory / 'invalid.json').write_text('[{"publicKey": "A"')
+
+def read_rows(output):
+    """Return the rows of a JSON Lines file"""
+    with open(output, encoding='utf-8') as output_file:
+        return [json.loads(line) for line in output_file]
+
+@pytest.mark.parametrize('processes', [1, 2])
+def test_run_pipeline(tmp_path, processes):
+    """Test run_pipeline() with JSON Lines output"""
+    directory = tmp_path / 'snapshots'
+    directory.mkdir()
+    write_snapshots(directory)
+    output = str(tmp_path / 'results.jsonl')
+    assert run_pipeline(str(directory), output, ['quorum_intersection'],
+                        processes=processes) == 3
+    rows = {row['snapshot']: row for row in read_rows(output)}
+    assert set(rows) == {'2020/a.json', '2020/b.json', 'invalid.json'}
+    assert rows['2020/a.json']['result'] == {'quorum_intersection': True}
+    assert rows['2020/b.json']['result']['quorum_intersection'] is False
+    assert rows['invalid.json']['error'].startswith('invalid snapshot')
+
+    # only missing analyses are run
+    assert run_pipeline(str(directory), output, ['quorum_intersection'],
+                        processes=processes) == 0
+    assert run_pipeline(str(directory), output,
+                        ['quorum_intersection', 'befouled_nodes', 'eigenvector_centralities'],
+                        processes=processes) == 6
+    rows = read_rows(output)
+    assert len(rows) == 9
+    befouled_nodes = [row['result'] for row in rows
+                      if row['snapshot'] == '2020/a.json' and row['analysis'] == 'befouled_nodes']
+    # every organization is required and fails with any of its two validators
+    nodes = ['O0V0', 'O0V1', 'O1V0', 'O1V1', 'O2V0', 'O2V1']
+    assert befouled_nodes == [{node: nodes for node in nodes}]
+
+def test_run_pipeline_parquet(tmp_path):
+    """Test run_pipeline() with parquet output"""
+    parquet = pytest.importorskip('pyarrow.parquet')
+    directory = tmp_path / 'snapshots'
+    directory.mkdir()
+    write_snapshots(directory)
+    output = str(tmp_path / 'results.parquet')
+    assert run_pipeline(str(directory), output, ['quorum_intersection'], 'parquet') == 3
+    assert run_pipeline(str(directory), output, ['minimal_dsets'], 'parquet') == 3
+    assert run_pipeline(str(directory), output, ['minimal_dsets'], 'parquet') == 0
+    assert parquet.read_table(output).num_rows == 6
+
+def test_run_pipeline_retry_errors(tmp_path, monkeypatch):
+    """Test that failed analyses are only run again with retry_errors"""
+    directory = tmp_path / 'snapshots'
+    directory.mkdir()
+    write_snapshots(directory)
+    output = str(tmp_path / 'results.jsonl')
+
+    def get_failing_analysis(nodes, _):
+        raise MemoryError(len(nodes))
+
+    monkeypatch.setitem(pipeline.ANALYSES, 'quorum_intersection', get_failing_analysis)
+    assert run_pipeline(str(directory), output, ['quorum_intersection']) == 3
+    monkeypatch.undo()
+    assert run_pipeline(str(directory), output, ['quorum_intersection']) == 0
+    # the invalid snapshot fails again
+    assert run_pipeline(str(directory), output, ['quorum_intersection'],
+                        retry_errors=True) == 3
+    assert run_pipeline(str(directory), output, ['quorum_intersection'],
+                        retry_errors=True) == 1
+    rows = read_rows(output)
+    assert [row['result'] and row['result']['quorum_intersection'] for row in rows
+            if row['snapshot'] == '2020/b.json'] == [None, False]
+    assert len(rows) == 7
+
+def test_run_pipeline_parquet_resumable(tmp_path, monkeypatch):
+    """Test that the parquet output stays complete while a run is in progress (e.g., if
+    it is killed)"""
+    parquet = pytest.importorskip('pyarrow.parquet')
+    directory = tmp_path / 'snapshots'
+    directory.mkdir()
+    write_snapshots(directory)
+    output = str(tmp_path / 'results.parquet')
+    assert run_pipeline(str(directory), output, ['quorum_intersection'], 'parquet') == 3
+    analyze_snapshot_job = pipeline.analyze_snapshot_job
+    n_rows_during_run = []
+
+    def job_with_check(job):
+        n_rows_during_run.append(parquet.read_table(output).num_rows)
+        return analyze_snapshot_job(job)
+
+    monkeypatch.setattr(pipeline, 'analyze_snapshot_job', job_with_check)
+    assert run_pipeline(str(directory), output, ['minimal_dsets'], 'parquet') == 3
+    assert n_rows_during_run == [3, 3, 3]
+    assert parquet.read_table(output).num_rows == 6
@@ -1,68 +1,309 @@
 """Torstens's quorum intersection checker (a Lachowski variant)"""
-from typing import Callable, Set, Type, Tuple
+import heapq
+import random
+import time
+from typing import Any, Callable, Iterator, List, Optional, Tuple
 
-from stellarobservatory.quorums import greatest_quorum
+from stellarobservatory import instrumentation
+from stellarobservatory.compiled_fbas import CompiledDefinition, CompiledFbas, \
+    get_compiled_fbas, nodes_to_mask, popcount
+from stellarobservatory.quorums import GreatestQuorumCache, count_greatest_quorum_cache, \
+    get_greatest_quorum_cache, greatest_quorum, memoized_greatest_quorum
+from stellarobservatory.utils.graph import Node, Nodes
 
 
-def quorum_intersection(fbas: Tuple[Callable[[Set[Type], Type], bool], Set[Type]]):
+def quorum_intersection(fbas: Tuple[Callable[[Nodes, Node], bool], Nodes],
+                        cache: Optional[GreatestQuorumCache] = None,
+                        precheck_budget: Optional[float] = None,
+                        precheck_seed: Optional[int] = None):
     """Takes an FBAS with set of nodes V and returns True iff F has quorum intersection.
-    It prints two disjoint quorums otherwise."""
+    It prints two disjoint quorums otherwise.
+
+    Greatest quorums are memoized in the cache (a new one per search by default).
+    If precheck_budget is given, find_disjoint_quorums_randomized() searches for
+    two disjoint quorums for up to precheck_budget seconds before the exact check."""
     is_slice_contained, all_nodes = fbas
     len_all_nodes = len(all_nodes)
-    for quorum in traverse_min_quorums(is_slice_contained, set(), all_nodes, len_all_nodes):
-        greatest_q = greatest_quorum(is_slice_contained,
-                                     all_nodes.difference(quorum), set())
+    if cache is None:
+        cache = get_greatest_quorum_cache(all_nodes)
+    if precheck_budget is not None:
+        disjoint_quorums = find_disjoint_quorums_randomized(fbas, precheck_budget,
+                                                            precheck_seed, cache)
+        if disjoint_quorums is not None:
+            count_greatest_quorum_cache(cache)
+            return (False,) + disjoint_quorums
+    for quorum in traverse_min_quorums(is_slice_contained, set(), all_nodes, len_all_nodes,
+                                       cache=cache):
+        greatest_q = get_greatest_quorum(is_slice_contained,
+                                         all_nodes.difference(quorum), set(), cache)
         if greatest_q != set():
+            count_greatest_quorum_cache(cache)
             return False, quorum, greatest_q
+    count_greatest_quorum_cache(cache)
     return True
 
 
-def contains_proper_sub_quorum(is_slice_contained: Callable[[Set[Type], Type], bool],
-                               subset_nodes: set):
+def find_disjoint_quorums_randomized(fbas: Tuple[Callable[[Nodes, Node], bool], Nodes],
+                                    budget: float, seed: Optional[int] = None,
+                                    cache: Optional[GreatestQuorumCache] = None
+                                    ) -> Optional[Tuple[Nodes, Nodes]]:
+    """Search for two disjoint quorums for up to budget seconds (None if none were found)
+
+    Each sample shrinks the greatest quorum to a minimal quorum by removing the nodes
+    in a random order (as long as a quorum remains) and then checks whether the
+    complement of the minimal quorum contains a quorum."""
+    is_slice_contained, all_nodes = fbas
+    rng = random.Random(seed)
+    deadline = time.monotonic() + budget
+    nodes = list(all_nodes)
+    greatest_q = get_greatest_quorum(is_slice_contained, all_nodes, set(), cache)
+    if greatest_q == set():
+        return None
+    while time.monotonic() < deadline:
+        if instrumentation.ACTIVE_REPORT is not None:
+            instrumentation.count('quorum_intersection.precheck_samples')
+        rng.shuffle(nodes)
+        quorum = greatest_q
+        for node in nodes:
+            if node in quorum:
+                smaller_quorum = get_greatest_quorum(is_slice_contained,
+                                                     quorum.difference({node}), set(), cache)
+                if smaller_quorum != set():
+                    quorum = smaller_quorum
+            if time.monotonic() >= deadline:
+                return None
+        disjoint_quorum = get_greatest_quorum(is_slice_contained,
+                                              all_nodes.difference(quorum), set(), cache)
+        if disjoint_quorum != set():
+            return quorum, disjoint_quorum
+    return None
+
+
+def enumerate_minimal_quorums(fbas: Tuple[Callable[[Nodes, Node], bool], Nodes],
+                              cache: Optional[GreatestQuorumCache] = None):
+    """Enumerate all minimal quorums of FBAS F
+    (given by the pair (function(set<T>, T) -> bool, set))."""
+    is_slice_contained, all_nodes = fbas
+    if cache is None:
+        cache = get_greatest_quorum_cache(all_nodes)
+    # lift the |U| <= |V|/2 bound of the quorum intersection check
+    return traverse_min_quorums(is_slice_contained, set(), all_nodes, 2 * len(all_nodes),
+                                cache=cache)
+
+
+def get_minimal_quorum_size_histogram(fbas: Tuple[Callable[[Nodes, Node], bool], Nodes],
+                                      cache: Optional[GreatestQuorumCache] = None
+                                      ) -> List[int]:
+    """Return the number of minimal quorums of FBAS F by size (the list index)
+    without materializing them (the search of enumerate_minimal_quorums())"""
+    is_slice_contained, all_nodes = fbas
+    if cache is None:
+        cache = get_greatest_quorum_cache(all_nodes)
+    histogram = [0] * (len(all_nodes) + 1)
+    stack: List[Tuple[Nodes, Nodes]] = [(set(), set(all_nodes))]
+    while stack:
+        committed, remaining = stack.pop()
+        min_quorum, frames = expand_min_quorums_frame(is_slice_contained, committed, remaining,
+                                                      2 * len(all_nodes), cache)
+        if min_quorum is not None:
+            histogram[len(min_quorum)] += 1
+        stack.extend(frames)
+    count_greatest_quorum_cache(cache)
+    return histogram
+
+
+def count_minimal_quorums(fbas: Tuple[Callable[[Nodes, Node], bool], Nodes],
+                          cache: Optional[GreatestQuorumCache] = None) -> int:
+    """Return the number of minimal quorums of FBAS F"""
+    return sum(get_minimal_quorum_size_histogram(fbas, cache))
+
+
+# compiled definition with the union of its nodes and whether its nodes and children
+# are disjoint (see get_bound_definition())
+BoundDefinition = Tuple[int, int, Tuple[Any, ...], int, bool]
+
+
+def get_bound_definition(definition: CompiledDefinition) -> BoundDefinition:
+    """Return the compiled definition with the data for get_min_additional_nodes()"""
+    threshold, nodes_mask, children_definitions = definition
+    bound_children = tuple(get_bound_definition(children_definition)
+                           for children_definition in children_definitions)
+    support = nodes_mask
+    disjoint = True
+    for _, _, _, children_support, _ in bound_children:
+        disjoint = disjoint and support & children_support == 0
+        support |= children_support
+    return threshold, nodes_mask, bound_children, support, disjoint
+
+
+def get_min_additional_nodes(definition: BoundDefinition, committed: int, perimeter: int,
+                             infeasible: int) -> int:
+    """Lower bound for the number of nodes in perimeter but not in committed that a
+    candidate needs to satisfy the definition (infeasible if it cannot be satisfied)"""
+    threshold, nodes_mask, children_definitions, _, disjoint = definition
+    missing = threshold - popcount(nodes_mask & committed)
+    if missing <= 0:
+        return 0
+    costs = [1] * min(missing, popcount(nodes_mask & perimeter & ~committed))
+    costs += [get_min_additional_nodes(children_definition, committed, perimeter, infeasible)
+              for children_definition in children_definitions]
+    costs = sorted(cost for cost in costs if cost < infeasible)
+    if len(costs) < missing:
+        return infeasible
+    # overlapping children may share nodes, but no union is smaller than its largest part
+    return sum(costs[:missing]) if disjoint else costs[missing - 1]
+
+
+def get_min_quorum_size_bound(compiled: CompiledFbas, definitions: List[BoundDefinition],
+                              committed: Nodes, remaining: Nodes) -> int:
+    """Lower bound for the size of the quorums Q with U ⊆ Q ⊆ U∪R
+    (len(all nodes) + 1 if there is no such quorum)"""
+    infeasible = len(compiled['nodes']) + 1
+    committed_mask = nodes_to_mask(compiled, committed)
+    perimeter = committed_mask | nodes_to_mask(compiled, remaining)
+    node_to_index = compiled['node_to_index']
+    if committed:
+        return min(infeasible, len(committed) + max(
+            get_min_additional_nodes(definitions[node_to_index[node]], committed_mask,
+                                     perimeter, infeasible)
+            for node in committed))
+    # some node v of R is in Q
+    return min([infeasible] + [
+        1 + get_min_additional_nodes(definitions[node_to_index[node]],
+                                     1 << node_to_index[node], perimeter, infeasible)
+        for node in remaining])
+
+
+def enumerate_smallest_minimal_quorums(compiled: CompiledFbas, k: Optional[int] = None,
+                                       cache: Optional[GreatestQuorumCache] = None
+                                       ) -> Iterator[Nodes]:
+    """Enumerate the (k smallest) minimal quorums of a compiled FBAS by non-decreasing size
+
+    Best-first variant of enumerate_minimal_quorums(): the frames of the search are
+    expanded in the order of a lower bound for the size of their quorums (derived
+    from the definition thresholds, see get_min_quorum_size_bound()). A minimal
+    quorum is yielded as soon as no pending frame can contain a smaller one."""
+    # pylint: disable=too-many-locals
+    is_slice_contained, all_nodes = get_compiled_fbas(compiled)
+    if cache is None:
+        cache = get_greatest_quorum_cache(all_nodes)
+    definitions = [get_bound_definition(definition) for definition in compiled['definitions']]
+    infeasible = len(all_nodes) + 1
+    # (lower bound, -|committed|, tie breaker, committed, remaining, is minimal quorum),
+    # frames with equal bounds are expanded depth-first
+    heap: List[Tuple[int, int, int, Nodes, Nodes, bool]] = [
+        (0, 0, 0, set(), set(all_nodes), False)]
+    counter = 1
+    found = 0
+    while heap and (k is None or found < k):
+        bound, _, _, committed, remaining, is_min_quorum = heapq.heappop(heap)
+        if is_min_quorum:
+            found += 1
+            yield committed
+            continue
+        if instrumentation.ACTIVE_REPORT is not None:
+            instrumentation.count('enumerate_smallest_minimal_quorums.expanded')
+        min_quorum, frames = expand_min_quorums_frame(is_slice_contained, committed, remaining,
+                                                      2 * len(all_nodes), cache)
+        if min_quorum is not None:
+            heapq.heappush(heap, (len(min_quorum), -len(min_quorum) - 1, counter, min_quorum,
+                                  set(), True))
+            counter += 1
+        for frame_committed, frame_remaining in frames:
+            frame_bound = get_min_quorum_size_bound(compiled, definitions, frame_committed,
+                                                    frame_remaining)
+            if frame_bound < infeasible:
+                heapq.heappush(heap, (max(bound, frame_bound), -len(frame_committed), counter,
+                                      frame_committed, frame_remaining, False))
+                counter += 1
+    count_greatest_quorum_cache(cache)
+
+
+def get_minimum_quorum_size(compiled: CompiledFbas) -> Optional[int]:
+    """Return the size of the smallest quorum of a compiled FBAS (None if there is none)"""
+    for quorum in enumerate_smallest_minimal_quorums(compiled, 1):
+        return len(quorum)
+    return None
+
+
+def get_greatest_quorum(is_slice_contained: Callable[[Nodes, Node], bool],
+                        nodes: Nodes, lower_bound: Nodes,
+                        cache: Optional[GreatestQuorumCache]) -> Nodes:
+    """greatest_quorum() (memoized if a cache is given)"""
+    if cache is None:
+        return greatest_quorum(is_slice_contained, nodes, lower_bound)
+    return memoized_greatest_quorum(is_slice_contained, nodes, lower_bound, cache)
+
+
+def contains_proper_sub_quorum(is_slice_contained: Callable[[Nodes, Node], bool],
+                               subset_nodes: set,
+                               cache: Optional[GreatestQuorumCache] = None):
     """Takes an FBAS with set of nodes V; and a subset U of V and
     returns whether there is a quorum Q not fully contained U"""
     for node in subset_nodes:
-        if greatest_quorum(is_slice_contained,
-                           subset_nodes.difference({node}), set()) != set():
+        if get_greatest_quorum(is_slice_contained,
+                               subset_nodes.difference({node}), set(), cache) != set():
             return True
     return False
 
 
-def traverse_min_quorums(is_slice_contained: Callable[[Set[Type], Type], bool],
-                         committed: set,  # U
-                         remaining: set,  # R
-                         len_all_nodes: int):  # |V|
-    """Enumerate all min quorums Q with U ⊆ Q ⊆ U∪R and |Q|≤|V|/2"""
+def expand_min_quorums_frame(is_slice_contained: Callable[[Nodes, Node], bool],
+                             committed: set,  # U
+                             remaining: set,  # R
+                             len_all_nodes: int,  # |V|
+                             cache: Optional[GreatestQuorumCache] = None):
+    """One step of traverse_min_quorums(): returns the min quorum of the frame (or None)
+    and the frames (committed, remaining) that have to be traversed next"""
     if len(committed) > len_all_nodes / 2:  # if |U|>|V|/2 return
-        return
-    greatest_q = greatest_quorum(is_slice_contained, committed, set())
+        if instrumentation.ACTIVE_REPORT is not None:
+            instrumentation.count('traverse_min_quorums.pruned')
+        return None, []
+    greatest_q = get_greatest_quorum(is_slice_contained, committed, set(), cache)
     if greatest_q != set():
         if committed == greatest_q and not contains_proper_sub_quorum(is_slice_contained,
-                                                                      committed):
-            yield committed
-    else:
-        perimeter = committed.union(remaining)
-        if remaining != set() and committed.issubset(greatest_quorum(is_slice_contained,
+                                                                      committed, cache):
+            return committed, []
+        return None, []
+    perimeter = committed.union(remaining)
+    if remaining != set() and committed.issubset(get_greatest_quorum(is_slice_contained,
                                                                      perimeter,
-                                                                     remaining)):
-            # v ← pick from R:
-            # (note pylint complains:
-            # Do not raise StopIteration in generator, use return statement instead
-            # but this can't happen as current != set())
-            # pylint: disable=R1708
-            node = next(iter(remaining))
-            remaining_without_v = remaining.difference({node})
-            yield from traverse_min_quorums(is_slice_contained,
-                                            committed,
-                                            remaining_without_v,
-                                            len_all_nodes)
-            yield from traverse_min_quorums(is_slice_contained,
-                                            committed.union({node}),
-                                            remaining_without_v,
-                                            len_all_nodes)
-
-
-def is_quorum(is_slice_contained: Callable[[Set[Type], Type], bool], nodes_subset: set):
+                                                                     committed,
+                                                                     cache)):
+        # v ← pick from R:
+        node = next(iter(remaining))
+        remaining_without_v = remaining.difference({node})
+        return None, [(committed, remaining_without_v),
+                      (committed.union({node}), remaining_without_v)]
+    if instrumentation.ACTIVE_REPORT is not None:
+        instrumentation.count('traverse_min_quorums.pruned')
+    return None, []
+
+
+def traverse_min_quorums(is_slice_contained: Callable[[Nodes, Node], bool],
+                         committed: set,  # U
+                         remaining: set,  # R
+                         len_all_nodes: int,  # |V|
+                         depth: int = 0,
+                         cache: Optional[GreatestQuorumCache] = None):
+    """Enumerate all min quorums Q with U ⊆ Q ⊆ U∪R and |Q|≤|V|/2"""
+    # pylint: disable=too-many-arguments,too-many-positional-arguments
+    if instrumentation.ACTIVE_REPORT is not None:
+        instrumentation.count('traverse_min_quorums.visited')
+        instrumentation.record_max('traverse_min_quorums.depth', depth)
+    min_quorum, frames = expand_min_quorums_frame(is_slice_contained, committed, remaining,
+                                                  len_all_nodes, cache)
+    if min_quorum is not None:
+        yield min_quorum
+    for frame_committed, frame_remaining in frames:
+        yield from traverse_min_quorums(is_slice_contained,
+                                        frame_committed,
+                                        frame_remaining,
+                                        len_all_nodes,
+                                        depth + 1,
+                                        cache)
+
+
+def is_quorum(is_slice_contained: Callable[[Nodes, Node], bool], nodes_subset: set):
     """
     Check whether nodes_subset is a quorum in FBAS F (implicitly is_slice_contained method).
     """
@@ -0,0 +1,104 @@
+"""SAT-based quorum intersection checker
+
+The existence of two disjoint quorums is encoded as a CNF formula over the quorum
+slice definitions: every node has one variable per quorum and every definition
+level (shared between identical levels) one variable per quorum that implies its
+threshold (see add_at_least()). A model yields two disjoint quorums."""
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .quorum_intersection import quorum_intersection
+from .quorum_slice_definition import Definition, Definitions, get_is_slice_contained, \
+    get_trust_graph, restrict_definition, simplify_definition
+from .sat_solver import Cnf, add_at_least, add_var, get_cnf, solve_cnf, solve_cnf_with_pysat
+from .utils.graph import Node, get_induced_subgraph
+from .utils.scc import get_strongly_connected_components
+
+# size of the largest SCC from which on check_quorum_intersection() uses the SAT backend
+SAT_MIN_SCC_SIZE = 14
+
+def encode_definition(cnf: Cnf, definition: Definition, quorum_vars: Dict[Node, int],
+                      definition_vars: Dict[Tuple[int, Tuple[int, ...]], int]) -> int:
+    """Return a variable that implies that the quorum (given by the variables of its nodes)
+    satisfies the definition (definition_vars maps (threshold, literals) to variables)"""
+    lits = sorted([quorum_vars[node] for node in definition['nodes'] if node in quorum_vars]
+                  + [encode_definition(cnf, children_definition, quorum_vars, definition_vars)
+                     for children_definition in definition['children_definitions']])
+    key = (definition['threshold'], tuple(lits))
+    if key not in definition_vars:
+        definition_vars[key] = add_var(cnf)
+        add_at_least(cnf, definition_vars[key], lits, definition['threshold'])
+    return definition_vars[key]
+
+def encode_disjoint_quorums(nodes: List[Node], definitions: Definitions
+                            ) -> Tuple[Cnf, List[Dict[Node, int]]]:
+    """Return a CNF formula that is satisfiable iff the FBAS has two disjoint quorums and
+    the variables of the nodes for both quorums"""
+    cnf = get_cnf()
+    node_set = set(nodes)
+    simplified_definitions = {node: simplify_definition(restrict_definition(definitions[node],
+                                                                            node_set))
+                              for node in nodes}
+    membership = [{node: add_var(cnf) for node in nodes} for _ in range(2)]
+    for quorum_vars in membership:
+        # identical definition levels share their variable
+        definition_vars: Dict[Tuple[int, Tuple[int, ...]], int] = {}
+        for node in nodes:
+            cnf['clauses'].append([-quorum_vars[node], encode_definition(
+                cnf, simplified_definitions[node], quorum_vars, definition_vars)])
+        cnf['clauses'].append(list(quorum_vars.values()))
+    for node in nodes:
+        cnf['clauses'].append([-membership[0][node], -membership[1][node]])
+    # symmetry breaking: the first node (in the order of nodes) of both quorums is in
+    # the first quorum (prefix[i] implies that one of the first i + 1 nodes is in it)
+    prefix = 0
+    for node in nodes:
+        if prefix:
+            cnf['clauses'].append([-membership[1][node], prefix])
+        else:
+            cnf['clauses'].append([-membership[1][node]])
+        next_prefix = add_var(cnf)
+        cnf['clauses'].append([-next_prefix, membership[0][node]] + ([prefix] if prefix else []))
+        prefix = next_prefix
+    return cnf, membership
+
+def quorum_intersection_sat(nodes: List[Node], definitions: Definitions,
+                            solve: Callable[[Cnf], Optional[List[bool]]] = solve_cnf):
+    """Return True iff the FBAS has quorum intersection and (False, quorum1, quorum2)
+    with two disjoint quorums otherwise (like quorum_intersection())"""
+    cnf, membership = encode_disjoint_quorums(nodes, definitions)
+    model = solve(cnf)
+    if model is None:
+        return True
+    quorum1, quorum2 = [{node for node, var in quorum_vars.items() if model[var]}
+                        for quorum_vars in membership]
+    return False, quorum1, quorum2
+
+def get_max_scc_size(nodes: List[Node], definitions: Definitions) -> int:
+    """Return the size of the largest strongly connected component of the trust graph"""
+    trust_graph = get_induced_subgraph(get_trust_graph(definitions), set(nodes))
+    sccs, _ = get_strongly_connected_components(trust_graph)
+    return max((len(scc) for scc in sccs), default=0)
+
+def check_quorum_intersection(nodes: List[Node], definitions: Definitions,
+                              backend: str = 'auto'):
+    """Check quorum intersection (see quorum_intersection()) with one of the backends
+
+    'enumeration' (quorum_intersection()), 'pairwise' (quorum_intersection_pairwise()),
+    'sat' (quorum_intersection_sat() with the built-in solver), 'pysat' (with the optional
+    python-sat package) or 'auto' (SAT if the largest SCC has at least SAT_MIN_SCC_SIZE
+    nodes)."""
+    if backend == 'auto':
+        backend = 'sat' if get_max_scc_size(nodes, definitions) >= SAT_MIN_SCC_SIZE \
+            else 'enumeration'
+    if backend == 'enumeration':
+        return quorum_intersection((get_is_slice_contained(definitions), set(nodes)))
+    if backend == 'pairwise':
+        # pairwise_intersection pulls in numpy
+        from .pairwise_intersection import \
+            quorum_intersection_pairwise # pylint: disable=import-outside-toplevel
+        return quorum_intersection_pairwise((get_is_slice_contained(definitions), set(nodes)))
+    if backend == 'sat':
+        return quorum_intersection_sat(nodes, definitions)
+    if backend == 'pysat':
+        return quorum_intersection_sat(nodes, definitions, solve_cnf_with_pysat)
+    raise ValueError(f'unknown backend {backend}')
@@ -0,0 +1,62 @@
+"""Tests for the SAT-based quorum intersection checker"""
+import random
+
+import pytest
+
+from .quorum_intersection import is_quorum, quorum_intersection
+from .quorum_intersection_sat import check_quorum_intersection, quorum_intersection_sat
+from .quorum_slice_definition import get_is_slice_contained, quorum_slices_to_definitions
+
+
+def get_random_definitions(seed: int):
+    """Random FBAS with up to 6 nodes and up to 3 quorum slices per node"""
+    rng = random.Random(seed)
+    nodes = list(range(rng.randint(1, 6)))
+    slices_by_node = {
+        node: [set(rng.sample(nodes, rng.randint(1, len(nodes))))
+               for _ in range(rng.randint(1, 3))]
+        for node in nodes
+    }
+    return nodes, quorum_slices_to_definitions(slices_by_node)
+
+
+def test_quorum_intersection_sat():
+    """Test quorum_intersection_sat() against quorum_intersection()"""
+    for seed in range(200):
+        nodes, definitions = get_random_definitions(seed)
+        is_slice_contained = get_is_slice_contained(definitions)
+        result = quorum_intersection_sat(nodes, definitions)
+        expected_result = quorum_intersection((is_slice_contained, set(nodes)))
+        assert (result is True) == (expected_result is True)
+        if result is not True:
+            has_intersection, quorum1, quorum2 = result
+            assert has_intersection is False
+            assert quorum1 != set() and quorum2 != set()
+            assert is_quorum(is_slice_contained, quorum1) is True
+            assert is_quorum(is_slice_contained, quorum2) is True
+            assert quorum1.intersection(quorum2) == set()
+
+
+def test_check_quorum_intersection():
+    """Test check_quorum_intersection() with all backends"""
+    # disjoint quorums {1, 2} and {3, 4}
+    definitions = quorum_slices_to_definitions({
+        1: [{1, 2}, {1, 3}, {1, 4}],
+        2: [{2, 1}, {2, 3}, {2, 4}],
+        3: [{1, 3}, {2, 3}, {3, 4}],
+        4: [{1, 4}, {2, 4}, {3, 4}]
+    })
+    for backend in ['auto', 'enumeration', 'pairwise', 'sat']:
+        assert check_quorum_intersection([1, 2, 3, 4], definitions, backend)[0] is False
+    assert check_quorum_intersection([1, 2, 3], definitions, 'sat') is True
+    with pytest.raises(ValueError):
+        check_quorum_intersection([1, 2, 3, 4], definitions, 'unknown')
+
+
+def test_check_quorum_intersection_pysat():
+    """Test check_quorum_intersection() with the optional python-sat package"""
+    pytest.importorskip('pysat')
+    for seed in range(20):
+        nodes, definitions = get_random_definitions(seed)
+        assert (check_quorum_intersection(nodes, definitions, 'pysat') is True) == \
+            (check_quorum_intersection(nodes, definitions, 'enumeration') is True)
@@ -1,7 +1,14 @@
 """Test for Torstens's quorum intersection checker (Lachowski variant)"""
 
-from .quorum_intersection import quorum_intersection, is_quorum
-from .quorums import contains_slice
+from . import instrumentation
+from . import quorum_intersection as quorum_intersection_module
+from .compiled_fbas import compile_definitions, get_compiled_fbas
+from .generators import get_random_fbas, get_tiered_fbas
+from .quorum_intersection import count_minimal_quorums, enumerate_minimal_quorums, \
+    enumerate_smallest_minimal_quorums, find_disjoint_quorums_randomized, \
+    get_minimal_quorum_size_histogram, get_minimum_quorum_size, quorum_intersection, is_quorum
+from .quorums import contains_slice, get_greatest_quorum_cache
+from .stellarbeat import convert_stellarbeat_to_observatory
 
 
 def test_has_quorum_intersection_false():
@@ -94,3 +101,99 @@ def test_has_quorum_intersection_true_sccs():
         return contains_slice(nodes_subset, slices_by_node, node)
 
     assert quorum_intersection((is_slice_contained, {1, 2, 3, 4, 5})) is True
+
+
+def test_quorum_intersection_shared_cache_counters():
+    """Test that a cache shared by several searches is counted once"""
+    definitions = convert_stellarbeat_to_observatory(get_tiered_fbas(3, 3))[1]
+    fbas = get_compiled_fbas(compile_definitions(definitions))
+    cache = get_greatest_quorum_cache(fbas[1])
+    with instrumentation.profile() as report:
+        for _ in range(3):
+            assert quorum_intersection(fbas, cache=cache) is True
+    counters = report['counters']
+    assert counters['greatest_quorum_cache.hits'] == cache['hits'] > 0
+    assert counters['greatest_quorum_cache.misses'] == cache['misses'] > 0
+
+
+def test_enumerate_minimal_quorums():
+    """Test enumerate_minimal_quorums() (regression: {2, 4} was pruned)"""
+    slices_by_node = {
+        1: [{1, 2, 3, 4}],
+        2: [{2, 4}],
+        3: [{1, 2, 3}],
+        4: [{2, 4}]
+    }
+
+    def is_slice_contained(nodes_subset, node) -> bool:
+        return contains_slice(nodes_subset, slices_by_node, node)
+
+    min_quorums = list(enumerate_minimal_quorums((is_slice_contained, {1, 2, 3, 4})))
+    assert min_quorums == [{2, 4}]
+    assert get_minimal_quorum_size_histogram((is_slice_contained, {1, 2, 3, 4})) == \
+        [0, 0, 1, 0, 0]
+    assert count_minimal_quorums((is_slice_contained, {1, 2, 3, 4})) == 1
+
+
+def test_quorum_intersection_precheck(monkeypatch):
+    """Test quorum_intersection() with the randomized search for disjoint quorums"""
+    slices_by_node = {
+        1: [{1, 2}, {1, 3}, {1, 4}],
+        2: [{2, 1}, {2, 3}, {2, 4}],
+        3: [{1, 3}, {2, 3}, {3, 4}],
+        4: [{1, 4}, {2, 4}, {3, 4}]
+    }
+
+    def is_slice_contained(nodes_subset, node) -> bool:
+        return contains_slice(nodes_subset, slices_by_node, node)
+
+    fbas = (is_slice_contained, {1, 2, 3, 4})
+    quorum1, quorum2 = find_disjoint_quorums_randomized(fbas, 1.0, seed=0)
+    assert is_quorum(is_slice_contained, quorum1) is True
+    assert is_quorum(is_slice_contained, quorum2) is True
+    assert quorum1.intersection(quorum2) == set()
+
+    # the exact check is not needed if the pre-check finds a witness
+    def no_traverse_min_quorums(*_args, **_kwargs):
+        raise AssertionError('exact check after successful pre-check')
+    monkeypatch.setattr(quorum_intersection_module, 'traverse_min_quorums',
+                        no_traverse_min_quorums)
+    has_intersection, quorum1, quorum2 = quorum_intersection(fbas, precheck_budget=1.0,
+                                                             precheck_seed=0)
+    assert has_intersection is False
+    assert quorum1.intersection(quorum2) == set()
+    monkeypatch.undo()
+
+    # the exact check runs after the pre-check gave up
+    slices_by_node = {
+        1: [{1, 2, 3}],
+        2: [{1, 2}, {2, 3}],
+        3: [{1, 3}, {2, 3}]
+    }
+    fbas = (is_slice_contained, {1, 2, 3})
+    assert find_disjoint_quorums_randomized(fbas, 0.01, seed=0) is None
+    assert quorum_intersection(fbas, precheck_budget=0.01) is True
+
+
+def test_enumerate_smallest_minimal_quorums():
+    """Test enumerate_smallest_minimal_quorums() against enumerate_minimal_quorums()"""
+    for seed in range(30):
+        nodes, definitions, _ = convert_stellarbeat_to_observatory(get_random_fbas(8, seed))
+        compiled = compile_definitions(definitions, sorted(nodes))
+        min_quorums = [frozenset(quorum)
+                       for quorum in enumerate_minimal_quorums(get_compiled_fbas(compiled))]
+        smallest_min_quorums = [frozenset(quorum)
+                                for quorum in enumerate_smallest_minimal_quorums(compiled)]
+        assert set(smallest_min_quorums) == set(min_quorums)
+        assert len(smallest_min_quorums) == len(min_quorums)
+        sizes = [len(quorum) for quorum in smallest_min_quorums]
+        assert sizes == sorted(sizes)
+        assert get_minimum_quorum_size(compiled) == (sizes[0] if sizes else None)
+
+    # 4 of 5 organizations with 2 of 3 validators each
+    nodes, definitions, _ = convert_stellarbeat_to_observatory(get_tiered_fbas(5, 3, 2))
+    compiled = compile_definitions(definitions, sorted(nodes))
+    smallest_min_quorums = list(enumerate_smallest_minimal_quorums(compiled, 3))
+    assert [len(quorum) for quorum in smallest_min_quorums] == [8, 8, 8]
+    assert all(is_quorum(get_compiled_fbas(compiled)[0], quorum)
+               for quorum in smallest_min_quorums)
@@ -1,8 +1,11 @@
 """Quorum slice definitions"""
 
+from collections import Counter
+from functools import reduce
 from itertools import chain, combinations, product
-from typing import Callable, List, TypedDict, Dict, Set, Any
+from typing import Callable, Iterable, List, Optional, Tuple, TypedDict, Dict, Set, Any
 
+from .slice_index import get_slice_index, index_contains_slice
 from .utils.graph import Node, Nodes, Graph
 
 Definition = TypedDict('Definition', {
@@ -70,6 +73,17 @@ def remove_from_definition(definition: Definition, node: Node) -> Definition:
         'children_definitions': children_definitions
     }
 
+def restrict_definition(definition: Definition, nodes: Nodes) -> Definition:
+    """Drop unknown nodes (e.g., offline validators) from a definition
+
+    This does not change which candidate sets satisfy the definition."""
+    return {
+        'threshold': definition['threshold'],
+        'nodes': definition['nodes'].intersection(nodes),
+        'children_definitions': [restrict_definition(children_definition, nodes)
+                                 for children_definition in definition['children_definitions']]
+    }
+
 def get_normalized_definition(definition: Definition, node: Node) -> Definition:
     """Returns the node's quorum slice definition as Stellar Core preprocesses it
 
@@ -80,6 +94,115 @@ def get_normalized_definition(definition: Definition, node: Node) -> Definition:
         'children_definitions': [remove_from_definition(definition, node)]
     }
 
+def get_definition_nodes(definition: Definition) -> Nodes:
+    """Return the nodes on all levels of a definition"""
+    nodes = set(definition['nodes'])
+    for children_definition in definition['children_definitions']:
+        nodes.update(get_definition_nodes(children_definition))
+    return nodes
+
+def get_definition_key(definition: Definition) -> Tuple:
+    """Return a hashable key that is equal for equal definitions (up to the order of
+    children)"""
+    return (definition['threshold'], frozenset(definition['nodes']),
+            frozenset(Counter(get_definition_key(children_definition)
+                              for children_definition in definition['children_definitions']
+                              ).items()))
+
+def get_unique_definitions(definitions: Iterable[Definition]) -> List[Definition]:
+    """Drop duplicate definitions (keeping the first occurrence)"""
+    keys = set()
+    unique_definitions = []
+    for definition in definitions:
+        key = get_definition_key(definition)
+        if key not in keys:
+            keys.add(key)
+            unique_definitions.append(definition)
+    return unique_definitions
+
+def get_definition_size(definition: Definition) -> int:
+    """Return the number of nodes and children of a definition's top level"""
+    return len(definition['nodes']) + len(definition['children_definitions'])
+
+def inline_children(threshold: int, nodes: Nodes, children_definitions: List[Definition]
+                    ) -> Tuple[int, List[Definition]]:
+    """Drop constant children (adjusting the threshold) and move the element of children
+    with a single node or child (not yet in nodes) into the parent level"""
+    remaining_children_definitions = []
+    for children_definition in children_definitions:
+        child_nodes = children_definition['nodes']
+        child_size = get_definition_size(children_definition)
+        if children_definition['threshold'] <= 0:
+            threshold -= 1
+        elif children_definition['threshold'] > child_size:
+            continue
+        elif child_size == 1 and child_nodes and not child_nodes <= nodes:
+            nodes.update(child_nodes)
+        elif child_size == 1 and not child_nodes:
+            remaining_children_definitions.extend(children_definition['children_definitions'])
+        else:
+            remaining_children_definitions.append(children_definition)
+    return threshold, remaining_children_definitions
+
+def flatten_children(is_all: bool, nodes: Nodes, children_definitions: List[Definition]
+                     ) -> List[Definition]:
+    """Move the elements of 1-of-n children of a 1-of-n definition (or of n-of-n children
+    of an n-of-n definition if is_all) into the parent level"""
+    remaining_children_definitions = []
+    for children_definition in children_definitions:
+        child_threshold = get_definition_size(children_definition) if is_all else 1
+        if children_definition['threshold'] == child_threshold:
+            nodes.update(children_definition['nodes'])
+            remaining_children_definitions.extend(children_definition['children_definitions'])
+        else:
+            remaining_children_definitions.append(children_definition)
+    return remaining_children_definitions
+
+def simplify_definition(definition: Definition) -> Definition:
+    """Return an equivalent definition (satisfied by the same candidate sets) with
+    redundant levels removed:
+
+    * children that are always satisfied (threshold 0) or never are dropped
+    * children with a single node or child (e.g., 1-of-1 wrappers) are replaced by it
+    * 1-of-n children of 1-of-n definitions and n-of-n children of n-of-n definitions
+      are flattened and duplicate children of both are dropped
+    * nodes that an n-of-n definition requires are removed from its children (e.g.,
+      the node of get_normalized_definition())
+
+    Duplicate children of other definitions are kept since each one counts."""
+    threshold = definition['threshold']
+    nodes = set(definition['nodes'])
+    children_definitions = [simplify_definition(children_definition)
+                            for children_definition in definition['children_definitions']]
+    # every change replaces children or adds nodes
+    state = None
+    while state != (threshold, len(nodes), list(map(id, children_definitions))):
+        state = (threshold, len(nodes), list(map(id, children_definitions)))
+        threshold, children_definitions = inline_children(threshold, nodes, children_definitions)
+        size = len(nodes) + len(children_definitions)
+        if threshold <= 0:
+            return {'threshold': 0, 'nodes': set(), 'children_definitions': []}
+        if threshold > size:
+            return {'threshold': 1, 'nodes': set(), 'children_definitions': []}
+        if threshold not in (1, size):
+            continue
+        is_all = threshold > 1
+        children_definitions = flatten_children(is_all, nodes, children_definitions)
+        if is_all:
+            # the required nodes are in every candidate that satisfies the definition
+            for index, children_definition in enumerate(children_definitions):
+                required_nodes = nodes.intersection(get_definition_nodes(children_definition))
+                if required_nodes:
+                    children_definitions[index] = simplify_definition(reduce(
+                        remove_from_definition, required_nodes, children_definition))
+        if len(children_definitions) > 1:
+            children_definitions = get_unique_definitions(children_definitions)
+        if is_all:
+            threshold = len(nodes) + len(children_definitions)
+    if threshold == 1 and not nodes and len(children_definitions) == 1:
+        return children_definitions[0]
+    return {'threshold': threshold, 'nodes': nodes, 'children_definitions': children_definitions}
+
 def generate_quorum_slices(definition: Definition, mode='economic') -> List[List[Node]]:
     """Generate all quorum slices for a quorum slice definition
 
@@ -118,9 +241,49 @@ def satisfies_definition(candidate: Nodes, definition: Definition):
             satisfied += 1
     return satisfied >= definition['threshold']
 
+# definitions with at least as many slices are checked with a slice index
+SLICE_INDEX_MIN_SLICES = 32
+
+def get_quorum_slices(definition: Definition) -> Optional[List[Nodes]]:
+    '''Returns the slices of a (simplified) definition that is a list of quorum slices
+    (see quorum_slices_to_definition()) or None'''
+    if not definition['children_definitions'] and \
+            definition['threshold'] == len(definition['nodes']):
+        return [definition['nodes']]
+    if definition['threshold'] != 1:
+        return None
+    quorum_slices: List[Nodes] = [{node} for node in definition['nodes']]
+    for children_definition in definition['children_definitions']:
+        if children_definition['children_definitions'] or \
+                children_definition['threshold'] != len(children_definition['nodes']):
+            return None
+        quorum_slices.append(children_definition['nodes'])
+    return quorum_slices
+
 def get_is_slice_contained(definitions_by_node: Definitions) -> Callable[[Nodes, Node], bool]:
-    '''Returns a function that checks whether a node's slice is contained in a candidate set'''
-    return lambda candidate, node: satisfies_definition(candidate, definitions_by_node[node])
+    '''Returns a function that checks whether a node's slice is contained in a candidate set
+    (the definitions are simplified first, see simplify_definition())
+
+    Nodes with lists of at least SLICE_INDEX_MIN_SLICES quorum slices are checked with
+    a slice index (see slice_index.get_slice_index()).'''
+    simplified_definitions = {node: simplify_definition(definition)
+                              for node, definition in definitions_by_node.items()}
+    slices_by_node: Dict[Any, Iterable[Iterable[Any]]] = {}
+    for node, definition in simplified_definitions.items():
+        quorum_slices = get_quorum_slices(definition)
+        if quorum_slices is not None and len(quorum_slices) >= SLICE_INDEX_MIN_SLICES:
+            slices_by_node[node] = quorum_slices
+    if not slices_by_node:
+        return lambda candidate, node: satisfies_definition(candidate,
+                                                            simplified_definitions[node])
+    index = get_slice_index(slices_by_node)
+
+    def is_slice_contained(candidate: Nodes, node: Node) -> bool:
+        if node in slices_by_node:
+            return index_contains_slice(index, candidate, node)
+        return satisfies_definition(candidate, simplified_definitions[node])
+
+    return is_slice_contained
 
 def quorum_slices_to_definition(quorum_slices: List[Nodes]) -> Definition:
     '''Returns a quorum slice definition for a list of quorum slices'''
@@ -1,10 +1,14 @@
 """Tests for quorum functions"""
+import random
+from itertools import combinations
+from typing import List
+
 import pytest
 from .utils.sets import deepfreezesets
 from .quorum_slice_definition import get_direct_dependencies, get_transitive_dependencies, \
     get_trust_graph, generate_quorum_slices, get_normalized_definition, \
-    remove_from_definition, satisfies_definition, get_is_slice_contained, \
-    quorum_slices_to_definition, Definition, Definitions
+    remove_from_definition, restrict_definition, satisfies_definition, get_is_slice_contained, \
+    quorum_slices_to_definition, simplify_definition, get_definition_key, Definition, Definitions
 
 
 DEFINITIONS_BY_NODE_ABCDE: Definitions = {
@@ -68,6 +72,14 @@ def test_removal(definition, node, expected):
     assert result == expected
 
 
+def test_restrict_definition():
+    """Test restrict_definition()"""
+    definition = {'threshold': 2, 'nodes': {'D', 'E'}, 'children_definitions': [DEFINITION]}
+    assert restrict_definition(definition, {'A', 'E'}) == {
+        'threshold': 2, 'nodes': {'E'}, 'children_definitions': [
+            {'threshold': 2, 'nodes': {'A'}, 'children_definitions': []}]}
+
+
 def test_normalization():
     """Test get_normalized_definition()"""
     normalized_definition = get_normalized_definition(DEFINITION, 'B')
@@ -126,3 +138,56 @@ def test_quorum_slices_to_definition():
             'children_definitions': set()
         }]
     }
+
+@pytest.mark.parametrize('definition,expected', [
+    # normalized 1-of-1 wrapper around an inner set
+    (get_normalized_definition({'threshold': 1, 'nodes': set(), 'children_definitions': [
+        {'threshold': 2, 'nodes': {'A', 'B', 'C'}, 'children_definitions': []}]}, 'A'),
+     {'threshold': 2, 'nodes': {'A'}, 'children_definitions': [
+         {'threshold': 1, 'nodes': {'B', 'C'}, 'children_definitions': []}]}),
+    # inner set with threshold equal to its size and a duplicate child
+    ({'threshold': 2, 'nodes': {'A'}, 'children_definitions': [
+        {'threshold': 2, 'nodes': {'A', 'B'}, 'children_definitions': []}]},
+     {'threshold': 2, 'nodes': {'A', 'B'}, 'children_definitions': []}),
+    (quorum_slices_to_definition([{'A'}, {'A'}, {'B', 'C'}]),
+     {'threshold': 1, 'nodes': {'A'}, 'children_definitions': [
+         {'threshold': 2, 'nodes': {'B', 'C'}, 'children_definitions': []}]}),
+    # each duplicate counts in a 2-of-3 definition
+    ({'threshold': 2, 'nodes': {'A'}, 'children_definitions': [DEFINITION, DEFINITION]},
+     {'threshold': 2, 'nodes': {'A'}, 'children_definitions': [DEFINITION, DEFINITION]}),
+    ({'threshold': 3, 'nodes': {'A', 'B'}, 'children_definitions': []},
+     {'threshold': 1, 'nodes': set(), 'children_definitions': []})
+])
+def test_simplify_definition(definition, expected):
+    """Test simplify_definition()"""
+    assert simplify_definition(definition) == expected
+
+def get_random_definition(rng: random.Random, nodes: List[str], depth: int) -> Definition:
+    """Random definition with duplicate children and (some) constant thresholds"""
+    children_definitions: List[Definition] = []
+    for _ in range(rng.randint(0, 3) if depth > 0 else 0):
+        children_definitions.append(children_definitions[-1]
+                                    if children_definitions and rng.random() < 0.2
+                                    else get_random_definition(rng, nodes, depth - 1))
+    definition_nodes = set(rng.sample(nodes, rng.randint(0, 3)))
+    size = len(definition_nodes) + len(children_definitions)
+    threshold = rng.randint(0, size + 1) if rng.random() < 0.2 else rng.randint(1, max(1, size))
+    return {'threshold': threshold, 'nodes': definition_nodes,
+            'children_definitions': children_definitions}
+
+def test_simplify_definition_random():
+    """Test that simplify_definition() preserves satisfaction on random definitions"""
+    rng = random.Random(0)
+    nodes = ['A', 'B', 'C', 'D', 'E']
+    candidates = [set(candidate) for size in range(len(nodes) + 1)
+                  for candidate in combinations(nodes, size)]
+    for _ in range(1000):
+        definition = get_random_definition(rng, nodes, rng.randint(0, 3))
+        if rng.random() < 0.3:
+            definition = get_normalized_definition(definition, rng.choice(nodes))
+        simplified_definition = simplify_definition(definition)
+        for candidate in candidates:
+            assert satisfies_definition(candidate, simplified_definition) == \
+                satisfies_definition(candidate, definition)
+        assert get_definition_key(simplify_definition(simplified_definition)) == \
+            get_definition_key(simplified_definition)
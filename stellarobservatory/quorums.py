@@ -1,7 +1,11 @@
 """Torstens's quorum enumeration"""
 
-from typing import Callable, Generator, Tuple, Set, cast
+from collections import OrderedDict
+from math import comb
+from typing import Any, Callable, Dict, Generator, List, Optional, Tuple, Set, TypedDict, cast
+from . import instrumentation
 from .utils.graph import Node, Nodes
+from .utils.sets import iterate_bits
 
 # Allow for defining an FBAS as a function: (set<T>, T, set<T>) -> bool.
 # This function returns True, iff the FBAS has a slice for the given node T in the given
@@ -38,6 +42,61 @@ def traverse_quorums(is_slice_contained: Callable[[Nodes, Node], bool],
         current = current.difference({node})
 
 
+def expand_quorums_frame(is_slice_contained: Callable[[Nodes, Node], bool],
+                         committed: Nodes,
+                         remaining: Nodes) -> Tuple[Optional[Nodes], List[Tuple[Nodes, Nodes]]]:
+    """Non-recursive step of traverse_quorums(): returns the quorum of the frame (or None)
+    and the frames (committed, remaining) that have to be traversed next"""
+    perimeter = committed.union(remaining)
+    greatest_q = greatest_quorum(is_slice_contained, perimeter, committed)
+    if greatest_q == set():
+        return None, []
+    frames = []
+    current = greatest_q.difference(committed)
+    while current != set():
+        node = next(iter(current))
+        frames.append((greatest_q.difference(current), current.difference({node})))
+        current = current.difference({node})
+    return greatest_q, frames
+
+
+def get_quorum_size_histogram(fbas: Tuple[Callable[[Nodes, Node], bool], Nodes]) -> List[int]:
+    """Return the number of quorums of FBAS F by size (the list index), i.e., count the
+    quorums of enumerate_quorums() without materializing them.
+
+    A subtree of traverse_quorums() is counted combinatorially if every node of its
+    greatest quorum has a slice in the committed nodes and itself, because then every
+    set between the committed nodes and the greatest quorum is a quorum."""
+    (is_slice_contained, all_nodes) = fbas
+    histogram = [0] * (len(all_nodes) + 1)
+    stack: List[Tuple[Nodes, Nodes]] = [(set(), set(all_nodes))]
+    while stack:
+        committed, remaining = stack.pop()
+        greatest_q = greatest_quorum(is_slice_contained, committed.union(remaining), committed)
+        if greatest_q == set():
+            continue
+        current = greatest_q.difference(committed)
+        if current != set() and all(is_slice_contained(committed.union({node}), node)
+                                    for node in greatest_q):
+            if instrumentation.ACTIVE_REPORT is not None:
+                instrumentation.count('get_quorum_size_histogram.counted_subtrees')
+            for size in range(len(current) + 1):
+                if len(committed) + size > 0:
+                    histogram[len(committed) + size] += comb(len(current), size)
+            continue
+        histogram[len(greatest_q)] += 1
+        while current != set():
+            node = next(iter(current))
+            stack.append((greatest_q.difference(current), current.difference({node})))
+            current = current.difference({node})
+    return histogram
+
+
+def count_quorums(fbas: Tuple[Callable[[Nodes, Node], bool], Nodes]) -> int:
+    """Return the number of quorums of FBAS F"""
+    return sum(get_quorum_size_histogram(fbas))
+
+
 def greatest_quorum(is_slice_contained: Callable[[Nodes, Node], bool],
                     nodes: Nodes,
                     lower_bound: Nodes):
@@ -45,7 +104,13 @@ def greatest_quorum(is_slice_contained: Callable[[Nodes, Node], bool],
     Return greatest quorum contained in nodes if it is a super set of lower_bound
     or empty set (if there is no such quorum).
     """
+    if instrumentation.ACTIVE_REPORT is not None:
+        instrumentation.count('greatest_quorum.calls')
+        is_slice_contained = instrumentation.get_counted('is_slice_contained.calls',
+                                                         is_slice_contained)
     while True:
+        if instrumentation.ACTIVE_REPORT is not None:
+            instrumentation.count('greatest_quorum.rounds')
         next_u: Nodes = set()
         for node in nodes:
             if is_slice_contained(nodes, node):
@@ -58,10 +123,114 @@ def greatest_quorum(is_slice_contained: Callable[[Nodes, Node], bool],
         nodes = next_u
 
 
+GreatestQuorumCache = TypedDict('GreatestQuorumCache', {
+    'nodes': List[Any],
+    'node_bits': Dict[Any, int],
+    # bitmask of nodes -> bitmask of their greatest quorum (least recently used first)
+    'results': 'OrderedDict[int, int]',
+    'max_size': int,
+    'hits': int,
+    # results derived from a cached superset
+    'derived_hits': int,
+    'misses': int,
+    'evictions': int,
+    # counters already added to the instrumentation report
+    'reported': Dict[str, int]
+})
+
+DEFAULT_GREATEST_QUORUM_CACHE_SIZE = 2**16
+
+def get_greatest_quorum_cache(all_nodes: Nodes,
+                              max_size: int = DEFAULT_GREATEST_QUORUM_CACHE_SIZE
+                              ) -> GreatestQuorumCache:
+    """Return an empty cache of greatest quorums of subsets of all_nodes (for one search)"""
+    nodes = list(all_nodes)
+    return {
+        'nodes': nodes,
+        'node_bits': {node: 1 << index for index, node in enumerate(nodes)},
+        'results': OrderedDict(),
+        'max_size': max_size,
+        'hits': 0,
+        'derived_hits': 0,
+        'misses': 0,
+        'evictions': 0,
+        'reported': {}
+    }
+
+def get_greatest_quorum_cache_statistics(cache: GreatestQuorumCache) -> Dict[str, float]:
+    """Return the hit rate and the counters of a cache"""
+    lookups = cache['hits'] + cache['derived_hits'] + cache['misses']
+    return {
+        'size': len(cache['results']),
+        'hits': cache['hits'],
+        'derived_hits': cache['derived_hits'],
+        'misses': cache['misses'],
+        'evictions': cache['evictions'],
+        'hit_rate': (cache['hits'] + cache['derived_hits']) / lookups if lookups else 0.0
+    }
+
+def count_greatest_quorum_cache(cache: GreatestQuorumCache):
+    """Add the counters of a cache to the active instrumentation report (only what
+    was counted since the last call, so a cache can be shared by several searches)"""
+    if instrumentation.ACTIVE_REPORT is not None:
+        reported = cache['reported']
+        for name in ('hits', 'derived_hits', 'misses', 'evictions'):
+            instrumentation.count('greatest_quorum_cache.' + name,
+                                  cache[name] - reported.get(name, 0))
+            reported[name] = cache[name]
+
+def memoized_greatest_quorum(is_slice_contained: Callable[[Nodes, Node], bool],
+                             nodes: Nodes,
+                             lower_bound: Nodes,
+                             cache: GreatestQuorumCache) -> Nodes:
+    """greatest_quorum() with results memoized by bitmask
+
+    The greatest quorum of nodes ⊆ S is contained in the greatest quorum of S, so
+    it is the same if it is contained in nodes and the search for it starts from
+    the intersection otherwise."""
+    node_bits, results = cache['node_bits'], cache['results']
+    all_nodes = cache['nodes']
+    mask = 0
+    for node in nodes:
+        mask |= node_bits[node]
+    result = results.get(mask)
+    if result is not None:
+        cache['hits'] += 1
+        results.move_to_end(mask)
+    else:
+        upper_bound = mask
+        for index in iterate_bits(~mask & ((1 << len(all_nodes)) - 1)):
+            superset_result = results.get(mask | 1 << index)
+            if superset_result is not None:
+                upper_bound &= superset_result
+                if superset_result == upper_bound:
+                    result = superset_result
+                    break
+        if result is not None:
+            cache['derived_hits'] += 1
+        else:
+            cache['misses'] += 1
+            greatest_q = greatest_quorum(is_slice_contained,
+                                         {all_nodes[index] for index in iterate_bits(upper_bound)},
+                                         set())
+            result = 0
+            for node in greatest_q:
+                result |= node_bits[node]
+        results[mask] = result
+        if len(results) > cache['max_size']:
+            results.popitem(last=False)
+            cache['evictions'] += 1
+    if any(node_bits[node] & mask & ~result for node in lower_bound):
+        return set()
+    return {all_nodes[index] for index in iterate_bits(result)}
+
 def contains_slice(nodes_subset: Set, slices_by_node, node):
     """Check if for the given node quorum slices there is a quorum slice
     contained in the subset of nodes.
     Input: FBAS(V,S) implicitly passed in via slices; nodes_subset ⊆ V; node ∈ V, a set D ⊆ V
-    Output: whether node has a quorum slice in the FBAS (without D) contained in nodes_subset"""
+    Output: whether node has a quorum slice in the FBAS (without D) contained in nodes_subset
+
+    The slices are scanned linearly, use slice_index.get_indexed_is_slice_contained() for
+    many slices per node."""
     return any(quorum_slice.issubset(nodes_subset)
                for quorum_slice in slices_by_node[node])
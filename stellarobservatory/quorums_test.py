@@ -1,5 +1,8 @@
 """Test for Torstens's quorum enumeration"""
-from .quorums import enumerate_quorums, contains_slice
+from .quorums import count_quorums, enumerate_quorums, contains_slice, \
+    get_greatest_quorum_cache, get_greatest_quorum_cache_statistics, \
+    get_quorum_size_histogram, greatest_quorum, memoized_greatest_quorum
+from .utils.sets import powerset
 
 
 NODES = set(range(1, 8))
@@ -64,3 +67,33 @@ def test_enumerate_quorums_stellar_core():
 
     quorums = list(enumerate_quorums((stellar_core, stellar_core_nodes)))
     assert len(quorums) == 114688
+
+
+def test_get_quorum_size_histogram():
+    """Test get_quorum_size_histogram() with simple example"""
+
+    def ex28_fbas(nodes_subset, node) -> bool:
+        return contains_slice(nodes_subset, SLICES_BY_NODE, node)
+
+    assert get_quorum_size_histogram((ex28_fbas, NODES)) == [0, 1, 0, 0, 2, 0, 0, 1]
+    assert count_quorums((ex28_fbas, NODES)) == 4
+
+
+def test_memoized_greatest_quorum():
+    """Test memoized_greatest_quorum() against greatest_quorum() with a small cache"""
+
+    def ex28_fbas(nodes_subset, node) -> bool:
+        return contains_slice(nodes_subset, SLICES_BY_NODE, node)
+
+    cache = get_greatest_quorum_cache(NODES, max_size=16)
+    # twice, to hit the cache
+    for nodes in list(reversed(powerset(NODES))) * 2:
+        for lower_bound in [set(), {1}, {7}]:
+            assert memoized_greatest_quorum(ex28_fbas, set(nodes), lower_bound, cache) == \
+                greatest_quorum(ex28_fbas, set(nodes), lower_bound)
+
+    statistics = get_greatest_quorum_cache_statistics(cache)
+    assert statistics['size'] == 16
+    assert statistics['derived_hits'] > 0
+    assert statistics['evictions'] > 0
+    assert 0 < statistics['hit_rate'] < 1
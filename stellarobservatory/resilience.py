@@ -0,0 +1,165 @@
+"""Minimal blocking sets and minimal splitting sets
+
+A set of nodes B is blocking if every quorum contains a node of B, i.e., B can halt
+the FBAS by failing. A set of nodes S is splitting if two (not necessarily
+distinct) quorums intersect only in S, i.e., S can split the FBAS by equivocating.
+Both are determined by the minimal quorums: the minimal blocking sets are the
+minimal hitting sets of the minimal quorums and the minimal splitting sets are the
+minimal intersections of two distinct minimal quorums (or the minimal quorum itself
+if it is the only one).
+"""
+from typing import Callable, Iterator, List, Optional, Set, Tuple
+
+from .quorum_intersection import enumerate_minimal_quorums
+from .utils.graph import Node, Nodes
+from .utils.sets import iterate_bits, popcount
+
+def get_minimal_sets(sets: List[int]) -> List[int]:
+    """Return the distinct sets (bitmasks) that contain no other set"""
+    minimal_sets: List[int] = []
+    for mask in sorted(set(sets), key=popcount):
+        if all(minimal_set & mask != minimal_set for minimal_set in minimal_sets):
+            minimal_sets.append(mask)
+    return minimal_sets
+
+def get_disjoint_sets_bound(sets: List[int]) -> int:
+    """Lower bound for the size of a hitting set: number of greedily picked disjoint sets"""
+    union = 0
+    count = 0
+    for mask in sets:
+        if mask & union == 0:
+            union |= mask
+            count += 1
+    return count
+
+def is_critical(hitting_set: int, sets: List[int]) -> bool:
+    """Check whether every element of the hitting set is the only one hitting some set"""
+    critical = 0
+    for mask in sets:
+        intersection = mask & hitting_set
+        if intersection & (intersection - 1) == 0:
+            critical |= intersection
+    return critical == hitting_set
+
+def traverse_hitting_sets(sets: List[int], hitting_set: int, candidates: int,
+                          uncovered: List[int], max_size: Optional[int]) -> Iterator[int]:
+    """Enumerate the minimal hitting sets H ⊇ hitting_set with H\\hitting_set ⊆ candidates
+    (MMCS algorithm of Murakami and Uno)"""
+    # pylint: disable=too-many-arguments,too-many-positional-arguments
+    if not uncovered:
+        yield hitting_set
+        return
+    if max_size is not None and \
+            popcount(hitting_set) + get_disjoint_sets_bound(uncovered) > max_size:
+        return
+    # branch on the uncovered set with the fewest candidates
+    branch = min((mask & candidates for mask in uncovered), key=popcount)
+    candidates &= ~branch
+    for index in iterate_bits(branch):
+        bit = 1 << index
+        next_hitting_set = hitting_set | bit
+        # elements without a set that only they hit remain redundant in all supersets
+        if is_critical(next_hitting_set, sets):
+            yield from traverse_hitting_sets(
+                sets, next_hitting_set, candidates,
+                [mask for mask in uncovered if mask & bit == 0], max_size)
+        candidates |= bit
+
+def enumerate_minimal_hitting_sets(sets: List[int], smallest_only: bool = False
+                                   ) -> Iterator[int]:
+    """Enumerate the minimal hitting sets of a family of sets (as bitmasks)
+
+    With smallest_only, only the hitting sets of minimum size are enumerated (by
+    iterative deepening with a disjoint-sets bound)."""
+    sets = get_minimal_sets(sets)
+    if 0 in sets:
+        return
+    all_mask = 0
+    for mask in sets:
+        all_mask |= mask
+    if not smallest_only:
+        yield from traverse_hitting_sets(sets, 0, all_mask, sets, None)
+        return
+    for max_size in range(popcount(all_mask) + 1):
+        hitting_sets = list(traverse_hitting_sets(sets, 0, all_mask, sets, max_size))
+        if hitting_sets:
+            yield from hitting_sets
+            return
+
+def enumerate_minimal_intersections(sets: List[int], smallest_only: bool = False
+                                    ) -> Iterator[int]:
+    """Enumerate the minimal intersections of two distinct sets (bitmasks) of a family,
+    or the only set of a family of one
+
+    With smallest_only, only the intersections of minimum size are enumerated. The
+    pairs are visited by non-decreasing sizes and the search stops once the bound
+    |A| + |B| - |union of all sets| on the size of A ∩ B exceeds the smallest
+    intersection found so far (or at the first empty intersection)."""
+    sets = sorted(set(sets), key=popcount)
+    if len(sets) == 1:
+        yield from sets
+        return
+    if not smallest_only:
+        yield from get_minimal_sets([mask1 & mask2
+                                     for index, mask1 in enumerate(sets)
+                                     for mask2 in sets[index + 1:]])
+        return
+    union = 0
+    for mask in sets:
+        union |= mask
+    union_size = popcount(union)
+    sizes = [popcount(mask) for mask in sets]
+    smallest_size = union_size
+    smallest_intersections: Set[int] = set()
+    for index1 in range(len(sets) - 1):
+        if sizes[index1] + sizes[index1 + 1] - union_size > smallest_size:
+            break
+        for index2 in range(index1 + 1, len(sets)):
+            if sizes[index1] + sizes[index2] - union_size > smallest_size:
+                break
+            intersection = sets[index1] & sets[index2]
+            size = popcount(intersection)
+            if size < smallest_size:
+                smallest_size = size
+                smallest_intersections = set()
+            if size == smallest_size:
+                smallest_intersections.add(intersection)
+            if size == 0:
+                yield intersection
+                return
+    yield from smallest_intersections
+
+def get_minimal_quorum_masks(fbas: Tuple[Callable[[Nodes, Node], bool], Nodes]
+                             ) -> Tuple[List[Node], List[int]]:
+    """Return a node list and the minimal quorums as bitmasks over it"""
+    _, all_nodes = fbas
+    nodes = list(all_nodes)
+    node_bits = {node: 1 << index for index, node in enumerate(nodes)}
+    masks = []
+    for quorum in enumerate_minimal_quorums(fbas):
+        mask = 0
+        for node in quorum:
+            mask |= node_bits[node]
+        masks.append(mask)
+    return nodes, masks
+
+def enumerate_minimal_blocking_sets(fbas: Tuple[Callable[[Nodes, Node], bool], Nodes],
+                                    smallest_only: bool = False) -> Iterator[Nodes]:
+    """Enumerate the minimal blocking sets of FBAS F
+    (given by the pair (function(set<T>, T) -> bool, set)).
+
+    With smallest_only, only the blocking sets of minimum size are enumerated."""
+    nodes, min_quorums = get_minimal_quorum_masks(fbas)
+    for hitting_set in enumerate_minimal_hitting_sets(min_quorums, smallest_only):
+        yield {nodes[index] for index in iterate_bits(hitting_set)}
+
+def enumerate_minimal_splitting_sets(fbas: Tuple[Callable[[Nodes, Node], bool], Nodes],
+                                     smallest_only: bool = False) -> Iterator[Nodes]:
+    """Enumerate the minimal splitting sets of FBAS F
+    (given by the pair (function(set<T>, T) -> bool, set)).
+
+    The empty set is the only minimal splitting set if F lacks quorum intersection.
+    With smallest_only, only the splitting sets of minimum size are enumerated."""
+    nodes, min_quorums = get_minimal_quorum_masks(fbas)
+    for splitting_set in enumerate_minimal_intersections(min_quorums, smallest_only):
+        yield {nodes[index] for index in iterate_bits(splitting_set)}
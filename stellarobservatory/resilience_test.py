@@ -0,0 +1,84 @@
+"""Tests for minimal blocking sets and minimal splitting sets"""
+from itertools import combinations
+from random import Random
+
+from .generators import get_broken_intersection_fbas, get_symmetric_fbas, get_tiered_fbas
+from .quorum_slice_definition import get_is_slice_contained
+from .resilience import enumerate_minimal_blocking_sets, enumerate_minimal_hitting_sets, \
+    enumerate_minimal_intersections, enumerate_minimal_splitting_sets, get_minimal_sets
+from .stellarbeat import convert_stellarbeat_to_observatory
+
+def get_fbas(stellarbeat_nodes):
+    """Return the FBAS of generated stellarbeat nodes"""
+    nodes, definitions, _ = convert_stellarbeat_to_observatory(stellarbeat_nodes)
+    return get_is_slice_contained(definitions), nodes
+
+def test_enumerate_minimal_hitting_sets():
+    """Test enumerate_minimal_hitting_sets()"""
+    sets = [0b0011, 0b0110, 0b1100, 0b0111]
+    assert sorted(enumerate_minimal_hitting_sets(sets)) == [0b0101, 0b0110, 0b1010]
+    sets = [0b0011, 0b0101, 0b1001]
+    assert sorted(enumerate_minimal_hitting_sets(sets)) == [0b0001, 0b1110]
+    assert list(enumerate_minimal_hitting_sets(sets, smallest_only=True)) == [0b0001]
+    assert list(enumerate_minimal_hitting_sets([])) == [0]
+    assert not list(enumerate_minimal_hitting_sets([0b1, 0]))
+
+class CountingMask(int):
+    """Bitmask that counts how often it is intersected"""
+    intersections = 0
+
+    def __and__(self, other):
+        CountingMask.intersections += 1
+        return int(self) & int(other)
+
+def test_enumerate_minimal_intersections():
+    """Test enumerate_minimal_intersections()"""
+    sets = [0b001111, 0b111100, 0b111011, 0b110111]
+    assert sorted(enumerate_minimal_intersections(sets)) == \
+        [0b000111, 0b001011, 0b001100, 0b110011, 0b110100, 0b111000]
+    assert list(enumerate_minimal_intersections([0b0110])) == [0b0110]
+    # after 0b001111 & 0b111100, no other pair can intersect in less than 3 of 6
+    CountingMask.intersections = 0
+    assert list(enumerate_minimal_intersections(
+        [CountingMask(mask) for mask in sets], smallest_only=True)) == [0b001100]
+    assert CountingMask.intersections == 1
+    # the first empty intersection ends the search
+    CountingMask.intersections = 0
+    sets = [0b0011, 0b1001, 0b1010, 0b0100]
+    assert list(enumerate_minimal_intersections(
+        [CountingMask(mask) for mask in sets], smallest_only=True)) == [0]
+    assert CountingMask.intersections == 1
+    rng = Random(0)
+    for _ in range(100):
+        sets = get_minimal_sets([rng.randrange(1, 1 << 8) for _ in range(rng.randrange(2, 8))])
+        minimal_intersections = list(enumerate_minimal_intersections(sets))
+        smallest_size = min(bin(mask).count('1') for mask in minimal_intersections)
+        assert sorted(enumerate_minimal_intersections(sets, smallest_only=True)) == \
+            sorted(mask for mask in minimal_intersections
+                   if bin(mask).count('1') == smallest_size)
+
+def test_symmetric_fbas():
+    """Test minimal blocking and splitting sets of a symmetric FBAS (2 out of 4 each)"""
+    fbas = get_fbas(get_symmetric_fbas(4))
+    pairs = {frozenset(pair) for pair in combinations(fbas[1], 2)}
+    assert {frozenset(blocking_set)
+            for blocking_set in enumerate_minimal_blocking_sets(fbas)} == pairs
+    assert {frozenset(splitting_set)
+            for splitting_set in enumerate_minimal_splitting_sets(fbas)} == pairs
+
+def test_tiered_fbas():
+    """Test smallest blocking and splitting sets of a tiered FBAS"""
+    fbas = get_fbas(get_tiered_fbas(4, 3))
+    # halting 2 of 4 organizations requires 2 of 3 validators each
+    smallest_blocking_sets = list(enumerate_minimal_blocking_sets(fbas, smallest_only=True))
+    assert len(smallest_blocking_sets) == 6 * 3 * 3
+    assert all(len(blocking_set) == 4 for blocking_set in smallest_blocking_sets)
+    # two quorums of 3 organizations share 2 organizations: 1 validator each
+    smallest_splitting_sets = list(enumerate_minimal_splitting_sets(fbas, smallest_only=True))
+    assert all(len(splitting_set) == 2 for splitting_set in smallest_splitting_sets)
+    assert len(smallest_splitting_sets) == 6 * 3 * 3
+
+def test_broken_fbas():
+    """Test that the empty set is splitting without quorum intersection"""
+    fbas = get_fbas(get_broken_intersection_fbas(4, 2))
+    assert list(enumerate_minimal_splitting_sets(fbas)) == [set()]
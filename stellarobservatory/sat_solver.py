@@ -0,0 +1,275 @@
+"""A small CDCL SAT solver and CNF encoding helpers
+
+Literals are non-zero integers as in DIMACS: v for variable v and -v for its negation.
+The solver uses two watched literals, first-UIP clause learning with local
+minimization, VSIDS branching with phase saving and Luby restarts. If the optional
+python-sat package is installed, its solvers can be used instead."""
+from heapq import heapify, heappop, heappush
+from typing import List, Optional, Tuple, TypedDict
+
+Cnf = TypedDict('Cnf', {
+    'n_vars': int,
+    'clauses': List[List[int]]
+})
+
+RESTART_INTERVAL = 100
+ACTIVITY_DECAY = 0.95
+
+def get_cnf() -> Cnf:
+    """Return an empty CNF formula"""
+    return {'n_vars': 0, 'clauses': []}
+
+def add_var(cnf: Cnf) -> int:
+    """Add a new variable to a CNF formula"""
+    cnf['n_vars'] += 1
+    return cnf['n_vars']
+
+def add_at_least(cnf: Cnf, guard: int, lits: List[int], threshold: int):
+    """Add clauses such that guard implies that at least threshold of lits are true
+    (sequential counter encoding, only in this direction)"""
+    if threshold <= 0:
+        return
+    if threshold > len(lits):
+        cnf['clauses'].append([-guard])
+        return
+    if threshold == 1:
+        cnf['clauses'].append([-guard] + lits)
+        return
+    if threshold == len(lits):
+        cnf['clauses'].extend([-guard, lit] for lit in lits)
+        return
+    # counter[j] implies that at least j + 1 of the literals up to the current one are true
+    counter: List[int] = []
+    for index, lit in enumerate(lits):
+        # at least threshold - j of the len(lits) - index - 1 later literals are needed
+        # for counter[j], so counters with j < threshold - (len(lits) - index) are useless
+        min_count = max(0, threshold - (len(lits) - index))
+        next_counter = [0] * min(index + 1, threshold)
+        for count in range(min_count, len(next_counter)):
+            var = add_var(cnf)
+            next_counter[count] = var
+            # counter[count] held before or the literal is true (and counter[count - 1] held)
+            previous = [counter[count]] if count < len(counter) and counter[count] else []
+            cnf['clauses'].append([-var, lit] + previous)
+            if count > 0:
+                cnf['clauses'].append([-var, counter[count - 1]] + previous)
+        counter = next_counter
+    cnf['clauses'].append([-guard, counter[threshold - 1]])
+
+def get_luby(index: int) -> int:
+    """Return the index-th element (starting at 1) of the Luby sequence 1, 1, 2, 1, 1, 2, 4, ..."""
+    while True:
+        power = 1
+        while (1 << power) - 1 < index:
+            power += 1
+        if (1 << power) - 1 == index:
+            return 1 << (power - 1)
+        # the sequence up to 2^k - 1 repeats the sequence up to 2^(k-1) - 1 twice
+        index -= (1 << (power - 1)) - 1
+
+def solve_cnf(cnf: Cnf) -> Optional[List[bool]]:
+    """Return a model (the values of the variables, index 0 is unused) of a CNF formula
+    or None if it is unsatisfiable"""
+    # pylint: disable=too-many-locals,too-many-statements
+    n_vars = cnf['n_vars']
+    # literal lit is stored at lit + n_vars: 1 if true, -1 if false, 0 if unassigned
+    values = [0] * (2 * n_vars + 1)
+    levels = [0] * (n_vars + 1)
+    reasons: List[Optional[List[int]]] = [None] * (n_vars + 1)
+    # clauses watching a literal (by literal), clause[0] and clause[1] are watched
+    watches: List[List[List[int]]] = [[] for _ in range(2 * n_vars + 1)]
+    trail: List[int] = []
+    trail_limits: List[int] = []
+    activities = [0.0] * (n_vars + 1)
+    phases = [False] * (n_vars + 1)
+    # max-heap of (-activity, variable) with outdated entries
+    heap = [(0.0, var) for var in range(1, n_vars + 1)]
+    seen = [False] * (n_vars + 1)
+    queue_head = 0
+    activity_increment = 1.0
+
+    def assign(lit: int, reason: Optional[List[int]]):
+        values[lit + n_vars] = 1
+        values[-lit + n_vars] = -1
+        levels[abs(lit)] = len(trail_limits)
+        reasons[abs(lit)] = reason
+        trail.append(lit)
+
+    def propagate() -> Optional[List[int]]:
+        nonlocal queue_head
+        level = len(trail_limits)
+        while queue_head < len(trail):
+            false_lit = -trail[queue_head]
+            queue_head += 1
+            watch_list = watches[false_lit + n_vars]
+            kept: List[List[int]] = []
+            for index, clause in enumerate(watch_list):
+                if clause[0] == false_lit:
+                    clause[0], clause[1] = clause[1], false_lit
+                first = clause[0]
+                if values[first + n_vars] == 1:
+                    kept.append(clause)
+                    continue
+                for other_index in range(2, len(clause)):
+                    lit = clause[other_index]
+                    if values[lit + n_vars] != -1:
+                        clause[1], clause[other_index] = lit, false_lit
+                        watches[lit + n_vars].append(clause)
+                        break
+                else:
+                    kept.append(clause)
+                    if values[first + n_vars] == -1:
+                        kept.extend(watch_list[index + 1:])
+                        watches[false_lit + n_vars] = kept
+                        return clause
+                    # assign(first, clause) inlined
+                    values[first + n_vars] = 1
+                    values[-first + n_vars] = -1
+                    var = first if first > 0 else -first
+                    levels[var] = level
+                    reasons[var] = clause
+                    trail.append(first)
+            watches[false_lit + n_vars] = kept
+        return None
+
+    def bump(var: int):
+        nonlocal activity_increment
+        activities[var] += activity_increment
+        rescale = activities[var] > 1e100
+        if rescale:
+            for other_var in range(1, n_vars + 1):
+                activities[other_var] *= 1e-100
+            activity_increment *= 1e-100
+        # rebuild the heap if the activities were rescaled or too many entries are outdated
+        if rescale or len(heap) > 10 * n_vars:
+            heap[:] = [(-activities[other_var], other_var) for other_var in range(1, n_vars + 1)
+                       if values[other_var + n_vars] == 0]
+            heapify(heap)
+        elif values[var + n_vars] == 0:
+            heappush(heap, (-activities[var], var))
+
+    def analyze(conflict: List[int]) -> Tuple[List[int], int]:
+        # first unique implication point
+        learned = [0]
+        pending = 0
+        clause = conflict
+        lit = 0
+        index = len(trail) - 1
+        level = len(trail_limits)
+        while True:
+            for other_lit in clause:
+                var = abs(other_lit)
+                if other_lit != lit and not seen[var] and levels[var] > 0:
+                    seen[var] = True
+                    bump(var)
+                    if levels[var] == level:
+                        pending += 1
+                    else:
+                        learned.append(other_lit)
+            while not seen[abs(trail[index])]:
+                index -= 1
+            lit = trail[index]
+            index -= 1
+            seen[abs(lit)] = False
+            pending -= 1
+            if pending == 0:
+                break
+            clause = cast_reason(reasons[abs(lit)])
+        learned[0] = -lit
+        # drop literals implied by other literals of the learned clause
+        minimized = [learned[0]] + [
+            other_lit for other_lit in learned[1:]
+            if reasons[abs(other_lit)] is None or
+            not all(seen[abs(reason_lit)] or levels[abs(reason_lit)] == 0
+                    for reason_lit in cast_reason(reasons[abs(other_lit)])[1:])]
+        for other_lit in learned[1:]:
+            seen[abs(other_lit)] = False
+        if len(minimized) == 1:
+            return minimized, 0
+        # the literal of the highest remaining level is watched next to the asserting one
+        max_index = max(range(1, len(minimized)), key=lambda i: levels[abs(minimized[i])])
+        minimized[1], minimized[max_index] = minimized[max_index], minimized[1]
+        return minimized, levels[abs(minimized[1])]
+
+    def backtrack(level: int):
+        nonlocal queue_head
+        if len(trail_limits) <= level:
+            return
+        for lit in trail[trail_limits[level]:]:
+            var = abs(lit)
+            values[lit + n_vars] = 0
+            values[-lit + n_vars] = 0
+            reasons[var] = None
+            phases[var] = lit > 0
+            heappush(heap, (-activities[var], var))
+        del trail[trail_limits[level]:]
+        del trail_limits[level:]
+        queue_head = len(trail)
+
+    def pick_branch_lit() -> int:
+        while heap:
+            _, var = heappop(heap)
+            if values[var + n_vars] == 0:
+                return var if phases[var] else -var
+        return 0
+
+    for clause in cnf['clauses']:
+        clause = list(dict.fromkeys(clause))
+        if any(-lit in clause or values[lit + n_vars] == 1 for lit in clause):
+            continue
+        clause = [lit for lit in clause if values[lit + n_vars] != -1]
+        if not clause:
+            return None
+        if len(clause) == 1:
+            if values[clause[0] + n_vars] == 0:
+                assign(clause[0], None)
+            continue
+        watches[clause[0] + n_vars].append(clause)
+        watches[clause[1] + n_vars].append(clause)
+
+    conflicts = 0
+    restarts = 1
+    restart_limit = RESTART_INTERVAL * get_luby(restarts)
+    while True:
+        conflict = propagate()
+        if conflict is not None:
+            if not trail_limits:
+                return None
+            conflicts += 1
+            learned, level = analyze(conflict)
+            backtrack(level)
+            if len(learned) == 1:
+                assign(learned[0], None)
+            else:
+                watches[learned[0] + n_vars].append(learned)
+                watches[learned[1] + n_vars].append(learned)
+                assign(learned[0], learned)
+            activity_increment /= ACTIVITY_DECAY
+            continue
+        if conflicts >= restart_limit:
+            backtrack(0)
+            restarts += 1
+            restart_limit = conflicts + RESTART_INTERVAL * get_luby(restarts)
+        lit = pick_branch_lit()
+        if lit == 0:
+            return [False] + [values[var + n_vars] == 1 for var in range(1, n_vars + 1)]
+        trail_limits.append(len(trail))
+        assign(lit, None)
+
+def cast_reason(reason: Optional[List[int]]) -> List[int]:
+    """Return the reason of an implied literal (which always exists)"""
+    assert reason is not None
+    return reason
+
+def solve_cnf_with_pysat(cnf: Cnf, name: str = 'cadical153') -> Optional[List[bool]]:
+    """solve_cnf() with a solver of the optional python-sat package"""
+    # pylint: disable=import-outside-toplevel,import-error
+    from pysat.solvers import Solver
+    with Solver(name=name, bootstrap_with=cnf['clauses']) as solver:
+        if not solver.solve():
+            return None
+        values = [False] * (cnf['n_vars'] + 1)
+        for lit in solver.get_model():
+            if 0 < lit <= cnf['n_vars']:
+                values[lit] = True
+        return values
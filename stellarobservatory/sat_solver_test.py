@@ -0,0 +1,52 @@
+"""Tests for the CDCL SAT solver"""
+from itertools import product
+
+from .sat_solver import add_at_least, add_var, get_cnf, get_luby, solve_cnf
+
+
+def is_model(model, clauses) -> bool:
+    """Check whether all clauses are satisfied"""
+    return all(any(model[abs(lit)] == (lit > 0) for lit in clause) for clause in clauses)
+
+
+def test_get_luby():
+    """Test get_luby()"""
+    assert [get_luby(index) for index in range(1, 16)] == \
+        [1, 1, 2, 1, 1, 2, 4, 1, 1, 2, 1, 1, 2, 4, 8]
+
+
+def test_solve_cnf():
+    """Test solve_cnf() with satisfiable and unsatisfiable formulas"""
+    clauses = [[1, 2], [-1, 3], [-3, -2], [2, 3]]
+    model = solve_cnf({'n_vars': 3, 'clauses': clauses})
+    assert model is not None and is_model(model, clauses)
+    assert solve_cnf({'n_vars': 1, 'clauses': [[1], [-1]]}) is None
+    assert solve_cnf({'n_vars': 2, 'clauses': [[]]}) is None
+
+    # pigeonhole principle: 4 pigeons do not fit into 3 holes
+    def var(pigeon, hole):
+        return 3 * pigeon + hole + 1
+    clauses = [[var(pigeon, hole) for hole in range(3)] for pigeon in range(4)]
+    clauses += [[-var(pigeon1, hole), -var(pigeon2, hole)]
+                for hole in range(3) for pigeon1 in range(4) for pigeon2 in range(pigeon1)]
+    assert solve_cnf({'n_vars': 12, 'clauses': clauses}) is None
+    clauses = [clause for clause in clauses if var(3, 0) not in clause]
+    model = solve_cnf({'n_vars': 12, 'clauses': clauses})
+    assert model is not None and is_model(model, clauses)
+
+
+def test_add_at_least():
+    """Test add_at_least() exhaustively for up to 5 literals"""
+    for n_lits in range(6):
+        for threshold in range(-1, n_lits + 2):
+            cnf = get_cnf()
+            lits = [add_var(cnf) for _ in range(n_lits)]
+            guard = add_var(cnf)
+            add_at_least(cnf, guard, lits, threshold)
+            for values in product([False, True], repeat=n_lits):
+                model = solve_cnf({
+                    'n_vars': cnf['n_vars'],
+                    'clauses': cnf['clauses'] + [[guard]] +
+                               [[lit if value else -lit] for lit, value in zip(lits, values)]
+                })
+                assert (model is not None) == (sum(values) >= threshold)
@@ -0,0 +1,446 @@
+"""Analysis server that keeps the current FBAS warm in memory
+
+    python -m stellarobservatory.server [--host HOST] [--port PORT] [--snapshot FILE]
+
+The server compiles the FBAS of a stellarbeat snapshot once and keeps the trust
+graph, strongly connected components, minimal quorums, what-if results, intactness
+tensors and query results in memory. Endpoints (JSON):
+
+* POST /query: a query or a list of queries, e.g., {"analysis": "intact_nodes",
+  "b_nodes": [...]}, see evaluate_query() for all analyses
+* POST /snapshot: a list of stellarbeat nodes that replaces the current FBAS
+* GET /status
+
+Queries are evaluated one batch at a time by a single worker thread: all queries
+that arrive while a batch is evaluated form the next batch in which identical
+queries are evaluated only once. The latest MAX_RESULTS results are memoized.
+Invalid queries are answered with {"error": ...} (status 400 for a single query),
+unexpected errors fail the whole batch (status 500).
+"""
+import argparse
+import json
+import queue
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Tuple, TypedDict
+
+import numpy
+
+from .centralities import get_hierarchical_intactness_tensor, get_intactness_tensor, \
+    get_matrix_eigenvector_centralities, get_minimal_intactness_tensor, \
+    get_quorum_subgraph_centralities, get_size_weighted_matrix, get_subgraph_centralities
+from .compiled_fbas import CompiledFbas, compile_definitions, get_compiled_fbas, \
+    mask_to_nodes, nodes_to_mask
+from .iterative_centralities import IterativeCentralities, \
+    get_iterative_eigenvector_centralities, get_iterative_quorum_eigenvector_centralities
+from .pairwise_intersection import find_disjoint_minimal_quorums
+from .quorum_intersection import enumerate_minimal_quorums
+from .quorum_intersection_sat import check_quorum_intersection
+from .quorum_slice_definition import Definitions, get_direct_dependencies, \
+    restrict_definition
+from .stellarbeat import StellarbeatNode, convert_stellarbeat_to_observatory, \
+    get_nodes_from_stellarbeat
+from .utils.graph import Graph, Node, Nodes
+from .utils.scc import get_strongly_connected_components
+from .what_if import WhatIfCache, get_intact_mask, get_what_if_cache, what_if_failed
+
+AnalysisState = TypedDict('AnalysisState', {
+    # pylint: disable=unsubscriptable-object
+    # incremented whenever the FBAS changes
+    'version': int,
+    'nodes': List[Any],
+    'definitions': Definitions,
+    'node_names': Dict[Any, str],
+    'compiled': CompiledFbas,
+    'trust_graph': Graph,
+    # computed on demand
+    'sccs': Optional[List[Nodes]],
+    'minimal_quorums': Optional[List[FrozenSet]],
+    'what_if_cache': WhatIfCache,
+    # kind of intactness centralities -> intactness tensor
+    'intactness_tensors': Dict[str, numpy.ndarray],
+    # kind of iterative centralities -> latest centralities by node (also of previous
+    # snapshots, to warm-start the solver)
+    'warm_centralities': Dict[str, Dict[Any, float]],
+    # canonical query -> result (least recently used first)
+    'results': 'OrderedDict[str, Any]'
+})
+
+ServerState = TypedDict('ServerState', {
+    'analysis': AnalysisState,
+    # pending (kind, payload, future) items, kind is 'query' or 'snapshot'
+    'queue': queue.Queue
+})
+
+CENTRALITIES: Dict[str, Callable[[List[Node], Definitions], numpy.ndarray]] = {
+    'subgraph': get_subgraph_centralities,
+    'quorum_subgraph': get_quorum_subgraph_centralities
+}
+
+ITERATIVE_CENTRALITIES: Dict[str, Callable[[List[Node], Definitions, Optional[Dict[Any, float]]],
+                                           IterativeCentralities]] = {
+    'eigenvector': get_iterative_eigenvector_centralities,
+    'quorum_eigenvector': get_iterative_quorum_eigenvector_centralities
+}
+
+MAX_RESULTS = 1024
+
+INTACTNESS_TENSORS: Dict[str, Callable[[List[Node], Definitions], numpy.ndarray]] = {
+    'intactness': get_intactness_tensor,
+    'hierarchical_intactness': get_hierarchical_intactness_tensor,
+    'minimal_intactness': get_minimal_intactness_tensor
+}
+
+def get_analysis_state(stellarbeat_nodes: List[StellarbeatNode],
+                       previous: Optional[AnalysisState] = None) -> AnalysisState:
+    """Return the analysis state of a snapshot
+
+    If the state of a previous snapshot is given, everything is kept if no quorum
+    slice definition changed. Otherwise, only the trust graph edges of changed nodes
+    are recomputed and the disjoint quorums found for the previous FBAS are kept as
+    candidate witnesses for what-if analyses (they are verified before use)."""
+    node_set, definitions, node_names = convert_stellarbeat_to_observatory(stellarbeat_nodes)
+    nodes = sorted(node_set)
+    definitions = {node: restrict_definition(definition, node_set)
+                   for node, definition in definitions.items()}
+    if previous is not None and previous['nodes'] == nodes and \
+            previous['definitions'] == definitions:
+        return {**previous, 'node_names': node_names}
+    compiled = compile_definitions(definitions, nodes)
+    what_if_cache = get_what_if_cache()
+    trust_graph: Graph = {}
+    for node in nodes:
+        if previous is not None and node in previous['trust_graph'] and \
+                previous['definitions'][node] == definitions[node]:
+            trust_graph[node] = previous['trust_graph'][node]
+        else:
+            trust_graph[node] = get_direct_dependencies(definitions, node)
+    if previous is not None:
+        previous_compiled = previous['compiled']
+        for quorum1, quorum2 in previous['what_if_cache']['witnesses']:
+            quorums = [mask_to_nodes(previous_compiled, quorum) for quorum in (quorum1, quorum2)]
+            if all(quorum.issubset(node_set) for quorum in quorums):
+                what_if_cache['witnesses'].append(
+                    (nodes_to_mask(compiled, quorums[0]), nodes_to_mask(compiled, quorums[1])))
+    return {
+        'version': previous['version'] + 1 if previous is not None else 1,
+        'nodes': nodes,
+        'definitions': definitions,
+        'node_names': node_names,
+        'compiled': compiled,
+        'trust_graph': trust_graph,
+        'sccs': None,
+        'minimal_quorums': None,
+        'what_if_cache': what_if_cache,
+        'intactness_tensors': {},
+        'warm_centralities': dict(previous['warm_centralities']) if previous is not None else {},
+        'results': OrderedDict()
+    }
+
+def get_sccs(state: AnalysisState) -> List[Nodes]:
+    """Return the strongly connected components of the trust graph"""
+    sccs = state['sccs']
+    if sccs is None:
+        sccs, _ = get_strongly_connected_components(state['trust_graph'])
+        state['sccs'] = sccs
+    return sccs
+
+def get_minimal_quorums(state: AnalysisState) -> List[FrozenSet]:
+    """Return the minimal quorums of the FBAS"""
+    minimal_quorums = state['minimal_quorums']
+    if minimal_quorums is None:
+        minimal_quorums = [
+            frozenset(quorum)
+            for quorum in enumerate_minimal_quorums(get_compiled_fbas(state['compiled']))]
+        state['minimal_quorums'] = minimal_quorums
+    return minimal_quorums
+
+def get_sorted(nodes) -> List[Any]:
+    """Return a set of nodes as sorted list (for JSON)"""
+    return sorted(nodes)
+
+def get_node_values(state: AnalysisState, values: numpy.ndarray) -> Dict[Any, float]:
+    """Return values (one per node in state['nodes']) by node"""
+    return {node: float(value) for node, value in zip(state['nodes'], values)}
+
+def get_query_nodes(state: AnalysisState, query: Dict[str, Any], key: str) -> Nodes:
+    """Return the nodes of a query parameter (unknown nodes are rejected)"""
+    nodes = set(query.get(key, []))
+    unknown_nodes = nodes.difference(state['compiled']['node_to_index'])
+    if unknown_nodes:
+        raise ValueError(f'unknown nodes in {key}: {get_sorted(unknown_nodes)}')
+    return nodes
+
+def get_quorum_intersection(state: AnalysisState, backend: str) -> Dict[str, Any]:
+    """Check quorum intersection ('pairwise' reuses the minimal quorums of the state)"""
+    if backend == 'pairwise':
+        disjoint_quorums = find_disjoint_minimal_quorums(
+            [set(quorum) for quorum in get_minimal_quorums(state)])
+    else:
+        try:
+            result = check_quorum_intersection(state['nodes'], state['definitions'], backend)
+        except ImportError as error:
+            raise ValueError(f'backend {backend} is not available: {error}') from error
+        disjoint_quorums = None if result is True else (result[1], result[2])
+    if disjoint_quorums is None:
+        return {'quorum_intersection': True}
+    return {'quorum_intersection': False,
+            'disjoint_quorums': [get_sorted(quorum) for quorum in disjoint_quorums]}
+
+def evaluate_query(state: AnalysisState, query: Dict[str, Any]) -> Any:
+    """Evaluate a query on the analysis state (the result can be serialized to JSON)
+
+    * {"analysis": "status"}
+    * {"analysis": "sccs"}
+    * {"analysis": "quorum_intersection", "backend": "auto"}
+      (see check_quorum_intersection(), 'pairwise' reuses the minimal quorums)
+    * {"analysis": "minimal_quorums"}
+    * {"analysis": "intact_nodes", "b_nodes": [...]}
+    * {"analysis": "what_if", "failed": [...]}
+    * {"analysis": "centralities", "kind": "eigenvector"} with the kinds in
+      CENTRALITIES, ITERATIVE_CENTRALITIES (warm-started with the latest result,
+      also of previous snapshots) and INTACTNESS_TENSORS (the latter with the size
+      weight "decay" ** |B|, default 0.5)
+    """
+    # pylint: disable=too-many-return-statements
+    analysis = query.get('analysis')
+    if analysis == 'status':
+        return {'version': state['version'], 'nodes': len(state['nodes'])}
+    if analysis == 'sccs':
+        return sorted(get_sorted(scc) for scc in get_sccs(state))
+    if analysis == 'quorum_intersection':
+        return get_quorum_intersection(state, query.get('backend', 'auto'))
+    if analysis == 'minimal_quorums':
+        return sorted(get_sorted(quorum) for quorum in get_minimal_quorums(state))
+    if analysis == 'intact_nodes':
+        compiled = state['compiled']
+        b_mask = nodes_to_mask(compiled, get_query_nodes(state, query, 'b_nodes'))
+        return get_sorted(mask_to_nodes(compiled, get_intact_mask(
+            compiled, b_mask, state['what_if_cache'])))
+    if analysis == 'what_if':
+        result = what_if_failed(state['compiled'], get_query_nodes(state, query, 'failed'),
+                                state['what_if_cache'])
+        return {'failed': get_sorted(result['failed']), 'has_quorum': result['has_quorum'],
+                'has_quorum_intersection': result['has_quorum_intersection'],
+                'intact_nodes': get_sorted(result['intact_nodes'])}
+    if analysis == 'centralities':
+        kind = query.get('kind', 'eigenvector')
+        if kind in CENTRALITIES:
+            return get_node_values(state, CENTRALITIES[kind](state['nodes'], state['definitions']))
+        if kind in ITERATIVE_CENTRALITIES:
+            warm_centralities = state['warm_centralities']
+            iterative_result = ITERATIVE_CENTRALITIES[kind](state['nodes'], state['definitions'],
+                                                            warm_centralities.get(kind))
+            warm_centralities[kind] = get_node_values(state, iterative_result['centralities'])
+            return warm_centralities[kind]
+        if kind in INTACTNESS_TENSORS:
+            tensors = state['intactness_tensors']
+            if kind not in tensors:
+                tensors[kind] = INTACTNESS_TENSORS[kind](state['nodes'], state['definitions'])
+            decay = float(query.get('decay', 0.5))
+            return get_node_values(state, get_matrix_eigenvector_centralities(
+                get_size_weighted_matrix(tensors[kind], lambda size: decay**size)))
+        raise ValueError(f'unknown centralities {kind}')
+    raise ValueError(f'unknown analysis {analysis}')
+
+def get_query_key(query: Dict[str, Any]) -> str:
+    """Return a canonical representation of a query (node lists are unordered)"""
+    return json.dumps({key: sorted(value) if isinstance(value, list) else value
+                       for key, value in query.items()}, sort_keys=True)
+
+def get_query_order(query: Dict[str, Any]) -> Tuple[int, int]:
+    """Sort key for a batch: what-if analyses with fewer failed nodes first, so that
+    their disjoint quorums can be reused for larger failure scenarios"""
+    if query.get('analysis') in ('what_if', 'intact_nodes'):
+        return 1, len(query.get('failed', query.get('b_nodes', [])))
+    return 0, 0
+
+def answer_queries(state: AnalysisState, queries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Answer a batch of queries with {"result": ...} or {"error": ...} each
+
+    Identical queries are evaluated once and results are memoized in the state.
+    Errors other than invalid queries are raised."""
+    results = state['results']
+    errors: Dict[str, str] = {}
+    answers: Dict[str, Any] = {}
+    keys = []
+    for query in queries:
+        try:
+            keys.append(get_query_key(query))
+        except (AttributeError, TypeError) as error:
+            keys.append(repr(query))
+            errors[keys[-1]] = f'invalid query: {error}'
+    for key in keys:
+        if key in results:
+            results.move_to_end(key)
+            answers[key] = results[key]
+    pending = {key: query for key, query in zip(keys, queries)
+               if key not in answers and key not in errors}
+    for key, query in sorted(pending.items(), key=lambda item: get_query_order(item[1])):
+        try:
+            answers[key] = evaluate_query(state, query)
+        except (KeyError, TypeError, ValueError) as error:
+            errors[key] = str(error)
+            continue
+        results[key] = answers[key]
+        if len(results) > MAX_RESULTS:
+            results.popitem(last=False)
+    return [{'error': errors[key]} if key in errors else {'result': answers[key]}
+            for key in keys]
+
+def get_server_state(stellarbeat_nodes: List[StellarbeatNode]) -> ServerState:
+    """Return the state of a server for an initial snapshot"""
+    return {'analysis': get_analysis_state(stellarbeat_nodes), 'queue': queue.Queue()}
+
+def process_items(server_state: ServerState, items: List[Tuple[str, Any, Future]]):
+    """Process pending items in order, consecutive queries are answered as one batch
+
+    Errors fail the futures of their batch (or snapshot), so the worker keeps running."""
+    batch: List[Tuple[Any, Future]] = []
+
+    def flush():
+        queries = [query for queries, _ in batch for query in queries]
+        try:
+            answers = answer_queries(server_state['analysis'], queries)
+        except Exception as error: # pylint: disable=broad-exception-caught
+            for _, future in batch:
+                future.set_exception(error)
+            batch.clear()
+            return
+        for queries, future in batch:
+            future.set_result(answers[:len(queries)])
+            del answers[:len(queries)]
+        batch.clear()
+
+    for kind, payload, future in items:
+        if kind == 'query':
+            batch.append((payload, future))
+            continue
+        flush()
+        try:
+            server_state['analysis'] = get_analysis_state(payload, server_state['analysis'])
+            future.set_result(evaluate_query(server_state['analysis'], {'analysis': 'status'}))
+        except Exception as error: # pylint: disable=broad-exception-caught
+            future.set_exception(error)
+    flush()
+
+def run_worker(server_state: ServerState):
+    """Process batches of items until None is queued"""
+    pending = server_state['queue']
+    while True:
+        items = [pending.get()]
+        while not pending.empty():
+            items.append(pending.get())
+        process_items(server_state, [item for item in items if item is not None])
+        if None in items:
+            return
+
+def submit(server_state: ServerState, kind: str, payload: Any) -> Any:
+    """Queue an item for the worker and wait for its result"""
+    future: Future = Future()
+    server_state['queue'].put((kind, payload, future))
+    return future.result()
+
+def get_request_handler(server_state: ServerState):
+    """Return a request handler class for the server state"""
+
+    class AnalysisRequestHandler(BaseHTTPRequestHandler):
+        """Handle JSON requests (see module docstring)"""
+
+        def send_json(self, status: int, body: Any):
+            """Send a JSON response"""
+            data = json.dumps(body).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def send_answers(self, queries: Any):
+            """Answer a query or a list of queries"""
+            try:
+                answers = submit(server_state, 'query',
+                                 queries if isinstance(queries, list) else [queries])
+            except Exception as error: # pylint: disable=broad-exception-caught
+                self.send_json(500, {'error': f'internal error: {error!r}'})
+                return
+            if isinstance(queries, list):
+                self.send_json(200, answers)
+            else:
+                self.send_json(400 if 'error' in answers[0] else 200, answers[0])
+
+        def do_GET(self): # pylint: disable=invalid-name
+            """Handle GET /status"""
+            if self.path != '/status':
+                self.send_json(404, {'error': f'unknown path {self.path}'})
+                return
+            self.send_answers({'analysis': 'status'})
+
+        def do_POST(self): # pylint: disable=invalid-name
+            """Handle POST /query and POST /snapshot"""
+            try:
+                body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+            except ValueError as error:
+                self.send_json(400, {'error': f'invalid JSON: {error}'})
+                return
+            if self.path == '/query':
+                self.send_answers(body)
+            elif self.path == '/snapshot':
+                try:
+                    self.send_json(200, submit(server_state, 'snapshot', body))
+                except (KeyError, TypeError, ValueError) as error:
+                    self.send_json(400, {'error': f'invalid snapshot: {error!r}'})
+                except Exception as error: # pylint: disable=broad-exception-caught
+                    self.send_json(500, {'error': f'internal error: {error!r}'})
+            else:
+                self.send_json(404, {'error': f'unknown path {self.path}'})
+
+        def log_message(self, format, *args): # pylint: disable=redefined-builtin
+            """Do not log every request"""
+
+    return AnalysisRequestHandler
+
+def start_server(stellarbeat_nodes: List[StellarbeatNode], host: str = '127.0.0.1',
+                 port: int = 0) -> Tuple[ThreadingHTTPServer, ServerState]:
+    """Start the worker and a server (in background threads) and return both"""
+    server_state = get_server_state(stellarbeat_nodes)
+    threading.Thread(target=run_worker, args=(server_state,), daemon=True).start()
+    server = ThreadingHTTPServer((host, port), get_request_handler(server_state))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, server_state
+
+def stop_server(server: ThreadingHTTPServer, server_state: ServerState):
+    """Stop a server started with start_server()"""
+    server.shutdown()
+    server.server_close()
+    server_state['queue'].put(None)
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--snapshot', help='stellarbeat nodes (JSON), default: fetch current nodes')
+    args = parser.parse_args()
+    if args.snapshot is None:
+        stellarbeat_nodes = [node for node in get_nodes_from_stellarbeat()
+                             if node.get('isValidator', True) and 'quorumSet' in node]
+    else:
+        with open(args.snapshot, encoding='utf-8') as snapshot_file:
+            stellarbeat_nodes = json.load(snapshot_file)
+    server, server_state = start_server(stellarbeat_nodes, args.host, args.port)
+    print(f'Serving {len(server_state["analysis"]["nodes"])} nodes on '
+          f'http://{args.host}:{server.server_port}')
+    try:
+        # the server and the worker run in daemon threads
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop_server(server, server_state)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+"""Tests for the analysis server"""
+import json
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+from numpy.testing import assert_allclose
+
+from .centralities import get_eigenvector_centralities
+from .compiled_fbas import compile_definitions
+from .generators import get_broken_intersection_fbas, get_stellarbeat_node, get_tiered_fbas
+from . import server as server_module
+from .server import answer_queries, get_analysis_state, start_server, stop_server
+from .stellarbeat import convert_stellarbeat_to_observatory
+from .what_if import what_if_failed
+
+def test_answer_queries():
+    """Test answer_queries() against direct analyses"""
+    state = get_analysis_state(get_tiered_fbas(4, 2, n_watchers=1))
+    answers = answer_queries(state, [
+        {'analysis': 'quorum_intersection'},
+        {'analysis': 'intact_nodes', 'b_nodes': ['O0V0', 'O0V1']},
+        {'analysis': 'what_if', 'failed': ['O0V1', 'O0V0']},
+        {'analysis': 'minimal_quorums'},
+        {'analysis': 'sccs'},
+        {'analysis': 'centralities', 'kind': 'intactness', 'decay': 0.25},
+        {'analysis': 'what_if', 'failed': ['X']},
+        {'analysis': 'unknown'},
+        'invalid'
+    ])
+    assert answers[0] == {'result': {'quorum_intersection': True}}
+    intact_nodes = ['O1V0', 'O1V1', 'O2V0', 'O2V1', 'O3V0', 'O3V1', 'W0']
+    assert answers[1] == {'result': intact_nodes}
+    assert answers[2] == {'result': {
+        'failed': ['O0V0', 'O0V1'], 'has_quorum': True, 'has_quorum_intersection': True,
+        'intact_nodes': intact_nodes}}
+    # three of four organizations
+    assert len(answers[3]['result']) == 4
+    assert answers[4] == {'result': [['O0V0', 'O0V1'] + intact_nodes[:-1], ['W0']]}
+    assert set(answers[5]['result']) == set(state['nodes'])
+    assert 'error' in answers[6] and 'error' in answers[7] and 'error' in answers[8]
+    # results are memoized independently of the order of nodes
+    assert len(state['results']) == 6
+    assert answer_queries(state, [{'analysis': 'what_if', 'failed': ['O0V0', 'O0V1']}]) == \
+        [answers[2]]
+    assert len(state['results']) == 6
+
+def test_answer_queries_lru(monkeypatch):
+    """Test that only the latest MAX_RESULTS results are memoized"""
+    monkeypatch.setattr(server_module, 'MAX_RESULTS', 2)
+    state = get_analysis_state(get_tiered_fbas(3, 2))
+    queries = [{'analysis': 'what_if', 'failed': [node]} for node in ['O0V0', 'O1V0', 'O2V0']]
+    answers = answer_queries(state, queries)
+    assert all('result' in answer for answer in answers)
+    assert len(state['results']) == 2
+    assert answer_queries(state, queries) == answers
+    assert len(state['results']) == 2
+
+def test_unknown_validators():
+    """Test a snapshot that references validators without node (e.g., offline ones)"""
+    snapshot = get_tiered_fbas(3, 2) + [get_stellarbeat_node('W0', {
+        'threshold': 1, 'validators': ['O0V0', 'OFFLINE'], 'innerQuorumSets': []})]
+    state = get_analysis_state(snapshot)
+    answers = answer_queries(state, [{'analysis': 'centralities'}, {'analysis': 'sccs'}])
+    assert set(answers[0]['result']) == set(state['nodes'])
+    assert ['W0'] in answers[1]['result']
+
+def test_get_analysis_state_refresh():
+    """Test refreshing the analysis state with a new snapshot"""
+    snapshot = get_tiered_fbas(3, 2)
+    state = get_analysis_state(snapshot)
+    answer_queries(state, [{'analysis': 'sccs'}])
+    assert get_analysis_state(snapshot, state)['results'] is state['results']
+
+    broken_snapshot = get_broken_intersection_fbas(3, 2)
+    broken_state = get_analysis_state(broken_snapshot, state)
+    assert broken_state['version'] == 2
+    assert broken_state['results'] == {}
+    for backend in ('auto', 'pairwise'):
+        assert answer_queries(broken_state, [{'analysis': 'quorum_intersection',
+                                              'backend': backend}])[0][
+            'result']['quorum_intersection'] is False
+    _, definitions, _ = convert_stellarbeat_to_observatory(broken_snapshot)
+    compiled = compile_definitions(definitions, broken_state['nodes'])
+    for failed in ([], ['O0V0'], ['O1V0', 'O2V1']):
+        result = what_if_failed(compiled, set(failed))
+        assert answer_queries(broken_state, [{'analysis': 'what_if', 'failed': failed}])[0][
+            'result']['has_quorum_intersection'] == result['has_quorum_intersection']
+
+    # the witnesses of the broken FBAS are only candidates for the refreshed one
+    fixed_state = get_analysis_state(snapshot, broken_state)
+    assert fixed_state['what_if_cache']['witnesses']
+    assert answer_queries(fixed_state, [{'analysis': 'what_if', 'failed': []}])[0][
+        'result']['has_quorum_intersection'] is True
+
+def post(url: str, body):
+    """POST a JSON body and return the decoded response"""
+    request = Request(url, data=json.dumps(body).encode('utf-8'),
+                      headers={'Content-Type': 'application/json'})
+    with urlopen(request) as response:
+        return json.loads(response.read())
+
+def test_server():
+    """Test the HTTP endpoints"""
+    server, server_state = start_server(get_tiered_fbas(3, 2))
+    url = f'http://127.0.0.1:{server.server_port}'
+    try:
+        with urlopen(url + '/status') as response:
+            assert json.loads(response.read()) == {'result': {'version': 1, 'nodes': 6}}
+        assert post(url + '/query', {'analysis': 'quorum_intersection'}) == \
+            {'result': {'quorum_intersection': True}}
+        assert post(url + '/snapshot', get_broken_intersection_fbas(3, 2)) == \
+            {'version': 2, 'nodes': 6}
+        answers = post(url + '/query', [{'analysis': 'quorum_intersection'},
+                                        {'analysis': 'status'}])
+        assert answers[0]['result']['quorum_intersection'] is False
+        assert answers[1] == {'result': {'version': 2, 'nodes': 6}}
+        assert server_state['analysis']['version'] == 2
+    finally:
+        stop_server(server, server_state)
+
+def test_server_errors(monkeypatch):
+    """Test that unavailable backends are rejected and unexpected errors do not stop
+    the worker"""
+
+    def check_quorum_intersection(*_):
+        raise ModuleNotFoundError("No module named 'pysat'")
+
+    def evaluate_query(state, query):
+        if query.get('analysis') == 'crash':
+            raise RuntimeError('crash')
+        return original_evaluate_query(state, query)
+
+    original_evaluate_query = server_module.evaluate_query
+    monkeypatch.setattr(server_module, 'check_quorum_intersection', check_quorum_intersection)
+    monkeypatch.setattr(server_module, 'evaluate_query', evaluate_query)
+    server, server_state = start_server(get_tiered_fbas(3, 2))
+    url = f'http://127.0.0.1:{server.server_port}'
+    try:
+        for query, status in [({'analysis': 'quorum_intersection', 'backend': 'pysat'}, 400),
+                              ({'analysis': 'crash'}, 500)]:
+            try:
+                post(url + '/query', query)
+                assert False, 'expected an HTTP error'
+            except HTTPError as error:
+                assert error.code == status
+                error.close()
+        assert post(url + '/query', {'analysis': 'status'}) == \
+            {'result': {'version': 1, 'nodes': 6}}
+    finally:
+        stop_server(server, server_state)
+
+def test_warm_centralities():
+    """Test that eigenvector centralities are warm-started across snapshots"""
+    state = get_analysis_state(get_tiered_fbas(3, 2))
+    answer_queries(state, [{'analysis': 'centralities', 'kind': 'eigenvector'}])
+    state = get_analysis_state(get_tiered_fbas(4, 2), state)
+    assert set(state['warm_centralities']['eigenvector']) == \
+        {'O0V0', 'O0V1', 'O1V0', 'O1V1', 'O2V0', 'O2V1'}
+    result = answer_queries(state, [{'analysis': 'centralities', 'kind': 'eigenvector'}])[0]
+    assert_allclose([result['result'][node] for node in state['nodes']],
+                    get_eigenvector_centralities(state['nodes'], state['definitions']))
+    assert state['warm_centralities']['eigenvector'] == result['result']
@@ -0,0 +1,133 @@
+"""Monte Carlo simulation of availability and safety under random node failures"""
+from multiprocessing import Pool
+from typing import Any, Dict, List, Optional, Tuple, TypedDict, Union
+
+import numpy
+from scipy.stats import norm
+
+from .batch_evaluation import batch_greatest_quorums, get_batch_evaluator
+from .compiled_fbas import compile_definitions, iterate_bits
+from .quorum_slice_definition import Definitions
+from .utils.graph import Node
+from .what_if import get_intact_mask, get_residual_witness, get_what_if_cache
+
+Estimate = TypedDict('Estimate', {
+    'estimate': float,
+    'lower': float,
+    'upper': float
+})
+
+SimulationResult = TypedDict('SimulationResult', {
+    'samples': int,
+    # probability that the non-failed nodes contain a quorum
+    'availability': Estimate,
+    # probability that the FBAS without the failed nodes enjoys quorum intersection
+    # pylint: disable=unsubscriptable-object
+    'safety': Optional[Estimate],
+    # probability per node that the node is intact despite the failed nodes
+    'intactness': Optional[Dict[Any, Estimate]]
+})
+
+# (number of samples, available, safe, intact per node)
+BatchCounts = Tuple[int, int, int, numpy.ndarray]
+
+# compiled state of a worker process (see init_worker())
+WORKER_STATE: Dict[str, Any] = {}
+
+def get_simulation_state(definitions: Definitions, nodes: List[Node]) -> Dict[str, Any]:
+    """Compile the FBAS for simulate_batch()"""
+    compiled = compile_definitions(definitions, nodes)
+    return {'compiled': compiled, 'evaluator': get_batch_evaluator(compiled),
+            'cache': get_what_if_cache()}
+
+def init_worker(definitions: Definitions, nodes: List[Node]):
+    """Compile the FBAS once per worker process"""
+    WORKER_STATE.update(get_simulation_state(definitions, nodes))
+
+def simulate_batch(state: Dict[str, Any], task: Tuple[numpy.ndarray, int, Any, bool]
+                   ) -> BatchCounts:
+    """Sample and evaluate one batch of failure scenarios"""
+    # pylint: disable=too-many-locals
+    probabilities, batch_size, seed_sequence, analyze_safety = task
+    rng = numpy.random.default_rng(seed_sequence)
+    failed = rng.random((batch_size, len(probabilities))) < probabilities
+    available = int(batch_greatest_quorums(state['evaluator'], ~failed).any(axis=1).sum())
+    intact = numpy.zeros(len(probabilities), dtype=numpy.int64)
+    if not analyze_safety:
+        return batch_size, available, 0, intact
+
+    # distinct failure scenarios are rare for small failure probabilities
+    packed = numpy.packbits(failed, axis=1, bitorder='little')
+    scenarios, counts = numpy.unique(packed, axis=0, return_counts=True)
+    compiled, cache = state['compiled'], state['cache']
+    safe = 0
+    for scenario, count in zip(scenarios, counts):
+        failed_mask = int.from_bytes(scenario.tobytes(), 'little')
+        if get_residual_witness(compiled, failed_mask, cache) is None:
+            safe += int(count)
+        intact[list(iterate_bits(get_intact_mask(compiled, failed_mask, cache)))] += count
+    return batch_size, available, safe, intact
+
+def simulate_batch_job(task: Tuple[numpy.ndarray, int, Any, bool]) -> BatchCounts:
+    """simulate_batch() in the current worker"""
+    return simulate_batch(WORKER_STATE, task)
+
+def get_estimate(successes: int, samples: int, confidence: float) -> Estimate:
+    """Estimate a probability with its Wilson score confidence interval"""
+    z = norm.ppf(0.5 + confidence / 2) # pylint: disable=invalid-name
+    estimate = successes / samples
+    denominator = 1 + z**2 / samples
+    center = (estimate + z**2 / (2 * samples)) / denominator
+    spread = z * numpy.sqrt(estimate * (1 - estimate) / samples + z**2 / (4 * samples**2)) \
+        / denominator
+    return {
+        'estimate': estimate,
+        'lower': float(max(0.0, center - spread)),
+        'upper': float(min(1.0, center + spread))
+    }
+
+def simulate_failures(nodes: List[Node], definitions: Definitions,
+                      failure_probabilities: Union[float, Dict[Node, float]],
+                      samples: int, batch_size: int = 10000, processes: int = 1,
+                      seed: Optional[int] = None, analyze_safety: bool = True,
+                      confidence: float = 0.95) -> SimulationResult:
+    """Estimate availability, safety and per-node intactness if each node fails
+    independently with the given probability
+
+    Samples are evaluated in vectorized batches, distributed over processes if
+    processes > 1. With analyze_safety=False only availability is estimated."""
+    # pylint: disable=too-many-arguments,too-many-positional-arguments,too-many-locals
+    if samples < 1:
+        raise ValueError(f'samples must be at least 1, got {samples}')
+    if batch_size < 1:
+        raise ValueError(f'batch_size must be at least 1, got {batch_size}')
+    if isinstance(failure_probabilities, dict):
+        probabilities = numpy.array([failure_probabilities[node] for node in nodes])
+    else:
+        probabilities = numpy.full(len(nodes), failure_probabilities)
+    batch_sizes = [batch_size] * (samples // batch_size)
+    if samples % batch_size:
+        batch_sizes.append(samples % batch_size)
+    seed_sequences = numpy.random.SeedSequence(seed).spawn(len(batch_sizes))
+    tasks = [(probabilities, size, seed_sequence, analyze_safety)
+             for size, seed_sequence in zip(batch_sizes, seed_sequences)]
+
+    if processes > 1:
+        with Pool(processes, initializer=init_worker, initargs=(definitions, nodes)) as pool:
+            batch_counts = pool.map(simulate_batch_job, tasks)
+    else:
+        state = get_simulation_state(definitions, nodes)
+        batch_counts = [simulate_batch(state, task) for task in tasks]
+
+    available = sum(counts[1] for counts in batch_counts)
+    safe = sum(counts[2] for counts in batch_counts)
+    intact = numpy.sum([counts[3] for counts in batch_counts], axis=0)
+    return {
+        'samples': samples,
+        'availability': get_estimate(available, samples, confidence),
+        'safety': get_estimate(safe, samples, confidence) if analyze_safety else None,
+        'intactness': {
+            node: get_estimate(int(intact[index]), samples, confidence)
+            for index, node in enumerate(nodes)
+        } if analyze_safety else None
+    }
@@ -0,0 +1,58 @@
+"""Tests for Monte Carlo simulation"""
+import pytest
+
+from .centralities_test import DEFINITIONS, NODES_LIST
+from .compiled_fbas import compile_definitions
+from .simulation import get_estimate, simulate_failures
+from .utils.sets import powerset
+from .what_if import analyze_failures
+
+def test_get_estimate():
+    """Test get_estimate()"""
+    estimate = get_estimate(50, 100, 0.95)
+    assert estimate['estimate'] == 0.5
+    assert 0.40 < estimate['lower'] < 0.41
+    assert 0.59 < estimate['upper'] < 0.60
+    assert abs(get_estimate(0, 100, 0.95)['lower']) < 1e-12
+
+def test_simulate_failures_extremes():
+    """Test simulate_failures() without and with certain failures"""
+    result = simulate_failures(NODES_LIST, DEFINITIONS, 0.0, 100, batch_size=30)
+    assert result['samples'] == 100
+    assert result['availability']['estimate'] == 1.0
+    assert result['safety'] is not None and result['safety']['estimate'] == 1.0
+    result = simulate_failures(NODES_LIST, DEFINITIONS, 1.0, 100, analyze_safety=False)
+    assert result['availability']['estimate'] == 0.0
+    assert result['safety'] is None and result['intactness'] is None
+
+def test_simulate_failures_invalid_samples():
+    """Test that simulate_failures() rejects empty samples and batches"""
+    with pytest.raises(ValueError):
+        simulate_failures(NODES_LIST, DEFINITIONS, 0.1, 0)
+    with pytest.raises(ValueError):
+        simulate_failures(NODES_LIST, DEFINITIONS, 0.1, 100, batch_size=0)
+
+def test_simulate_failures():
+    """Test simulate_failures() against exact probabilities"""
+    probability = 0.2
+    scenarios = [set(failed) for failed in powerset(NODES_LIST)]
+    weights = [probability**len(failed) * (1 - probability)**(len(NODES_LIST) - len(failed))
+               for failed in scenarios]
+    results = analyze_failures(compile_definitions(DEFINITIONS), scenarios)
+    exact_availability = sum(weight for weight, result in zip(weights, results)
+                             if result['has_quorum'])
+    exact_safety = sum(weight for weight, result in zip(weights, results)
+                       if result['has_quorum_intersection'])
+    exact_intactness = {node: sum(weight for weight, result in zip(weights, results)
+                                  if node in result['intact_nodes'])
+                        for node in NODES_LIST}
+
+    result = simulate_failures(NODES_LIST, DEFINITIONS, {node: probability for node in NODES_LIST},
+                               20000, batch_size=5000, processes=2, seed=42, confidence=0.999)
+    assert result['availability']['lower'] <= exact_availability <= \
+        result['availability']['upper']
+    assert result['safety'] is not None
+    assert result['safety']['lower'] <= exact_safety <= result['safety']['upper']
+    assert result['intactness'] is not None
+    for node, estimate in result['intactness'].items():
+        assert estimate['lower'] <= exact_intactness[node] <= estimate['upper']
@@ -0,0 +1,110 @@
+"""Indexed quorum slices: is some slice of a node contained in a candidate set?
+
+The slices of each node are stored as a set-trie: every slice is a path of node
+indexes in increasing order (frequent nodes get small indexes so that slices share
+prefixes). A subset query only follows the edges of nodes in the candidate.
+Subsumed (non-minimal) slices are dropped since they never change the answer."""
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, List, Tuple, TypedDict
+
+from .utils.graph import Node, Nodes
+from .utils.sets import iterate_bits, popcount
+
+# node index -> child trie, END marks the end of a slice
+SetTrie = Dict[int, Any]
+
+SliceIndex = TypedDict('SliceIndex', {
+    'nodes': List[Any],
+    'node_to_index': Dict[Any, int],
+    'tries': Dict[Any, SetTrie],
+    # number of minimal slices per node
+    'n_slices': Dict[Any, int]
+})
+
+END = -1
+
+def trie_contains_subset(trie: SetTrie, candidate: int) -> bool:
+    """Check whether the trie holds a subset of the candidate bitmask"""
+    if END in trie:
+        return True
+    stack = [trie]
+    candidate_indexes: List[int] = []
+    while stack:
+        trie_node = stack.pop()
+        if len(trie_node) <= 8:
+            children = [child for index, child in trie_node.items()
+                        if index != END and (candidate >> index) & 1]
+        else:
+            # wide nodes: follow the candidate's indexes instead of all edges
+            if not candidate_indexes:
+                candidate_indexes = list(iterate_bits(candidate))
+            children = [trie_node[index] for index in candidate_indexes if index in trie_node]
+        for child in children:
+            if END in child:
+                return True
+        stack.extend(children)
+    return False
+
+def trie_insert(trie: SetTrie, mask: int):
+    """Insert a bitmask into the trie"""
+    for index in iterate_bits(mask):
+        trie = trie.setdefault(index, {})
+    trie[END] = True
+
+def get_slice_index(slices_by_node: Dict[Node, Iterable[Iterable[Node]]]) -> SliceIndex:
+    """Build the index of the minimal slices of every node"""
+    frozen_slices_by_node = {node: {frozenset(quorum_slice) for quorum_slice in quorum_slices}
+                             for node, quorum_slices in slices_by_node.items()}
+    frequencies = Counter(member for quorum_slices in frozen_slices_by_node.values()
+                          for quorum_slice in quorum_slices for member in quorum_slice)
+    nodes = [node for node, _ in frequencies.most_common()]
+    node_to_index = {node: index for index, node in enumerate(nodes)}
+    tries: Dict[Any, SetTrie] = {}
+    n_slices: Dict[Any, int] = {}
+    for node, quorum_slices in frozen_slices_by_node.items():
+        trie: SetTrie = {}
+        n_slices[node] = 0
+        masks = {sum(1 << node_to_index[member] for member in quorum_slice)
+                 for quorum_slice in quorum_slices}
+        # a slice can only be subsumed by smaller slices, which are inserted before
+        for mask in sorted(masks, key=popcount):
+            if not trie_contains_subset(trie, mask):
+                trie_insert(trie, mask)
+                n_slices[node] += 1
+        tries[node] = trie
+    return {'nodes': nodes, 'node_to_index': node_to_index, 'tries': tries,
+            'n_slices': n_slices}
+
+def get_candidate_mask(index: SliceIndex, nodes_subset: Iterable[Node]) -> int:
+    """Convert a candidate set to a bitmask (nodes in no slice are ignored)"""
+    node_to_index = index['node_to_index']
+    mask = 0
+    for node in nodes_subset:
+        if node in node_to_index:
+            mask |= 1 << node_to_index[node]
+    return mask
+
+def index_contains_slice(index: SliceIndex, nodes_subset: Nodes, node: Node) -> bool:
+    """contains_slice() on the index"""
+    return trie_contains_subset(index['tries'][node], get_candidate_mask(index, nodes_subset))
+
+def get_indexed_is_slice_contained(slices_by_node: Dict[Node, Iterable[Iterable[Node]]]
+                                   ) -> Callable[[Nodes, Node], bool]:
+    """Returns a function that checks whether a node's slice is contained in a candidate set
+    (like contains_slice() with slices_by_node, but indexed)"""
+    index = get_slice_index(slices_by_node)
+    return lambda candidate, node: index_contains_slice(index, candidate, node)
+
+def get_minimal_slices(index: SliceIndex, node: Node) -> List[Nodes]:
+    """Return the minimal slices of a node"""
+    nodes = index['nodes']
+    minimal_slices: List[Nodes] = []
+    stack: List[Tuple[SetTrie, Nodes]] = [(index['tries'][node], set())]
+    while stack:
+        trie, prefix = stack.pop()
+        for trie_index, child in trie.items():
+            if trie_index == END:
+                minimal_slices.append(prefix)
+            else:
+                stack.append((child, prefix.union({nodes[trie_index]})))
+    return minimal_slices
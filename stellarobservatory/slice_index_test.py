@@ -0,0 +1,62 @@
+"""Tests for indexed quorum slices"""
+import random
+
+from . import quorum_slice_definition
+from .quorum_intersection import quorum_intersection
+from .quorum_slice_definition import get_is_slice_contained, quorum_slices_to_definitions
+from .quorums import contains_slice
+from .slice_index import get_indexed_is_slice_contained, get_minimal_slices, get_slice_index, \
+    index_contains_slice
+
+SLICES_BY_NODE = {
+    'A': [{'A', 'B'}, {'A', 'C'}, {'A', 'B', 'C'}],
+    'B': [{'A', 'B'}],
+    'C': [{'A', 'B', 'C', 'D'}],
+    'D': [{'D'}]
+}
+
+def test_get_slice_index():
+    """Test that subsumed slices are dropped"""
+    index = get_slice_index(SLICES_BY_NODE)
+    assert index['n_slices'] == {'A': 2, 'B': 1, 'C': 1, 'D': 1}
+    assert sorted(map(sorted, get_minimal_slices(index, 'A'))) == [['A', 'B'], ['A', 'C']]
+    assert index_contains_slice(index, {'A', 'C', 'E'}, 'A')
+    assert not index_contains_slice(index, {'A', 'D'}, 'A')
+    assert quorum_intersection((get_indexed_is_slice_contained(SLICES_BY_NODE),
+                                set(SLICES_BY_NODE)))[0] is False
+
+def test_index_contains_slice_random():
+    """Test index_contains_slice() against contains_slice() on random slices"""
+    rng = random.Random(0)
+    for _ in range(200):
+        nodes = list(range(rng.randint(1, 10)))
+        slices_by_node = {
+            node: [set(rng.sample(nodes, rng.randint(0, len(nodes))))
+                   for _ in range(rng.randint(0, 20))]
+            for node in nodes}
+        index = get_slice_index(slices_by_node)
+        for node in nodes:
+            assert {frozenset(quorum_slice) for quorum_slice in get_minimal_slices(index, node)} \
+                == {frozenset(quorum_slice) for quorum_slice in slices_by_node[node]
+                    if not any(other < quorum_slice for other in slices_by_node[node])}
+            for _ in range(10):
+                candidate = set(rng.sample(nodes, rng.randint(0, len(nodes))))
+                assert index_contains_slice(index, candidate, node) == \
+                    contains_slice(candidate, slices_by_node, node)
+
+def test_get_is_slice_contained_indexed(monkeypatch):
+    """Test get_is_slice_contained() with slice indexes against contains_slice()"""
+    monkeypatch.setattr(quorum_slice_definition, 'SLICE_INDEX_MIN_SLICES', 2)
+    rng = random.Random(1)
+    for _ in range(50):
+        nodes = list(range(rng.randint(1, 8)))
+        slices_by_node = {
+            node: [set(rng.sample(nodes, rng.randint(1, len(nodes))))
+                   for _ in range(rng.randint(1, 10))]
+            for node in nodes}
+        is_slice_contained = get_is_slice_contained(quorum_slices_to_definitions(slices_by_node))
+        for _ in range(20):
+            candidate = set(rng.sample(nodes, rng.randint(0, len(nodes))))
+            for node in nodes:
+                assert is_slice_contained(candidate, node) == \
+                    contains_slice(candidate, slices_by_node, node)
@@ -1,12 +1,13 @@
 """Fetch and process nodes"""
 from typing import Any, Dict, List, Optional, Set, TypedDict, cast
-import requests
 
 from .utils.graph import Nodes
 from .quorum_slice_definition import get_normalized_definition, Definition, Definitions
 
 def get_nodes_from_stellarbeat():
     """Fetch nodes from stellarbeat.io"""
+    # requests is only needed (and imported) when fetching
+    import requests # pylint: disable=import-outside-toplevel
     return requests.get('https://api.stellarbeat.io/v1/nodes').json()
 
 QuorumSet = TypedDict('QuorumSet', {
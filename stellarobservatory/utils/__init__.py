@@ -1,5 +1,17 @@
-"""Stellar Observatory utilities"""
-from . import graph
-from . import sets
-from . import scc
+"""Stellar Observatory utilities (imported lazily, see stellarobservatory/__init__.py)"""
+import importlib
+from typing import TYPE_CHECKING, Any, List
+
+if TYPE_CHECKING:
+    from . import graph, sets, scc
+
 __all__ = ['graph', 'sets', 'scc']
+
+def __getattr__(name: str) -> Any:
+    """Import submodules on first access"""
+    if name in __all__:
+        return importlib.import_module('.' + name, __name__)
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()).union(__all__))
@@ -1,8 +1,6 @@
 """Utilities for graphs"""
 from typing import Dict, List, Set, TypeVar
 
-import numpy
-
 Node = TypeVar('Node')
 Nodes = Set[Node]
 Graph = Dict[Node, Nodes]
@@ -36,8 +34,26 @@ def get_dependencies(graph: Graph, node: Node):
     dependencies.discard(node)
     return dependencies
 
+def get_dag_dependencies(graph: Graph) -> Dict[Node, Nodes]:
+    """Get the dependencies of all nodes of a directed acyclic graph at once
+    (the dependencies of a node are reused for all nodes depending on it)"""
+    all_dependencies: Dict[Node, Nodes] = {}
+    def traverse_node(node):
+        if node not in all_dependencies:
+            dependencies: Set[Node] = set()
+            for target_node in graph[node]:
+                dependencies.add(target_node)
+                dependencies.update(traverse_node(target_node))
+            all_dependencies[node] = dependencies
+        return all_dependencies[node]
+    for node in graph:
+        traverse_node(node)
+    return all_dependencies
+
 def get_adjacency_matrix(node_list: List[Node], graph: Graph):
     """Get the adjacency matrix of a graph"""
+    # numpy is imported here so that the graph types do not pull in numpy
+    import numpy # pylint: disable=import-outside-toplevel
     node_to_index = {node: index for index, node in enumerate(node_list)}
     adjacency_matrix = numpy.zeros((len(node_list), len(node_list)), dtype=int)
     for node in node_list:
@@ -1,7 +1,7 @@
 """Test graph utilities"""
 import numpy
 from .graph import get_adjacency_matrix, get_transpose_graph, get_indegrees, \
-    get_induced_subgraph, get_dependencies
+    get_induced_subgraph, get_dag_dependencies, get_dependencies
 
 GRAPH = {
         1: {2, 3},
@@ -45,3 +45,11 @@ def test_get_adjacency_matrix():
         [0, 1, 0]
     ])
     numpy.testing.assert_array_equal(matrix, expected_matrix)
+
+def test_get_dag_dependencies():
+    """Test get_dag_dependencies() with a directed acyclic graph"""
+    dag = {1: {2, 3}, 2: {4}, 3: {4}, 4: set(), 5: {1}}
+    assert get_dag_dependencies(dag) == {
+        node: get_dependencies(dag, node) for node in dag
+    }
+    assert get_dag_dependencies(dag)[5] == {1, 2, 3, 4}
@@ -1,6 +1,7 @@
 """Utilities for sets"""
 from itertools import chain, combinations
-from typing import Iterable
+from math import comb
+from typing import Iterable, List, Sequence
 
 def deepfreezesets(sets_iterable):
     """Deep-freeze a list of sets"""
@@ -12,3 +13,36 @@ def powerset(iterable: Iterable) -> Iterable:
     all_combinations = [combinations(frozen_iterable_set, size)
                         for size in range(len(frozen_iterable_set) + 1)]
     return [frozenset(combination) for combination in chain(*all_combinations)]
+
+def get_binomials(n: int) -> List[List[int]]:
+    """Return the table of binomial coefficients C(i, j) for 0 <= i, j <= n"""
+    return [[comb(i, j) for j in range(n + 1)] for i in range(n + 1)]
+
+def get_colex_rank(indexes: Sequence[int], binomials: List[List[int]]) -> int:
+    """Return the rank of a combination (increasing indexes) among all combinations of
+    the same size in colexicographic order"""
+    return sum(binomials[index][position] for position, index in enumerate(indexes, 1))
+
+def get_colex_sub_ranks(indexes: Sequence[int], binomials: List[List[int]]) -> List[int]:
+    """Return the colex ranks of the combinations without indexes[0], indexes[1], ..."""
+    # dropping an index moves all later indexes one position down
+    prefix_rank = 0
+    suffix_rank = sum(binomials[index][position - 1]
+                      for position, index in enumerate(indexes, 1))
+    sub_ranks = []
+    for position, index in enumerate(indexes, 1):
+        suffix_rank -= binomials[index][position - 1]
+        sub_ranks.append(prefix_rank + suffix_rank)
+        prefix_rank += binomials[index][position]
+    return sub_ranks
+
+def popcount(mask: int) -> int:
+    """Return the number of set bits of a bitmask"""
+    return bin(mask).count('1')
+
+def iterate_bits(mask: int) -> Iterable[int]:
+    """Iterate over the indexes of the set bits of a bitmask (lowest first)"""
+    while mask:
+        lowest_bit = mask & -mask
+        yield lowest_bit.bit_length() - 1
+        mask ^= lowest_bit
@@ -1,5 +1,8 @@
 """Test sets utilities"""
-from .sets import deepfreezesets, powerset
+from itertools import combinations
+from math import comb
+
+from .sets import deepfreezesets, get_binomials, get_colex_rank, get_colex_sub_ranks, powerset
 
 def test_powerset_list():
     """Test powerset() with a list"""
@@ -12,3 +15,18 @@ def test_powerset_set():
     result = powerset({'a', 'b'})
     expected = deepfreezesets([{}, {'a'}, {'b'}, {'a', "b"}])
     assert frozenset(result) == expected
+
+def test_colex_ranks():
+    """Test that colex ranks enumerate the combinations of each size"""
+    binomials = get_binomials(6)
+    for size in range(7):
+        ranks = {combination: get_colex_rank(combination, binomials)
+                 for combination in combinations(range(6), size)}
+        assert sorted(ranks.values()) == list(range(comb(6, size)))
+        assert sorted(ranks, key=lambda combination: combination[::-1]) == \
+            sorted(ranks, key=ranks.get)
+        for combination, rank in ranks.items():
+            assert rank == get_colex_rank(combination, binomials)
+            assert get_colex_sub_ranks(combination, binomials) == [
+                get_colex_rank(combination[:position] + combination[position + 1:], binomials)
+                for position in range(size)]
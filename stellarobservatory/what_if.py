@@ -0,0 +1,126 @@
+"""What-if analysis of failing nodes on a compiled FBAS"""
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple, TypedDict
+
+from .compiled_fbas import CompiledFbas, get_compiled_fbas, greatest_quorum_mask, \
+    is_quorum_mask, mask_to_nodes, nodes_to_mask
+from .quorum_intersection import quorum_intersection
+from .utils.graph import Nodes
+
+# pair of disjoint quorums (as bitmasks) of a residual FBAS
+Witness = Tuple[int, int]
+
+WhatIfCache = TypedDict('WhatIfCache', {
+    # bitmask of deleted nodes -> witness (or None if the residual FBAS has quorum
+    # intersection), least recently used first
+    # pylint: disable=unsubscriptable-object
+    'quorum_intersection': 'OrderedDict[int, Optional[Witness]]',
+    'max_size': int,
+    'witnesses': List[Witness]
+})
+
+WhatIfResult = TypedDict('WhatIfResult', {
+    'failed': Nodes,
+    'has_quorum': bool,
+    'has_quorum_intersection': bool,
+    'intact_nodes': Nodes
+})
+
+MAX_WITNESSES = 32
+
+DEFAULT_WHAT_IF_CACHE_SIZE = 2**16
+
+def get_what_if_cache(max_size: int = DEFAULT_WHAT_IF_CACHE_SIZE) -> WhatIfCache:
+    """Return an empty cache that can be shared between what-if analyses of one FBAS"""
+    return {'quorum_intersection': OrderedDict(), 'max_size': max_size, 'witnesses': []}
+
+def cache_residual_witness(cache: WhatIfCache, deleted: int, witness: Optional[Witness]
+                           ) -> Optional[Witness]:
+    """Memoize the witness of a residual FBAS (evicting the least recently used one)"""
+    results = cache['quorum_intersection']
+    results[deleted] = witness
+    if len(results) > cache['max_size']:
+        results.popitem(last=False)
+    return witness
+
+def get_residual_witness(compiled: CompiledFbas, deleted: int, cache: WhatIfCache
+                         ) -> Optional[Witness]:
+    """Return two disjoint quorums of the FBAS without the deleted nodes (or None)
+
+    Deleting more nodes keeps quorums intact, so witnesses of previous analyses
+    are tried before running the quorum intersection checker."""
+    results = cache['quorum_intersection']
+    if deleted in results:
+        results.move_to_end(deleted)
+        return results[deleted]
+    witnesses = cache['witnesses']
+    for index, witness in enumerate(witnesses):
+        quorum1, quorum2 = witness
+        if is_quorum_mask(compiled, quorum1, deleted) and \
+                is_quorum_mask(compiled, quorum2, deleted):
+            witnesses.insert(0, witnesses.pop(index))
+            return cache_residual_witness(cache, deleted, witness)
+    result = quorum_intersection(get_compiled_fbas(compiled, mask_to_nodes(compiled, deleted)))
+    if result is True:
+        return cache_residual_witness(cache, deleted, None)
+    _, quorum1_nodes, quorum2_nodes = result
+    witness = (nodes_to_mask(compiled, quorum1_nodes), nodes_to_mask(compiled, quorum2_nodes))
+    witnesses.insert(0, witness)
+    del witnesses[MAX_WITNESSES:]
+    return cache_residual_witness(cache, deleted, witness)
+
+def get_intact_mask(compiled: CompiledFbas, b_nodes: int, cache: WhatIfCache) -> int:
+    """Bitmask variant of intactness.get_intact_nodes() with shared quorum intersection results"""
+    all_mask = compiled['all_mask']
+    current = all_mask & ~b_nodes
+    while True:
+        greatest_q = greatest_quorum_mask(compiled, current)
+        witness = get_residual_witness(compiled, all_mask & ~greatest_q, cache)
+        if witness is None:
+            return greatest_q
+        quorum1, quorum2 = witness
+        current_w1 = greatest_quorum_mask(compiled, greatest_q & ~quorum1)
+        current_w2 = greatest_quorum_mask(compiled, greatest_q & ~quorum2)
+        if current_w1 == 0:
+            current = current_w2
+        elif current_w2 == 0:
+            current = current_w1
+        else:
+            current = current_w1 & current_w2
+
+def what_if_failed(compiled: CompiledFbas, failed: Nodes,
+                   cache: Optional[WhatIfCache] = None) -> WhatIfResult:
+    """Analyze the FBAS if the failed nodes go down
+
+    * has_quorum: the remaining nodes still contain a quorum
+    * has_quorum_intersection: the FBAS with the failed nodes removed
+      (see remove_from_definition()) enjoys quorum intersection
+    * intact_nodes: the nodes that are intact despite the failed nodes
+    """
+    if cache is None:
+        cache = get_what_if_cache()
+    all_mask = compiled['all_mask']
+    failed_mask = nodes_to_mask(compiled, failed)
+    return {
+        'failed': set(failed),
+        'has_quorum': greatest_quorum_mask(compiled, all_mask & ~failed_mask) != 0,
+        'has_quorum_intersection': get_residual_witness(compiled, failed_mask, cache) is None,
+        'intact_nodes': mask_to_nodes(compiled, get_intact_mask(compiled, failed_mask, cache))
+    }
+
+def analyze_failures(compiled: CompiledFbas, failure_scenarios: Iterable[Nodes],
+                     cache: Optional[WhatIfCache] = None) -> List[WhatIfResult]:
+    """Analyze many failure scenarios at once (see what_if_failed())
+
+    Scenarios are evaluated from smallest to largest so that disjoint quorums found
+    for smaller scenarios can be reused for larger ones. The results are returned in
+    the order of the given scenarios."""
+    if cache is None:
+        cache = get_what_if_cache()
+    scenarios = [set(failed) for failed in failure_scenarios]
+    results: Dict[int, WhatIfResult] = {}
+    for failed in sorted(scenarios, key=len):
+        failed_mask = nodes_to_mask(compiled, failed)
+        if failed_mask not in results:
+            results[failed_mask] = what_if_failed(compiled, failed, cache)
+    return [results[nodes_to_mask(compiled, failed)] for failed in scenarios]
@@ -0,0 +1,52 @@
+"""Tests for what-if analysis"""
+from .centralities_test import DEFINITIONS, NODES
+from .compiled_fbas import compile_definitions
+from .intactness import get_intact_nodes
+from .quorum_intersection import quorum_intersection
+from .quorum_slice_definition import get_is_slice_contained, remove_from_definition
+from .quorums import greatest_quorum
+from .utils.sets import powerset
+from .what_if import analyze_failures, get_what_if_cache, what_if_failed
+
+def test_what_if_failed():
+    """Test what_if_failed() with single failing nodes"""
+    compiled = compile_definitions(DEFINITIONS)
+    assert what_if_failed(compiled, {1}) == {
+        'failed': {1},
+        'has_quorum': False,
+        'has_quorum_intersection': False,
+        'intact_nodes': set()
+    }
+    assert what_if_failed(compiled, {3}) == {
+        'failed': {3},
+        'has_quorum': True,
+        'has_quorum_intersection': False,
+        'intact_nodes': {1, 4, 5}
+    }
+
+def test_analyze_failures():
+    """Test analyze_failures() against copying definitions for every scenario"""
+    compiled = compile_definitions(DEFINITIONS)
+    is_slice_contained = get_is_slice_contained(DEFINITIONS)
+    scenarios = [set(failed) for failed in powerset(NODES)]
+    cache = get_what_if_cache()
+    results = analyze_failures(compiled, scenarios, cache)
+    # a small cache evicts results but gives the same answers
+    small_cache = get_what_if_cache(max_size=4)
+    assert analyze_failures(compiled, scenarios, small_cache) == results
+    assert len(small_cache['quorum_intersection']) == 4
+    for failed, result in zip(scenarios, results):
+        definitions = DEFINITIONS
+        for node in failed:
+            definitions = {
+                other: remove_from_definition(definition, node)
+                for other, definition in definitions.items() if other != node
+            }
+        residual_fbas = (get_is_slice_contained(definitions), NODES - failed)
+        assert result['failed'] == failed
+        assert result['has_quorum'] == \
+            (greatest_quorum(is_slice_contained, NODES - failed, set()) != set())
+        assert result['has_quorum_intersection'] == \
+            (quorum_intersection(residual_fbas) is True)
+        assert result['intact_nodes'] == \
+            get_intact_nodes((is_slice_contained, NODES), failed)